@@ -0,0 +1,95 @@
+"""
+Benchmark: time to first avatar frame, monolithic vs progressive rendering.
+
+The monolithic path renders the whole reply as one video, so nothing can play
+until it's done. The progressive path splits the audio at pauses and plays the
+first segment as soon as it's rendered.
+
+By default a simulated renderer is used whose cost is a fixed overhead plus a
+multiple of the audio length (SadTalker on CPU behaves like this). With --real
+the configured Avatar (SadTalker or MOCK) is used instead.
+
+Usage:
+    python benchmarks/bench_avatar_segments.py [--seconds 20] [--rtf 0.5] [--real]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import scipy.io.wavfile as wav
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.video_segments import render_progressive
+
+SAMPLE_RATE = 16000
+
+
+class SimulatedAvatar:
+    def __init__(self, overhead=0.2, rtf=0.5):
+        self.overhead = overhead
+        self.rtf = rtf
+
+    def generate_video(self, audio_path, image_path=None, output_path=None):
+        sr, audio = wav.read(audio_path)
+        time.sleep(self.overhead + self.rtf * len(audio) / sr)
+        with open(output_path, "w") as f:
+            f.write("dummy video content")
+        return output_path
+
+
+def synthetic_reply(seconds, sample_rate=SAMPLE_RATE):
+    """Speech-like bursts of 1.5-3.5 s separated by short pauses."""
+    rng = np.random.default_rng(0)
+    parts, total = [], 0.0
+    while total < seconds:
+        burst = rng.uniform(1.5, 3.5)
+        t = np.arange(int(burst * sample_rate)) / sample_rate
+        parts.append(0.3 * np.sin(2 * np.pi * 220 * t) * (0.5 + 0.5 * np.sin(2 * np.pi * 3 * t)))
+        parts.append(0.002 * rng.standard_normal(int(0.3 * sample_rate)))
+        total += burst + 0.3
+    return (np.concatenate(parts) * 32767).astype(np.int16)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=20.0, help="Reply length")
+    parser.add_argument("--rtf", type=float, default=0.5, help="Simulated render time per audio second")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--real", action="store_true", help="Use the configured Avatar")
+    args = parser.parse_args()
+
+    if args.real:
+        from core.avatar import Avatar
+        avatar = Avatar()
+    else:
+        avatar = SimulatedAvatar(rtf=args.rtf)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        audio_path = os.path.join(tmp, "reply.wav")
+        wav.write(audio_path, SAMPLE_RATE, synthetic_reply(args.seconds))
+
+        start = time.perf_counter()
+        avatar.generate_video(audio_path, output_path=os.path.join(tmp, "whole.mp4"))
+        monolithic = time.perf_counter() - start
+
+        start = time.perf_counter()
+        playlist = render_progressive(avatar, audio_path, os.path.join(tmp, "segments"), max_workers=args.workers)
+        next(iter(playlist))
+        first_segment = time.perf_counter() - start
+        playlist.wait()
+        progressive_total = time.perf_counter() - start
+
+    print(f"{args.seconds:.0f}s reply, {len(playlist.segments)} segments")
+    print(f"{'path':<14}{'first frame':>14}{'all video':>14}")
+    print(f"{'monolithic':<14}{monolithic:>13.2f}s{monolithic:>13.2f}s")
+    print(f"{'progressive':<14}{first_segment:>13.2f}s{progressive_total:>13.2f}s")
+    print(f"Time to first frame: {monolithic / first_segment:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
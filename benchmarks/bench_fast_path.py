@@ -0,0 +1,75 @@
+"""
+Benchmark: template fast path vs always calling the LLM.
+
+Replays scripted conversations through the Thinker twice, with fast_path off
+and on, and reports LLM calls made/avoided and per-turn latency. By default
+Ollama is simulated with a fixed per-call latency (--llm-latency) so the
+numbers are reproducible; --live uses a running Ollama instead.
+
+Usage:
+    python benchmarks/bench_fast_path.py [--llm-latency 0.8] [--live]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import ollama
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.thinker import Thinker
+
+CONVERSATIONS = [
+    ["Hi, I want to learn coding.", "I want to be a web developer.", "I am a beginner.", "I know a little HTML."],
+    ["Hello!", "Data science sounds fun to me", "I'm starting from scratch", "nothing really, no skills"],
+    ["I want to become an AI engineer", "intermediate", "Python and SQL"],
+    ["Hey", "What courses do you have?", "I'd like to be a data scientist", "I'm advanced", "TensorFlow"],
+]
+
+
+def simulated_chat(latency):
+    def chat(model, messages, stream=False, **kwargs):
+        time.sleep(latency)
+        reply = "That sounds great! Tell me a bit more about what you want to learn."
+        if stream:
+            return iter([{"message": {"content": reply}}])
+        return {"message": {"content": reply}}
+    return chat
+
+
+def run(fast_path):
+    latencies, calls, avoided = [], 0, 0
+    for conversation in CONVERSATIONS:
+        thinker = Thinker(fast_path=fast_path)
+        thinker.lms.recommend_courses = lambda *args: []  # Keep the catalog search out of the timing
+        for text in conversation:
+            start = time.perf_counter()
+            thinker.process_input(text)
+            latencies.append(time.perf_counter() - start)
+        calls += thinker.llm_calls
+        avoided += thinker.llm_calls_avoided
+    return latencies, calls, avoided
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--llm-latency", type=float, default=0.8, help="Seconds per simulated LLM call")
+    parser.add_argument("--live", action="store_true", help="Call a running Ollama instead of simulating it")
+    args = parser.parse_args()
+    if not args.live:
+        ollama.chat = simulated_chat(args.llm_latency)
+
+    turns = sum(len(c) for c in CONVERSATIONS)
+    print(f"{len(CONVERSATIONS)} conversations, {turns} turns")
+    print(f"{'mode':<10}{'LLM calls':>10}{'avoided':>9}{'median turn':>13}{'mean turn':>11}{'total':>8}")
+    for name, fast_path in [("llm-only", False), ("fast-path", True)]:
+        latencies, calls, avoided = run(fast_path)
+        print(f"{name:<10}{calls:>10}{avoided:>9}{statistics.median(latencies) * 1000:>11.0f}ms"
+              f"{statistics.mean(latencies) * 1000:>9.0f}ms{sum(latencies):>7.1f}s")
+
+
+if __name__ == "__main__":
+    main()
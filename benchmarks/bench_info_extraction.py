@@ -0,0 +1,124 @@
+"""
+Benchmark: the compiled single-pass InfoExtractor vs the substring scans
+Thinker._update_collected_info used before.
+
+Runs both over a synthetic corpus of counselor-style utterances, reports the
+time per utterance, and counts where the two disagree (mostly the old
+matcher's "java" in "javascript" and "no" in "know" cases), with examples.
+
+Usage:
+    python benchmarks/bench_info_extraction.py [--utterances 100000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.extraction import InfoExtractor
+
+TEMPLATES = [
+    "I want to be a {career}.",
+    "I'm interested in {career}, and I am {level}.",
+    "I know {skill} and {skill2}.",
+    "I know a little {skill} but no {skill2}.",
+    "I'm {level}, I don't know {skill} yet.",
+    "Honestly nothing, I'm {level}.",
+    "I have used {skill} at work for a few years now and I'd like to move into {career}.",
+    "Can you tell me more about the courses?",
+    "No, I don't think so.",
+    "I know {skill}, {skill2} and {skill3}.",
+]
+CAREERS = ["web developer", "data scientist", "detached scientist", "AI engineer", "web development",
+           "data science", "game designer"]
+LEVELS = ["a beginner", "new to this", "starting from scratch", "intermediate", "advanced", "a novice"]
+SKILLS = ["Python", "HTML", "CSS", "JavaScript", "React", "Java", "TensorFlow", "SQL", "Git", "Excel"]
+
+
+def legacy_extract(user_text):
+    """Thinker._update_collected_info before the compiled matcher, returning the fields it set."""
+    collected_info = {"goal": None, "level": None, "skills": None, "career_path": None}
+    text_lower = user_text.lower()
+
+    if "web developer" in text_lower or "web development" in text_lower:
+        collected_info["career_path"] = "Web Developer"
+        collected_info["goal"] = "Learn Web Development"
+    elif (
+        "data scientist" in text_lower
+        or "data science" in text_lower
+        or "detached scientist" in text_lower
+        or "data size" in text_lower
+    ):
+        collected_info["career_path"] = "Data Scientist"
+        collected_info["goal"] = "Learn Data Science"
+    elif "ai engineer" in text_lower:
+        collected_info["career_path"] = "AI Engineer"
+        collected_info["goal"] = "Learn AI"
+
+    if any(w in text_lower for w in ["beginner", "new", "scratch", "starting", "begin", "novice", "no experience"]):
+        collected_info["level"] = "Beginner"
+    elif "intermediate" in text_lower:
+        collected_info["level"] = "Intermediate"
+    elif "advanced" in text_lower:
+        collected_info["level"] = "Advanced"
+
+    skills = []
+    for skill in ["python", "html", "css", "javascript", "react", "java", "tensorflow", "sql", "git"]:
+        if f"no {skill}" in text_lower or f"not {skill}" in text_lower:
+            continue
+        if skill in text_lower:
+            skills.append(skill.upper() if skill in ["html", "css", "sql", "git"] else skill.capitalize())
+
+    if skills:
+        collected_info["skills"] = ", ".join(skills)
+    elif "none" in text_lower or "no" in text_lower or "nothing" in text_lower:
+        collected_info["skills"] = "none"
+    return {k: v for k, v in collected_info.items() if v is not None}
+
+
+def make_corpus(n, seed=0):
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(n):
+        skill, skill2, skill3 = rng.sample(SKILLS, 3)
+        corpus.append(rng.choice(TEMPLATES).format(
+            career=rng.choice(CAREERS), level=rng.choice(LEVELS), skill=skill, skill2=skill2, skill3=skill3))
+    return corpus
+
+
+def timed(fn, corpus):
+    start = time.perf_counter()
+    results = [fn(text) for text in corpus]
+    return results, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--utterances", type=int, default=100000)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.utterances)
+    extractor = InfoExtractor()
+    legacy, legacy_time = timed(legacy_extract, corpus)
+    compiled, compiled_time = timed(extractor.extract, corpus)
+
+    n = len(corpus)
+    print(f"{n} utterances")
+    print(f"legacy substring scans: {legacy_time:.2f}s ({legacy_time / n * 1e6:.1f} us/utterance)")
+    print(f"compiled matcher:       {compiled_time:.2f}s ({compiled_time / n * 1e6:.1f} us/utterance)")
+    print(f"speedup: {legacy_time / compiled_time:.2f}x")
+
+    differences = [(text, old, new) for text, old, new in zip(corpus, legacy, compiled) if old != new]
+    print(f"disagreements: {len(differences)} ({len(differences) / n:.1%})")
+    seen = set()
+    for text, old, new in differences:
+        if text not in seen and len(seen) < 5:
+            seen.add(text)
+            print(f"  {text!r}\n    legacy:   {old}\n    compiled: {new}")
+
+
+if __name__ == "__main__":
+    main()
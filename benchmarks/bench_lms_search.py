@@ -0,0 +1,99 @@
+"""
+Benchmark: indexed LMSInterface.recommend_courses vs the linear scan it replaced.
+
+Builds synthetic catalogs (default 10k, 100k and 1M courses), runs the same
+random learner profiles through both, checks they return the same courses,
+and reports index build time and per-query latency.
+
+Usage:
+    python benchmarks/bench_lms_search.py [--sizes 10000 100000 1000000] [--queries 50]
+"""
+import argparse
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.lms_interface import LMSInterface
+
+LEVELS = ["Beginner", "Intermediate", "Advanced"]
+CAREERS = [f"Career {i}" for i in range(300)] + ["Web Developer", "Data Scientist", "AI Engineer", "Any"]
+SKILLS = [f"Skill {i}" for i in range(3000)] + ["Python", "HTML", "CSS", "JavaScript", "SQL", "TensorFlow"]
+
+
+def legacy_recommend(courses, level, skills, career_path):
+    """The scoring loop of recommend_courses before the indexes."""
+    recommendations = []
+    for course in courses:
+        score = 0
+        if course["level"].lower() == level.lower():
+            score += 3
+        if any(c.lower() in career_path.lower() for c in course["career_path"]):
+            score += 5
+        if skills and course["skills"]:
+            user_skills = [s.strip().lower() for s in skills.split(',')]
+            course_skills = [s.lower() for s in course["skills"]]
+            if any(s in course_skills for s in user_skills):
+                score += 2
+        if score > 0:
+            recommendations.append({"course": course, "score": score})
+    recommendations.sort(key=lambda x: x["score"], reverse=True)
+    return [r["course"] for r in recommendations[:3]]
+
+
+def make_catalog(n, seed=0):
+    rng = random.Random(seed)
+    return [{
+        "id": f"c-{i}",
+        "title": f"Course {i}",
+        "level": rng.choice(LEVELS),
+        "skills": rng.sample(SKILLS, rng.randint(1, 4)),
+        "career_path": rng.sample(CAREERS, rng.randint(1, 3)),
+        "url": f"https://example.com/courses/{i}",
+    } for i in range(n)]
+
+
+def make_queries(n, seed=1):
+    rng = random.Random(seed)
+    return [(rng.choice(LEVELS), ", ".join(rng.sample(SKILLS, rng.randint(0, 3))), rng.choice(CAREERS))
+            for _ in range(n)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+    logging.getLogger("core.lms_interface").setLevel(logging.WARNING)
+
+    queries = make_queries(args.queries)
+    print(f"{'courses':>9}{'index build':>13}{'linear scan':>13}{'indexed':>10}{'speedup':>9}{'identical':>11}")
+    for size in args.sizes:
+        catalog = make_catalog(size)
+        start = time.perf_counter()
+        lms = LMSInterface(courses=catalog)
+        build = time.perf_counter() - start
+
+        legacy_times, indexed_times, identical = [], [], 0
+        for level, skills, career in queries:
+            start = time.perf_counter()
+            expected = legacy_recommend(catalog, level, skills, career)
+            legacy_times.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            result = lms.recommend_courses(None, level, skills, career)
+            indexed_times.append(time.perf_counter() - start)
+            identical += result == expected
+
+        legacy_ms = statistics.median(legacy_times) * 1000
+        indexed_ms = statistics.median(indexed_times) * 1000
+        print(f"{size:>9}{build:>12.2f}s{legacy_ms:>11.2f}ms{indexed_ms:>8.2f}ms{legacy_ms / indexed_ms:>8.1f}x"
+              f"{identical:>6}/{len(queries)}")
+
+
+if __name__ == "__main__":
+    main()
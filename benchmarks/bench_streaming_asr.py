@@ -0,0 +1,118 @@
+"""
+Benchmark: end-of-speech -> transcript latency, batch vs streaming ASR.
+
+Replays WAV fixtures through AudioCapture at real-time speed (ArraySource in
+place of the microphone) and measures how long after the last spoken sample
+the final transcript is ready:
+
+    batch      find_utterance() then Listener.transcribe() on the whole clip
+    streaming  StreamingTranscriber (local agreement, tail-only final pass)
+
+Usage:
+    python benchmarks/bench_streaming_asr.py clip1.wav [clip2.wav ...] [--model tiny]
+
+Without arguments, fixtures are synthesized with Speaker.speak_to_file.
+"""
+import os
+import sys
+import time
+import tempfile
+
+import numpy as np
+import scipy.io.wavfile as wav
+from scipy.signal import resample_poly
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.capture import AudioCapture, ArraySource, frame_rms
+from core.listener import Listener, StreamingTranscriber, WHISPER_SAMPLE_RATE
+
+TRAILING_SILENCE = 1.5  # Seconds of silence appended so end-pointing can trigger
+SILENCE_DURATION = 0.6  # End-pointing silence used by both modes
+
+FIXTURE_TEXTS = [
+    "I want to become a data scientist.",
+    "I am a complete beginner, but I know a little bit of Python and some SQL from work.",
+]
+
+
+def load_fixture(path):
+    """Load a WAV as mono int16 at 16 kHz, with trailing silence appended."""
+    rate, audio = wav.read(path)
+    if audio.ndim > 1:
+        audio = audio.mean(axis=1)
+    if audio.dtype != np.int16:
+        audio = np.clip(audio / np.abs(audio).max() * 32767, -32768, 32767)
+    if rate != WHISPER_SAMPLE_RATE:
+        audio = resample_poly(audio.astype(np.float32), WHISPER_SAMPLE_RATE, rate)
+    audio = audio.astype(np.int16)
+    return np.concatenate([audio, np.zeros(int(TRAILING_SILENCE * WHISPER_SAMPLE_RATE), dtype=np.int16)])
+
+
+def speech_end(audio, threshold=200, frame=480):
+    """Sample index just after the last frame above the speech threshold."""
+    last = 0
+    for i in range(0, len(audio) - frame, frame):
+        if frame_rms(audio[i:i + frame]) >= threshold:
+            last = i + frame
+    return last
+
+
+def synthesize_fixtures():
+    from core.speaker import Speaker
+    speaker = Speaker()
+    paths = []
+    for i, text in enumerate(FIXTURE_TEXTS):
+        path = os.path.join(tempfile.gettempdir(), f"asr_fixture_{i}.wav")
+        paths.append(speaker.speak_to_file(text, output_path=path))
+    return paths
+
+
+def replay(listener, audio, streaming):
+    """Replay one clip in real time. Returns (latency_seconds, text)."""
+    source = ArraySource(audio, WHISPER_SAMPLE_RATE, realtime=True)
+    capture = AudioCapture(sample_rate=WHISPER_SAMPLE_RATE, source=source)
+    eos = speech_end(audio) / WHISPER_SAMPLE_RATE
+    max_duration = len(audio) / WHISPER_SAMPLE_RATE
+
+    with capture:
+        started = time.perf_counter()
+        if streaming:
+            streamer = StreamingTranscriber(listener, capture)
+            text = streamer.transcribe_utterance(start=0, max_duration=max_duration,
+                                                 silence_duration=SILENCE_DURATION)
+        else:
+            begin, end = capture.find_utterance(start=0, max_duration=max_duration,
+                                                silence_duration=SILENCE_DURATION)
+            text = listener.transcribe(capture.read(begin, end), WHISPER_SAMPLE_RATE)
+        finished = time.perf_counter() - started
+
+    # The source plays in real time, so speech ended `eos` seconds after start
+    return finished - eos, text
+
+
+def main():
+    args = sys.argv[1:]
+    model_size = "tiny"
+    if "--model" in args:
+        i = args.index("--model")
+        model_size = args[i + 1]
+        del args[i:i + 2]
+
+    paths = args or synthesize_fixtures()
+    listener = Listener(model_size=model_size)
+
+    print(f"End-of-speech -> text latency (model={model_size})")
+    print("=" * 72)
+    for path in paths:
+        audio = load_fixture(path)
+        batch_latency, batch_text = replay(listener, audio, streaming=False)
+        stream_latency, stream_text = replay(listener, audio, streaming=True)
+        print(f"{os.path.basename(path)} ({len(audio) / WHISPER_SAMPLE_RATE:.1f}s)")
+        print(f"  batch:     {batch_latency * 1000:7.0f} ms  '{batch_text}'")
+        print(f"  streaming: {stream_latency * 1000:7.0f} ms  '{stream_text}'")
+
+
+if __name__ == "__main__":
+    main()
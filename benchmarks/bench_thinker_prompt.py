@@ -0,0 +1,86 @@
+"""
+Benchmark: Ollama prompt evaluation per turn, state block first vs last.
+
+"legacy" rebuilds the old layout: the state block appended to the system
+prompt, so the very first message changes every turn and Ollama has to
+re-evaluate the whole prompt. "stable" is the current layout: a byte-stable
+system prompt and history, with the state block sent last.
+
+Ollama reports prompt_eval_count (tokens it actually evaluated, i.e. not
+served from its KV cache) and prompt_eval_duration for every reply. Needs a
+running Ollama with the Thinker's model pulled.
+
+Usage:
+    python benchmarks/bench_thinker_prompt.py [--model qwen3:1.7b]
+"""
+import argparse
+import os
+import statistics
+import sys
+
+import ollama
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.thinker import Thinker
+
+TURNS = [
+    "Hi, I want to learn coding.",
+    "I want to be a web developer.",
+    "I am a complete beginner.",
+    "I know a little HTML.",
+    "Mostly I want to build websites for small businesses.",
+    "I can study in the evenings.",
+]
+
+
+class LegacyLayoutThinker(Thinker):
+    """Sends the state block inside the first system message, as before."""
+    def messages(self):
+        system = {"role": "system", "content": self.system_prompt + "\n" + self.state_message["content"]}
+        return self.context.build(system, self.history[1:], self.pending)
+
+
+def run(thinker_cls, model):
+    thinker = thinker_cls()
+    thinker.model = model
+    stats = []
+    chat = ollama.chat
+
+    def recording_chat(*args, **kwargs):
+        response = chat(*args, **kwargs)
+        stats.append((response.get("prompt_eval_count") or 0, (response.get("prompt_eval_duration") or 0) / 1e9))
+        return response
+
+    ollama.chat = recording_chat
+    try:
+        for text in TURNS:
+            thinker.process_input(text)
+    finally:
+        ollama.chat = chat
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=Thinker().model)
+    args = parser.parse_args()
+
+    # Load the model once so neither layout pays for it
+    ollama.chat(model=args.model, messages=[{"role": "user", "content": "hi"}], options=Thinker().options)
+
+    for name, cls in [("legacy", LegacyLayoutThinker), ("stable", Thinker)]:
+        stats = run(cls, args.model)
+        # The first call of a session can't hit the cache in either layout
+        later = stats[1:] or stats
+        tokens = [count for count, _ in later]
+        seconds = [duration for _, duration in later]
+        print(f"{name:<8} calls={len(stats):<3} "
+              f"evaluated tokens/call median={statistics.median(tokens):.0f} "
+              f"prompt eval median={statistics.median(seconds) * 1000:.0f}ms "
+              f"total={sum(seconds):.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark: temp-file vs in-memory input path for Listener.transcribe.
+
+Measures the per-utterance input overhead (WAV write + decode + unlink vs
+int16 -> float32 conversion) for 5 s and 30 s clips. With --full it also times
+complete transcriptions with the tiny Whisper model.
+
+Usage:
+    python benchmarks/bench_transcribe.py [--full]
+"""
+import os
+import sys
+import statistics
+import tempfile
+import time
+
+import numpy as np
+import scipy.io.wavfile as wav
+from faster_whisper import decode_audio
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.listener import Listener, pcm16_to_float32, WHISPER_SAMPLE_RATE
+
+REPEATS = 20
+
+
+def synthetic_clip(seconds, sample_rate=WHISPER_SAMPLE_RATE):
+    """Speech-like int16 clip shaped like sd.rec output: (frames, 1)."""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    signal = 0.3 * np.sin(2 * np.pi * 220 * t) * (0.5 + 0.5 * np.sin(2 * np.pi * 3 * t))
+    signal += 0.02 * rng.standard_normal(t.shape)
+    return (signal * 32767).astype(np.int16).reshape(-1, 1)
+
+
+def file_path_input(audio_data, sample_rate):
+    """What the temp-file path costs before Whisper sees any samples."""
+    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp_file:
+        wav.write(tmp_file.name, sample_rate, audio_data)
+        tmp_path = tmp_file.name
+    try:
+        return decode_audio(tmp_path, sampling_rate=WHISPER_SAMPLE_RATE)
+    finally:
+        os.remove(tmp_path)
+
+
+def in_memory_input(audio_data, sample_rate):
+    return pcm16_to_float32(audio_data)
+
+
+def median_ms(fn, *args, repeats=REPEATS):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(*args)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    full = "--full" in sys.argv
+    listener = Listener(model_size="tiny") if full else None
+
+    print("Listener.transcribe input path benchmark")
+    print("=" * 60)
+    for seconds in (5, 30):
+        clip = synthetic_clip(seconds)
+        file_ms = median_ms(file_path_input, clip, WHISPER_SAMPLE_RATE)
+        memory_ms = median_ms(in_memory_input, clip, WHISPER_SAMPLE_RATE)
+        print(f"{seconds:>3}s clip | temp file: {file_ms:8.2f} ms | in-memory: {memory_ms:8.2f} ms "
+              f"| saved: {file_ms - memory_ms:8.2f} ms/utterance")
+
+        if full:
+            file_total = median_ms(listener.transcribe, clip, WHISPER_SAMPLE_RATE, False, repeats=3)
+            memory_total = median_ms(listener.transcribe, clip, WHISPER_SAMPLE_RATE, True, repeats=3)
+            print(f"      full | temp file: {file_total:8.1f} ms | in-memory: {memory_total:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark: real-time factor of the TTS backends.
+
+RTF = synthesis time / duration of the produced audio; below 1.0 means speech
+is generated faster than it plays. Each backend synthesizes the same reply
+sentences; backends that can't run here (no network, no espeak, not macOS)
+are reported and skipped.
+
+Usage:
+    python benchmarks/bench_tts.py [--backends pyttsx3 gtts say]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import wave
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.speaker import TTS_BACKENDS, create_backend
+
+SENTENCES = [
+    "Great choice!",
+    "Are you a complete beginner, or have you written some code before?",
+    "I've found a great course for you!",
+    "This course covers HTML, CSS and JavaScript, and ends with a portfolio project you can show employers.",
+]
+
+
+def wav_duration(path):
+    with wave.open(path, "rb") as f:
+        return f.getnframes() / f.getframerate()
+
+
+def bench_backend(name):
+    backend = create_backend(name)
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for i, sentence in enumerate(SENTENCES):
+            path = os.path.join(tmp, f"{i}.wav")
+            start = time.perf_counter()
+            backend.synthesize(sentence, path)
+            elapsed = time.perf_counter() - start
+            rows.append((elapsed, wav_duration(path)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backends", nargs="+", default=sorted(TTS_BACKENDS))
+    args = parser.parse_args()
+
+    print(f"{'backend':<10}{'median synth':>14}{'audio':>10}{'RTF':>8}")
+    for name in args.backends:
+        try:
+            rows = bench_backend(name)
+        except Exception as e:
+            print(f"{name:<10}  skipped: {e}")
+            continue
+        synth = sum(elapsed for elapsed, _ in rows)
+        audio = sum(duration for _, duration in rows)
+        median = statistics.median(elapsed for elapsed, _ in rows)
+        print(f"{name:<10}{median * 1000:>12.0f}ms{audio:>9.1f}s{synth / audio:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
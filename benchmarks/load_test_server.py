@@ -0,0 +1,120 @@
+"""
+Load test: N synthetic sessions talking to the conversation server at once.
+
+Each session connects, then for every turn streams an utterance as PCM in
+real-time-sized frames (or sends typed text with --text) and waits for the
+reply. Two latencies are measured on the client side from the end of the
+utterance: time to the first audio chunk and time to turn_end.
+
+Start the server first (python server.py), then:
+    python benchmarks/load_test_server.py --sessions 20 --turns 3 [--wav utterance.wav]
+Without --wav, each utterance is synthesized once with the local TTS.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.server import SAMPLE_RATE
+
+UTTERANCES = [
+    "I want to be a web developer.",
+    "I am a complete beginner.",
+    "I know a little HTML.",
+]
+FRAME_SECONDS = 0.1
+
+
+def load_utterances(wav_path):
+    if wav_path:
+        from faster_whisper import decode_audio
+        from core.speaker import float_to_pcm16
+        return [float_to_pcm16(decode_audio(wav_path, sampling_rate=SAMPLE_RATE))]
+    from core.speaker import Speaker
+    speaker = Speaker()
+    return [speaker.synthesize(text, SAMPLE_RATE)[0] for text in UTTERANCES]
+
+
+async def run_session(url, turns, utterances, text_mode, realtime, results):
+    from websockets.asyncio.client import connect
+
+    async with connect(url, max_size=2 ** 24) as ws:
+        ready = json.loads(await ws.recv())
+        assert ready["type"] == "ready", ready
+        for turn in range(turns):
+            index = turn % len(UTTERANCES)
+            if text_mode:
+                await ws.send(json.dumps({"type": "text", "text": UTTERANCES[index]}))
+            else:
+                audio = utterances[index % len(utterances)]
+                step = int(FRAME_SECONDS * SAMPLE_RATE)
+                for i in range(0, len(audio), step):
+                    await ws.send(audio[i:i + step].tobytes())
+                    if realtime:
+                        await asyncio.sleep(FRAME_SECONDS)
+                await ws.send(json.dumps({"type": "end_of_utterance"}))
+            sent = time.perf_counter()
+
+            first_audio = None
+            while True:
+                message = await ws.recv()
+                if isinstance(message, bytes):
+                    continue
+                event = json.loads(message)
+                if event["type"] == "audio" and first_audio is None:
+                    first_audio = time.perf_counter() - sent
+                elif event["type"] == "turn_end":
+                    results.append((first_audio, time.perf_counter() - sent))
+                    break
+                elif event["type"] == "error":
+                    print(f"server error: {event['message']}")
+
+
+def percentile(values, p):
+    return float(np.percentile(values, p)) if values else float("nan")
+
+
+async def main_async(args):
+    utterances = [] if args.text else load_utterances(args.wav)
+    results = []
+    started = time.perf_counter()
+    outcomes = await asyncio.gather(
+        *(run_session(args.url, args.turns, utterances, args.text, not args.fast, results)
+          for _ in range(args.sessions)),
+        return_exceptions=True,
+    )
+    wall = time.perf_counter() - started
+    failures = [o for o in outcomes if isinstance(o, Exception)]
+
+    first_audio = [r[0] for r in results if r[0] is not None]
+    total = [r[1] for r in results]
+    print(f"sessions={args.sessions} turns={len(results)} failed_sessions={len(failures)} wall={wall:.1f}s")
+    if total:
+        print(f"first audio  p50={percentile(first_audio, 50):.2f}s p95={percentile(first_audio, 95):.2f}s")
+        print(f"turn latency p50={percentile(total, 50):.2f}s p95={percentile(total, 95):.2f}s "
+              f"(mean {statistics.mean(total):.2f}s)")
+    for failure in failures[:3]:
+        print(f"  {type(failure).__name__}: {failure}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="ws://127.0.0.1:8765")
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--wav", help="Utterance to send instead of synthesized ones")
+    parser.add_argument("--text", action="store_true", help="Send typed text (skips speech recognition)")
+    parser.add_argument("--fast", action="store_true", help="Send audio as fast as possible instead of in real time")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
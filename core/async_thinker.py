@@ -0,0 +1,178 @@
+import asyncio
+import json
+import logging
+import os
+
+import httpx
+
+from core.thinker import Thinker, _advance, _StreamFilter
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_OLLAMA_HOST = "http://127.0.0.1:11434"
+
+
+class AsyncOllamaClient:
+    def __init__(self, host=None, max_concurrency=4, timeout=60.0, connect_timeout=5.0):
+        """
+        Async client for Ollama's /api/chat over one pooled keep-alive connection pool.
+
+        Share one instance between every conversation in a process. At most
+        `max_concurrency` requests are in flight; the rest wait for a slot here
+        instead of piling up inside Ollama.
+
+        Args:
+            host: Ollama base URL (default: $OLLAMA_HOST or localhost:11434)
+            max_concurrency: Requests allowed in flight at once
+            timeout: Seconds a whole request may take (for streams: until the last chunk)
+            connect_timeout: Seconds to wait for a connection
+        """
+        host = host or os.environ.get("OLLAMA_HOST", DEFAULT_OLLAMA_HOST)
+        if "://" not in host:
+            host = f"http://{host}"
+        self.host = host
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.in_flight = 0
+        self._client = httpx.AsyncClient(
+            base_url=host,
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency),
+        )
+        self._slots = asyncio.Semaphore(max_concurrency)
+
+    async def chat(self, model, messages, options=None, keep_alive=None, timeout=None):
+        """Non-streaming chat. Returns Ollama's response dict."""
+        payload = self._payload(model, messages, False, options, keep_alive)
+        async with self._slots:
+            self.in_flight += 1
+            try:
+                response = await asyncio.wait_for(
+                    self._client.post("/api/chat", json=payload), timeout or self.timeout)
+                response.raise_for_status()
+                return response.json()
+            finally:
+                self.in_flight -= 1
+
+    async def chat_stream(self, model, messages, options=None, keep_alive=None, timeout=None):
+        """
+        Streaming chat: yields content pieces as Ollama produces them.
+        Closing the generator (or cancelling the task) closes the HTTP response,
+        which makes Ollama stop generating.
+        """
+        payload = self._payload(model, messages, True, options, keep_alive)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (timeout or self.timeout)
+        async with self._slots:
+            self.in_flight += 1
+            try:
+                async with self._client.stream("POST", "/api/chat", json=payload) as response:
+                    response.raise_for_status()
+                    async for line in response.aiter_lines():
+                        if loop.time() > deadline:
+                            raise TimeoutError("Ollama stream exceeded its deadline")
+                        if not line.strip():
+                            continue
+                        chunk = json.loads(line)
+                        if "error" in chunk:
+                            raise RuntimeError(chunk["error"])
+                        content = chunk.get("message", {}).get("content", "")
+                        if content:
+                            yield content
+                        if chunk.get("done"):
+                            break
+            finally:
+                self.in_flight -= 1
+
+    def _payload(self, model, messages, stream, options, keep_alive):
+        payload = {"model": model, "messages": messages, "stream": stream}
+        if options:
+            payload["options"] = options
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        return payload
+
+    async def aclose(self):
+        await self._client.aclose()
+
+
+class AsyncThinker(Thinker):
+    def __init__(self, client=None, **kwargs):
+        """
+        Thinker for asyncio servers: same conversation logic, but Ollama is
+        called through a shared AsyncOllamaClient so one process can serve many
+        conversations without blocking.
+
+        Args:
+            client: Shared AsyncOllamaClient (a private one is created if None)
+            **kwargs: Thinker arguments
+        """
+        super().__init__(**kwargs)
+        self.client = client or AsyncOllamaClient()
+
+    async def _chat(self):
+        self.llm_calls += 1
+        return await self.client.chat(self.model, self.messages(), options=self.options, keep_alive=self.keep_alive)
+
+    def _stream_content(self):
+        self.llm_calls += 1
+        return self.client.chat_stream(self.model, self.messages(), options=self.options, keep_alive=self.keep_alive)
+
+    async def process_input(self, user_text):
+        """Async version of Thinker.process_input."""
+        steps = self._reply_steps(user_text)
+        try:
+            next(steps)
+            while True:
+                try:
+                    content = (await self._chat())["message"]["content"]
+                except Exception as e:
+                    steps.throw(e)
+                    continue
+                steps.send(content)
+        except StopIteration as done:
+            return done.value
+
+    async def process_input_stream(self, user_text):
+        """
+        Async version of Thinker.process_input_stream. Closing the generator or
+        cancelling the task closes the Ollama stream and records only the
+        released text as the assistant's reply.
+        """
+        released = []
+        reply = self._stream_reply(user_text)
+        try:
+            async for text in reply:
+                released.append(text)
+                yield text
+        except (GeneratorExit, asyncio.CancelledError):
+            self._record_interrupted("".join(released))
+            raise
+        finally:
+            await reply.aclose()
+
+    async def _stream_reply(self, user_text):
+        steps = self._stream_steps(user_text)
+        try:
+            step = _advance(steps)
+            while step is not None:
+                if not isinstance(step, _StreamFilter):
+                    yield step
+                    step = _advance(steps)
+                    continue
+                error = None
+                content_stream = self._stream_content()
+                try:
+                    async for piece in content_stream:
+                        for text in step.feed(piece):
+                            yield text
+                        if step.stopped:
+                            break
+                except Exception as e:
+                    error = e
+                finally:
+                    await content_stream.aclose()
+                step = _advance(steps, error)
+        finally:
+            steps.close()
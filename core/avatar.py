@@ -1,9 +1,16 @@
 import os
+import shutil
 import subprocess
 import logging
 import time
 import yaml
 import sys
+import tempfile
+import threading
+from core.avatar_worker import AvatarWorkerPool
+from core.lipsync import LipSyncRenderer
+from core.render_queue import RenderCancelled, RenderQueue, default_render_workers
+from core.video_segments import render_progressive
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -15,8 +22,13 @@ class Avatar:
         self.config = self._load_config()
         self.repo_exists = os.path.exists(self.sadtalker_path)
         self.device = self._detect_device()
+        self.backend = self.config.get('backend', 'sadtalker')
+        self._lipsync = None
+        self._lipsync_image = None
         
-        if not self.repo_exists:
+        if self.backend == 'viseme':
+            logger.info("Using the viseme lip-sync backend.")
+        elif not self.repo_exists:
             logger.warning(f"SadTalker repo not found at {self.sadtalker_path}. Avatar will run in MOCK mode.")
             logger.info("To enable SadTalker: Run './setup_sadtalker.sh' to install")
         elif not self.config.get('enabled', False):
@@ -24,6 +36,28 @@ class Avatar:
             logger.info("To enable: Set 'enabled: true' in sadtalker_config.yaml")
         else:
             logger.info(f"SadTalker repo detected. Using device: {self.device}")
+
+        # Concurrent renders: render queue threads and, for SadTalker, worker processes
+        self.render_workers = self.config.get('render_workers') or default_render_workers()
+
+        # Persistent workers: load SadTalker once instead of once per video.
+        # One process per render worker, since each renders one job at a time.
+        self.worker = None
+        if (self.backend == 'sadtalker' and self.repo_exists and self.config.get('enabled', False)
+                and self.config.get('persistent_worker', True)):
+            self.worker = AvatarWorkerPool(
+                self.render_workers,
+                engine="sadtalker",
+                sadtalker_path=self.sadtalker_path,
+                device="cpu",  # Force CPU to avoid MPS hanging issues
+                preprocess=self.config.get('preprocess', 'crop'),
+                cache_dir=self.config.get('preprocess_cache_dir', 'outputs/cache/preprocess'),
+            )
+            # Spawn now so models load while the conversation starts
+            self.worker.start()
+
+        self._render_queue = None
+        self._render_queue_lock = threading.Lock()
     
     def _load_config(self):
         """Load configuration from YAML file."""
@@ -60,19 +94,37 @@ class Avatar:
             logger.warning("PyTorch not installed. Defaulting to CPU.")
             return 'cpu'
 
-    def generate_video(self, audio_path, image_path=None, output_path="outputs/videos/result.mp4"):
+    def generate_video(self, audio_path, image_path=None, output_path="outputs/videos/result.mp4", cancel=None):
         """
         Generate lip-synced video using SadTalker.
         Falls back to MOCK mode if SadTalker unavailable.
+        Setting the `cancel` event (e.g. on barge-in) stops the render with RenderCancelled.
         """
         # Use config image if not provided
         if image_path is None:
             image_path = self.config.get('source_image', 'resources/IMG_20240708_092636.jpg')
         
+        if self.backend == 'viseme':
+            try:
+                return self._run_viseme(audio_path, image_path, output_path, cancel)
+            except RenderCancelled:
+                raise
+            except Exception as e:
+                logger.error(f"Viseme lip-sync failed: {e}")
+                logger.info("Falling back to MOCK mode")
+                os.makedirs(os.path.dirname(output_path), exist_ok=True)
+                with open(output_path, "w") as f:
+                    f.write("dummy video content")
+                return output_path
+
         # Check if SadTalker is enabled and available
         if not self.repo_exists or not self.config.get('enabled', False):
             logger.info(f"[MOCK] Generating video for {audio_path} with {image_path} -> {output_path}")
-            time.sleep(0.5)  # Simulate processing
+            # Simulate processing
+            if cancel is not None and cancel.wait(0.5):
+                raise RenderCancelled("Mock render cancelled")
+            elif cancel is None:
+                time.sleep(0.5)
             # Create dummy file
             os.makedirs(os.path.dirname(output_path), exist_ok=True)
             with open(output_path, "w") as f:
@@ -82,7 +134,9 @@ class Avatar:
         logger.info(f"Generating lip-sync video using SadTalker...")
         
         try:
-            return self._run_sadtalker_inference(audio_path, image_path, output_path)
+            return self._run_sadtalker_inference(audio_path, image_path, output_path, cancel)
+        except RenderCancelled:
+            raise
         except Exception as e:
             logger.error(f"SadTalker inference failed: {e}")
             logger.info("Falling back to MOCK mode")
@@ -92,7 +146,77 @@ class Avatar:
                 f.write("dummy video content")
             return output_path
     
-    def _run_sadtalker_inference(self, audio_path, image_path, output_path):
+    def _run_viseme(self, audio_path, image_path, output_path, cancel=None):
+        """Render with the lightweight viseme backend; sprites are built once per source image."""
+        if self._lipsync is None or self._lipsync_image != image_path:
+            mouth = self.config.get('viseme_mouth')
+            self._lipsync = LipSyncRenderer(
+                image_path,
+                size=self.config.get('viseme_size', 512),
+                fps=self.config.get('viseme_fps', 25),
+                mouth=((mouth[0], mouth[1]), mouth[2]) if mouth else None,
+            )
+            self._lipsync_image = image_path
+        start = time.time()
+        self._lipsync.render(audio_path, output_path, cancel=cancel)
+        logger.info(f"Viseme video generated in {time.time() - start:.2f}s: {output_path}")
+        return output_path
+
+    @property
+    def render_queue(self):
+        """Shared RenderQueue, created on first use from the render_* config keys."""
+        with self._render_queue_lock:
+            if self._render_queue is None:
+                self._render_queue = RenderQueue(
+                    self,
+                    workers=self.render_workers,
+                    max_pending=self.config.get('render_max_pending', 16),
+                    jobs_dir=self.config.get('render_jobs_dir', 'outputs/jobs'),
+                    retention_seconds=self.config.get('render_retention_seconds', 3600),
+                )
+            return self._render_queue
+
+    def submit(self, audio_path, image_path=None, priority=0, session=None):
+        """
+        Queue a render in its own job directory and return the RenderJob.
+        Call job.wait() for the video path, or job.cancel() to drop it.
+        """
+        return self.render_queue.submit(audio_path, image_path, priority, session)
+
+    def cancel_session(self, session):
+        """
+        Cancel a session's unfinished renders. Never creates the render queue:
+        if nothing was ever submitted there is nothing to cancel. Returns the count.
+        """
+        with self._render_queue_lock:
+            renders = self._render_queue
+        return renders.cancel_session(session) if renders is not None else 0
+
+    def generate_video_progressive(self, audio_path, image_path=None, output_dir=None, max_workers=None):
+        """
+        Render the reply as short segments split at pauses in the audio.
+        Returns a SegmentPlaylist right away; iterate it to play segments in
+        order as they finish (it is also written to playlist.m3u8).
+        """
+        output_dir = output_dir or os.path.join(self.config.get('output_dir', 'outputs/videos'), "progressive")
+        segment_seconds = self.config.get('segment_seconds', 3.0)
+        return render_progressive(
+            self, audio_path, output_dir, image_path=image_path, max_workers=max_workers,
+            target_seconds=segment_seconds, max_seconds=2 * segment_seconds,
+        )
+
+    def _run_sadtalker_inference(self, audio_path, image_path, output_path, cancel=None):
+        """Run SadTalker on the persistent worker, or as a one-off subprocess if disabled."""
+        if self.worker is not None:
+            return self.worker.render(
+                audio_path, image_path, output_path,
+                still=self.config.get('still', True),
+                preprocess=self.config.get('preprocess', 'crop'),
+                cancel=cancel,
+            )
+        return self._run_sadtalker_subprocess(audio_path, image_path, output_path, cancel)
+
+    def _run_sadtalker_subprocess(self, audio_path, image_path, output_path, cancel=None):
         """Run SadTalker inference script."""
         # Find inference script
         inference_script = os.path.join(self.sadtalker_path, "inference.py")
@@ -101,8 +225,11 @@ class Avatar:
             raise FileNotFoundError(f"Inference script not found: {inference_script}")
         
         # Prepare output directory
-        output_dir = os.path.dirname(output_path)
+        output_dir = os.path.dirname(output_path) or "."
         os.makedirs(output_dir, exist_ok=True)
+        # SadTalker names its own output, so give each run a private result dir
+        # rather than guessing which .mp4 in a shared directory is ours
+        result_dir = tempfile.mkdtemp(prefix=".sadtalker-", dir=output_dir)
         
         # Build command
         bbox_shift = self.config.get('bbox_shift', 0)
@@ -111,9 +238,9 @@ class Avatar:
         
         cmd = [
             sys.executable, inference_script,
-            "--driven_audio", audio_path,
-            "--source_image", image_path,
-            "--result_dir", output_dir,
+            "--driven_audio", os.path.abspath(audio_path),
+            "--source_image", os.path.abspath(image_path),
+            "--result_dir", result_dir,
             "--cpu", # Force CPU to avoid MPS hanging issues
             "--preprocess", preprocess
         ]
@@ -123,31 +250,52 @@ class Avatar:
         
         logger.info(f"Running SadTalker: {' '.join(cmd)}")
         
-        # Run inference
-        result = subprocess.run(
-            cmd,
-            cwd=self.sadtalker_path,
-            check=True,
-            capture_output=True,
-            text=True
-        )
-        
-        logger.info("SadTalker inference completed")
-        logger.info(f"STDOUT: {result.stdout}")
-        logger.info(f"STDERR: {result.stderr}")
-        
-        # SadTalker typically creates output in result_dir
-        # Find the generated video file
-        generated_files = [f for f in os.listdir(output_dir) if f.endswith('.mp4')]
-        if generated_files:
-            generated_path = os.path.join(output_dir, generated_files[0])
-            # Move to expected output path if different
-            if generated_path != output_path:
-                os.rename(generated_path, output_path)
+        try:
+            # Run inference, polling `cancel` so a barge-in can stop it
+            proc = subprocess.Popen(
+                cmd,
+                cwd=self.sadtalker_path,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True
+            )
+            while True:
+                try:
+                    stdout, stderr = proc.communicate(timeout=0.2)
+                    break
+                except subprocess.TimeoutExpired:
+                    if cancel is not None and cancel.is_set():
+                        proc.kill()
+                        proc.communicate()
+                        raise RenderCancelled("SadTalker render cancelled")
+            if proc.returncode:
+                raise subprocess.CalledProcessError(proc.returncode, cmd, stdout, stderr)
+            
+            logger.info("SadTalker inference completed")
+            logger.info(f"STDOUT: {stdout}")
+            logger.info(f"STDERR: {stderr}")
+            
+            # SadTalker writes <timestamp>.mp4 (plus intermediates) somewhere under result_dir
+            generated_files = [
+                os.path.join(root, f)
+                for root, _, files in os.walk(result_dir)
+                for f in files if f.endswith('.mp4')
+            ]
+            if not generated_files:
+                raise FileNotFoundError("SadTalker did not generate output video")
+            generated_path = max(generated_files, key=os.path.getmtime)
+            os.replace(generated_path, output_path)
             logger.info(f"Video generated: {output_path}")
             return output_path
-        else:
-            raise FileNotFoundError("SadTalker did not generate output video")
+        finally:
+            shutil.rmtree(result_dir, ignore_errors=True)
+
+    def close(self):
+        """Stop the render queue and the persistent worker, if any."""
+        if self._render_queue is not None:
+            self._render_queue.close()
+        if self.worker is not None:
+            self.worker.stop()
 
 if __name__ == "__main__":
     avatar = Avatar()
@@ -0,0 +1,478 @@
+"""
+Long-lived avatar render worker.
+
+The worker process loads the SadTalker models once, then serves render jobs as
+JSON lines over stdin/stdout:
+
+    -> {"cmd": "render", "id": 1, "audio_path": ..., "image_path": ..., "output_path": ...,
+        "still": true, "preprocess": "crop"}
+    <- {"id": 1, "ok": true, "output_path": ...}
+
+    -> {"cmd": "ping", "id": 2}
+    <- {"id": 2, "ok": true}
+
+AvatarWorker is the client side: it spawns the process, health-checks it and
+respawns it if it dies. AvatarWorkerPool runs several for concurrent renders. `--engine fake` runs a stand-in engine that writes a
+dummy video, for tests and machines without SadTalker.
+
+Run directly (normally done by AvatarWorker):
+    python -m core.avatar_worker --engine sadtalker --sadtalker-path sadtalker_repo
+"""
+import argparse
+import json
+import logging
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+from core.preprocess_cache import PreprocessCache
+from core.render_queue import RenderCancelled
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class WorkerError(RuntimeError):
+    """The worker died, timed out or reported a failed job."""
+
+
+# --- Worker side -----------------------------------------------------------
+
+class SadTalkerEngine:
+    def __init__(self, sadtalker_path, device="cpu", size=256, checkpoint_dir="checkpoints", cache_dir=None):
+        """
+        SadTalker's inference.py, split so the models load once per process.
+        With `cache_dir`, source-image preprocessing is cached on disk (see core.preprocess_cache).
+        """
+        # Resolve before chdir-ing into the SadTalker repo
+        self.cache = PreprocessCache(cache_dir) if cache_dir else None
+        self.sadtalker_path = os.path.abspath(sadtalker_path)
+        # SadTalker uses paths relative to its repo root
+        os.chdir(self.sadtalker_path)
+        sys.path.insert(0, self.sadtalker_path)
+
+        from src.utils.preprocess import CropAndExtract
+        from src.test_audio2coeff import Audio2Coeff
+        from src.facerender.animate import AnimateFromCoeff
+        from src.generate_batch import get_data
+        from src.generate_facerender_batch import get_facerender_data
+        from src.utils.init_path import init_path
+
+        self.device = device
+        self.size = size
+        self.get_data = get_data
+        self.get_facerender_data = get_facerender_data
+        self._init_path = init_path
+        self._classes = (CropAndExtract, Audio2Coeff, AnimateFromCoeff)
+        self.checkpoint_dir = os.path.join(self.sadtalker_path, checkpoint_dir)
+        self.config_dir = os.path.join(self.sadtalker_path, "src", "config")
+        self._models = {}
+
+    def _load(self, preprocess):
+        # init_path picks checkpoints per preprocess mode, so models are cached per mode
+        if preprocess not in self._models:
+            CropAndExtract, Audio2Coeff, AnimateFromCoeff = self._classes
+            paths = self._init_path(self.checkpoint_dir, self.config_dir, self.size, False, preprocess)
+            self._models[preprocess] = (
+                CropAndExtract(paths, self.device),
+                Audio2Coeff(paths, self.device),
+                AnimateFromCoeff(paths, self.device),
+            )
+        return self._models[preprocess]
+
+    def warm_up(self, preprocess="crop"):
+        self._load(preprocess)
+
+    def preprocess_source(self, image_path, work_dir, preprocess, still=True):
+        """Crop / landmarks / 3DMM coefficients for the source image, from the cache when possible."""
+        if self.cache is not None:
+            return self.cache.get_or_create(
+                image_path, preprocess, still, self.size,
+                lambda cache_work_dir: self._extract_source(image_path, cache_work_dir, preprocess),
+            )
+        return self._extract_source(image_path, work_dir, preprocess)
+
+    def _extract_source(self, image_path, work_dir, preprocess):
+        preprocess_model, _, _ = self._load(preprocess)
+        first_frame_dir = os.path.join(work_dir, "first_frame_dir")
+        os.makedirs(first_frame_dir, exist_ok=True)
+        first_coeff_path, crop_pic_path, crop_info = preprocess_model.generate(
+            image_path, first_frame_dir, preprocess, source_image_flag=True, pic_size=self.size
+        )
+        if first_coeff_path is None:
+            raise WorkerError("Can't get the coeffs of the input image")
+        return first_coeff_path, crop_pic_path, crop_info
+
+    def render(self, job):
+        image_path = os.path.abspath(job["image_path"])
+        audio_path = os.path.abspath(job["audio_path"])
+        output_path = os.path.abspath(job["output_path"])
+        still = job.get("still", True)
+        preprocess = job.get("preprocess", "crop")
+
+        work_dir = os.path.splitext(output_path)[0] + "_work"
+        os.makedirs(work_dir, exist_ok=True)
+        try:
+            _, audio_to_coeff, animate_from_coeff = self._load(preprocess)
+            first_coeff_path, crop_pic_path, crop_info = self.preprocess_source(image_path, work_dir, preprocess, still)
+
+            batch = self.get_data(first_coeff_path, audio_path, self.device, None, still=still)
+            coeff_path = audio_to_coeff.generate(batch, work_dir, 0, None)
+            data = self.get_facerender_data(
+                coeff_path, crop_pic_path, first_coeff_path, audio_path, 2, None, None, None,
+                expression_scale=1.0, still_mode=still, preprocess=preprocess, size=self.size,
+            )
+            result = animate_from_coeff.generate(
+                data, work_dir, image_path, crop_info,
+                enhancer=None, background_enhancer=None, preprocess=preprocess, img_size=self.size,
+            )
+            shutil.move(result, output_path)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        return output_path
+
+
+class FakeEngine:
+    """Stand-in engine: writes a dummy video after a short delay."""
+    def __init__(self, delay=0.05, **kwargs):
+        self.delay = delay
+
+    def warm_up(self, preprocess="crop"):
+        pass
+
+    def render(self, job):
+        time.sleep(job.get("delay", self.delay))
+        output_path = job["output_path"]
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        with open(output_path, "w") as f:
+            f.write("dummy video content")
+        return output_path
+
+
+ENGINES = {
+    "sadtalker": SadTalkerEngine,
+    "fake": FakeEngine,
+}
+
+
+def serve(engine, inp, out):
+    """Answer JSON-line requests from `inp` on `out` until EOF or a stop command."""
+    out.write(json.dumps({"ready": True}) + "\n")
+    out.flush()
+    for line in inp:
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        reply = {"id": request.get("id")}
+        cmd = request.get("cmd")
+        try:
+            if cmd == "ping":
+                reply["ok"] = True
+            elif cmd == "render":
+                started = time.perf_counter()
+                reply["output_path"] = engine.render(request)
+                reply["seconds"] = time.perf_counter() - started
+                reply["ok"] = True
+            elif cmd == "stop":
+                reply["ok"] = True
+                out.write(json.dumps(reply) + "\n")
+                out.flush()
+                return
+            else:
+                reply.update(ok=False, error=f"Unknown command: {cmd}")
+        except Exception as e:
+            logger.exception("Render job failed")
+            reply.update(ok=False, error=str(e))
+        out.write(json.dumps(reply) + "\n")
+        out.flush()
+
+
+# --- Client side -----------------------------------------------------------
+
+class AvatarWorker:
+    def __init__(self, engine="sadtalker", sadtalker_path="sadtalker_repo", device="cpu", preprocess="crop",
+                 startup_timeout=300, job_timeout=600, max_restarts=3, cache_dir=None, idle_ping_after=60):
+        """
+        Client for a persistent avatar worker process.
+
+        Args:
+            engine: 'sadtalker' or 'fake'
+            sadtalker_path: SadTalker repo the worker loads models from
+            device: Torch device for the worker
+            preprocess: Preprocess mode whose models are loaded at startup
+            startup_timeout: Seconds to wait for the worker to load its models
+            job_timeout: Seconds to wait for a single render
+            max_restarts: Consecutive respawns allowed before giving up (a successful render resets the count)
+            cache_dir: Source-image preprocessing cache directory (None disables it)
+            idle_ping_after: Seconds idle after which the worker is health-checked
+                before its next render (and respawned if it doesn't answer)
+        """
+        self.cmd = [
+            sys.executable, "-m", "core.avatar_worker",
+            "--engine", engine,
+            "--sadtalker-path", os.path.abspath(sadtalker_path),
+            "--device", device,
+            "--preprocess", preprocess,
+        ]
+        if cache_dir:
+            self.cmd += ["--cache-dir", os.path.abspath(cache_dir)]
+        self.startup_timeout = startup_timeout
+        self.job_timeout = job_timeout
+        self.max_restarts = max_restarts
+        self.restarts = 0
+        self.idle_ping_after = idle_ping_after
+        self.last_reply = 0.0
+        self.proc = None
+        self._replies = None
+        self._ready = False
+        self._next_id = 0
+        self._lock = threading.RLock()
+
+    @property
+    def alive(self):
+        return self.proc is not None and self.proc.poll() is None
+
+    def start(self):
+        """Spawn the worker. Model loading continues in the background."""
+        with self._lock:
+            if self.alive:
+                return
+            logger.info(f"Starting avatar worker: {' '.join(self.cmd)}")
+            self.proc = subprocess.Popen(
+                self.cmd,
+                cwd=PROJECT_ROOT,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                text=True,
+                bufsize=1,
+            )
+            self._ready = False
+            self._replies = queue.Queue()
+            threading.Thread(target=self._read_replies, args=(self.proc, self._replies), daemon=True).start()
+
+    def _read_replies(self, proc, replies):
+        for line in proc.stdout:
+            try:
+                replies.put(json.loads(line))
+            except ValueError:
+                logger.warning(f"Avatar worker: unexpected output: {line.strip()}")
+        replies.put(None)  # EOF: worker exited
+
+    def _wait_ready(self):
+        if self._ready:
+            return
+        reply = self._get_reply(self.startup_timeout)
+        if not reply.get("ready"):
+            raise WorkerError(f"Avatar worker failed to start: {reply}")
+        self._ready = True
+        logger.info("Avatar worker ready.")
+
+    def _get_reply(self, timeout, cancel=None):
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise WorkerError(f"Avatar worker timed out after {timeout}s")
+            try:
+                # With a cancel event, wake up regularly to check it
+                reply = self._replies.get(timeout=min(remaining, 0.1) if cancel is not None else remaining)
+                break
+            except queue.Empty:
+                if cancel is not None and cancel.is_set():
+                    raise RenderCancelled("Render cancelled")
+        if reply is None:
+            raise WorkerError("Avatar worker exited")
+        return reply
+
+    def _request(self, message, timeout, cancel=None):
+        """
+        Send one request and wait for its reply. If `cancel` is set first, the
+        busy worker is killed and respawned (it can't abort a render midway),
+        and RenderCancelled is raised.
+        """
+        with self._lock:
+            if not self.alive:
+                raise WorkerError("Avatar worker is not running")
+            self._wait_ready()
+            self._next_id += 1
+            message = dict(message, id=self._next_id)
+            try:
+                self.proc.stdin.write(json.dumps(message) + "\n")
+                self.proc.stdin.flush()
+            except (BrokenPipeError, OSError) as e:
+                raise WorkerError(f"Avatar worker pipe closed: {e}")
+            while True:
+                try:
+                    reply = self._get_reply(timeout, cancel)
+                except RenderCancelled:
+                    logger.info("Render cancelled; respawning the avatar worker to stop it.")
+                    self.kill()
+                    self.start()
+                    raise
+                if reply.get("id") == message["id"]:
+                    self.last_reply = time.monotonic()
+                    return reply
+
+    def ping(self, timeout=5):
+        """
+        Health check. Returns True if the worker answers in time. A worker busy
+        rendering can't answer until the render ends, so it only has to be alive.
+        """
+        if not self._lock.acquire(blocking=False):
+            return self.alive
+        try:
+            return self._request({"cmd": "ping"}, timeout).get("ok", False)
+        except WorkerError as e:
+            logger.warning(f"Avatar worker health check failed: {e}")
+            return False
+        finally:
+            self._lock.release()
+
+    def restart(self):
+        with self._lock:
+            if self.restarts >= self.max_restarts:
+                raise WorkerError(f"Avatar worker restarted {self.restarts} times; giving up")
+            self.restarts += 1
+            logger.warning(f"Respawning avatar worker (restart {self.restarts}/{self.max_restarts})")
+            self.stop()
+            self.start()
+
+    def ensure_running(self):
+        """
+        Start the worker, or respawn it if it died. A worker idle for longer than
+        `idle_ping_after` is pinged first, so a hung one is replaced before it
+        can stall a render for the whole job timeout.
+        """
+        with self._lock:
+            if self.proc is None:
+                self.start()
+            elif not self.alive:
+                self.restart()
+            elif self._ready and time.monotonic() - self.last_reply > self.idle_ping_after and not self.ping():
+                self.restart()
+
+    def render(self, audio_path, image_path, output_path, still=True, preprocess="crop", cancel=None):
+        """
+        Render one video. A dead or hung worker is respawned and the job retried once.
+        Setting the `cancel` event stops the render (see _request).
+        Returns the output path.
+        """
+        job = {
+            "cmd": "render",
+            "audio_path": os.path.abspath(audio_path),
+            "image_path": os.path.abspath(image_path),
+            "output_path": os.path.abspath(output_path),
+            "still": still,
+            "preprocess": preprocess,
+        }
+        for attempt in range(2):
+            self.ensure_running()
+            try:
+                reply = self._request(job, self.job_timeout, cancel)
+            except WorkerError as e:
+                if attempt:
+                    raise
+                logger.warning(f"{e}. Retrying on a fresh worker.")
+                self.restart()
+                continue
+            if not reply.get("ok"):
+                raise WorkerError(reply.get("error", "Render failed"))
+            # Only crashes in a row count toward max_restarts
+            self.restarts = 0
+            logger.info(f"Avatar worker rendered {output_path} in {reply.get('seconds', 0):.1f}s")
+            return output_path
+
+    def kill(self):
+        """Kill the worker process right away, even mid-render."""
+        with self._lock:
+            if self.proc is None:
+                return
+            if self.alive:
+                self.proc.kill()
+                self.proc.wait()
+            self.proc = None
+            self._ready = False
+
+    def stop(self):
+        with self._lock:
+            if self.proc is None:
+                return
+            if self.alive:
+                try:
+                    self.proc.stdin.close()  # EOF ends the serve loop
+                    self.proc.wait(timeout=5)
+                except Exception:
+                    self.proc.kill()
+                    self.proc.wait()
+            self.proc = None
+            self._ready = False
+
+
+class AvatarWorkerPool:
+    def __init__(self, size, **kwargs):
+        """
+        `size` AvatarWorker processes, so that many renders run at once. Each
+        worker renders one job at a time and loads its own copy of the models.
+
+        Args:
+            size: Number of worker processes
+            **kwargs: AvatarWorker arguments
+        """
+        self.size = size
+        self.workers = [AvatarWorker(**kwargs) for _ in range(size)]
+        self._idle = queue.Queue()
+        for worker in self.workers:
+            self._idle.put(worker)
+
+    @property
+    def alive(self):
+        return all(worker.alive for worker in self.workers)
+
+    def start(self):
+        for worker in self.workers:
+            worker.start()
+
+    def ping(self, timeout=5):
+        return all(worker.ping(timeout) for worker in self.workers)
+
+    def render(self, *args, **kwargs):
+        """AvatarWorker.render on the next idle worker (blocks while all are busy)."""
+        worker = self._idle.get()
+        try:
+            return worker.render(*args, **kwargs)
+        finally:
+            self._idle.put(worker)
+
+    def stop(self):
+        for worker in self.workers:
+            worker.stop()
+
+
+# --- Worker process entry point -------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Persistent avatar render worker")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="sadtalker")
+    parser.add_argument("--sadtalker-path", default="sadtalker_repo")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--preprocess", default="crop")
+    parser.add_argument("--cache-dir", default=None, help="Source-image preprocessing cache")
+    args = parser.parse_args()
+
+    # Keep the protocol channel clean: anything the models print goes to stderr
+    protocol_out = os.fdopen(os.dup(sys.stdout.fileno()), "w")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    engine = ENGINES[args.engine](sadtalker_path=args.sadtalker_path, device=args.device, cache_dir=args.cache_dir)
+    engine.warm_up(args.preprocess)
+    serve(engine, sys.stdin, protocol_out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import logging
+import threading
+import time
+import warnings
+
+import numpy as np
+
+from core.vad import create_vad, frame_features, frame_signal
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class BargeInMonitor:
+    def __init__(self, capture, vad="energy", frame_duration=0.03, min_speech=0.24, echo_window=2.0,
+                 echo_percentile=90, echo_margin_db=6.0, initial_echo_db=-35.0, echo_warmup=0.5):
+        """
+        Watch the live microphone for the user talking over the avatar.
+
+        Echo gating: while the avatar speaks, the mic hears it too. A frame only
+        counts toward barge-in when the VAD calls it speech AND it is
+        `echo_margin_db` louder than the recent echo level (the `echo_percentile`
+        of frame energy over the last `echo_window` seconds). Barge-in fires after
+        `min_speech` seconds of consecutive such frames.
+
+        The echo level before the avatar talks is just room noise, so the
+        pipeline calls `playback_started()` at its first audio: the echo history
+        is then rebuilt from frames recorded during playback only. Nothing fires
+        for the first `echo_warmup` seconds; the echo level measured over them
+        stands in for the older history until the window fills with playback.
+
+        Args:
+            capture: Running AudioCapture shared with the Listener
+            vad: VAD name or instance (see core.vad); a private instance is best
+            frame_duration: Analysis frame length in seconds
+            min_speech: Seconds of gated speech needed to fire
+            echo_window: Seconds of history the echo level is taken over
+            echo_percentile: Percentile of recent frame energy used as the echo level
+            echo_margin_db: How much louder than the echo the user must be
+            initial_echo_db: Echo level assumed before any history exists (dBFS)
+            echo_warmup: Seconds after playback starts before barge-in can fire
+        """
+        self.capture = capture
+        self.vad = create_vad(vad) if isinstance(vad, str) else vad
+        self.frame_len = int(frame_duration * capture.sample_rate)
+        self.frame_duration = frame_duration
+        self.min_frames = max(1, int(round(min_speech / frame_duration)))
+        self.echo_frames = max(1, int(echo_window / frame_duration))
+        self.echo_percentile = echo_percentile
+        self.echo_margin_db = echo_margin_db
+        self.initial_echo_db = initial_echo_db
+        self.warmup_len = int(echo_warmup * capture.sample_rate)
+
+        self.onset = None         # Sample position where the interrupting speech began
+        self.triggered_at = None  # time.perf_counter() when barge-in fired
+        self.playback_start = None  # Sample position where the avatar's audio began
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def triggered(self):
+        return self.triggered_at is not None
+
+    def start(self, on_barge_in, start=None):
+        """Start watching from `start` (default: now). `on_barge_in()` is called once, from the monitor thread."""
+        self.stop()
+        self.onset = None
+        self.triggered_at = None
+        self.playback_start = None
+        self._stop.clear()
+        if hasattr(self.vad, "reset"):
+            self.vad.reset()
+        start = self.capture.position if start is None else start
+        self._thread = threading.Thread(target=self._run, args=(on_barge_in, start), daemon=True)
+        self._thread.start()
+
+    def playback_started(self, position=None):
+        """
+        Tell the monitor the avatar's audio just started (at capture `position`,
+        default: now), so the echo level is re-learned from the playback.
+        """
+        self.playback_start = self.capture.position if position is None else position
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+
+    def _run(self, on_barge_in, pos):
+        history = np.full(self.echo_frames, self.initial_echo_db, dtype=np.float32)
+        applied_playback = None
+        echo_floor = None  # Echo level learned over the warmup
+        run = 0
+        while not self._stop.is_set():
+            if not self.capture.wait_for(pos + self.frame_len, timeout=0.1):
+                if self.capture.ended or not self.capture.running:
+                    break
+                continue
+            pos = max(pos, self.capture.ring.oldest)
+            n_frames = (self.capture.position - pos) // self.frame_len
+            block = self.capture.read(pos, pos + n_frames * self.frame_len)
+
+            speech = self.vad.speech_mask(block, self.frame_len)
+            energy_db, _ = frame_features(frame_signal(block, self.frame_len))
+            reference = energy_db.astype(np.float32)
+            allowed = np.ones(n_frames, dtype=bool)
+            playback = self.playback_start
+            if playback is not None:
+                if playback != applied_playback:
+                    # Pre-playback room noise says nothing about the echo level
+                    history[:] = np.nan
+                    applied_playback = playback
+                    echo_floor = None
+                starts = pos + np.arange(n_frames) * self.frame_len
+                reference[starts < playback] = np.nan
+                warm = starts >= playback + self.warmup_len
+                allowed = (starts < playback) | warm
+                if echo_floor is None and warm.any():
+                    warmup = np.concatenate([history, reference[:np.argmax(warm)]])
+                    echo_floor = np.nanpercentile(warmup, self.echo_percentile)
+
+            # Per-frame echo level over the preceding echo_window
+            energies = np.concatenate([history, reference])
+            if echo_floor is not None:
+                # Stand in for the history before playback, so the window stays full
+                energies[np.isnan(energies)] = echo_floor
+            windows = np.lib.stride_tricks.sliding_window_view(energies[:-1], self.echo_frames)
+            with warnings.catch_warnings():
+                # Windows with no playback frames yet give NaN, which never gates
+                warnings.simplefilter("ignore", RuntimeWarning)
+                echo_db = np.nanpercentile(windows, self.echo_percentile, axis=1)
+            history = energies[-self.echo_frames:]
+            gated = speech & allowed & (energy_db > echo_db + self.echo_margin_db)
+
+            for i, frame_is_speech in enumerate(gated):
+                run = run + 1 if frame_is_speech else 0
+                if run >= self.min_frames:
+                    self.onset = pos + (i + 1 - run) * self.frame_len
+                    self.triggered_at = time.perf_counter()
+                    logger.info("Barge-in detected.")
+                    on_barge_in()
+                    return
+            pos += n_frames * self.frame_len
@@ -0,0 +1,284 @@
+import logging
+import threading
+import time
+
+import numpy as np
+
+from core.vad import speech_mask
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class RingBuffer:
+    """
+    Preallocated mono int16 ring buffer, addressed by absolute sample position.
+    Positions older than (written - capacity) have been overwritten.
+    """
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.data = np.zeros(capacity, dtype=np.int16)
+        self.written = 0  # Total samples ever written
+
+    @property
+    def oldest(self):
+        """Oldest sample position still held in the buffer."""
+        return max(0, self.written - self.capacity)
+
+    def write(self, samples):
+        n = len(samples)
+        if n > self.capacity:
+            # Only the tail fits
+            samples = samples[-self.capacity:]
+            self.written += n - self.capacity
+            n = self.capacity
+        start = self.written % self.capacity
+        first = min(n, self.capacity - start)
+        self.data[start:start + first] = samples[:first]
+        if first < n:
+            self.data[:n - first] = samples[first:]
+        self.written += n
+
+    def read(self, start, end):
+        """
+        Samples in [start, end). Returns a view into the buffer when the range
+        doesn't wrap around (the common case), a single copy when it does.
+        Views stay valid until the buffer wraps past them.
+        """
+        if start < self.oldest or end > self.written:
+            raise IndexError(f"Range [{start}, {end}) not in buffer [{self.oldest}, {self.written})")
+        a = start % self.capacity
+        b = a + (end - start)
+        if b <= self.capacity:
+            return self.data[a:b]
+        return np.concatenate((self.data[a:], self.data[:b - self.capacity]))
+
+
+class MicrophoneSource:
+    """Long-lived sd.InputStream feeding blocks of int16 samples to a callback."""
+    def __init__(self, sample_rate=16000, block_size=480, device=None):
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self.device = device
+        self.stream = None
+
+    def start(self, on_audio, on_end=None):
+        import sounddevice as sd
+
+        def callback(indata, frames, time_info, status):
+            if status:
+                logger.warning(f"Input stream status: {status}")
+            on_audio(indata[:, 0])
+
+        self.stream = sd.InputStream(
+            samplerate=self.sample_rate,
+            blocksize=self.block_size,
+            channels=1,
+            dtype='int16',
+            device=self.device,
+            callback=callback,
+        )
+        self.stream.start()
+
+    def stop(self):
+        if self.stream is not None:
+            self.stream.stop()
+            self.stream.close()
+            self.stream = None
+
+
+class ArraySource:
+    """
+    Stand-in for the microphone: plays a prerecorded int16 array through the
+    same callback interface, optionally paced at real-time speed.
+    """
+    def __init__(self, audio, sample_rate=16000, block_size=480, realtime=False):
+        self.audio = np.asarray(audio, dtype=np.int16).reshape(-1)
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self.realtime = realtime
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self, on_audio, on_end=None):
+        def run():
+            block_duration = self.block_size / self.sample_rate
+            next_time = time.perf_counter()
+            for i in range(0, len(self.audio), self.block_size):
+                if self._stop.is_set():
+                    break
+                on_audio(self.audio[i:i + self.block_size])
+                if self.realtime:
+                    next_time += block_duration
+                    time.sleep(max(0.0, next_time - time.perf_counter()))
+            if on_end:
+                on_end()
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def frame_rms(frame):
+    """RMS of an int16 frame, computed in float so it can't overflow."""
+    samples = frame.astype(np.float32)
+    return float(np.sqrt(np.mean(samples * samples))) if len(samples) else 0.0
+
+
+class AudioCapture:
+    def __init__(self, sample_rate=16000, buffer_seconds=30, block_duration=0.03, source=None):
+        """
+        Continuous audio capture into a ring buffer.
+
+        One source (the microphone by default) runs for the lifetime of the capture
+        and writes into a preallocated buffer, so nothing is lost between utterances.
+
+        Args:
+            sample_rate: Audio sample rate
+            buffer_seconds: How much audio the ring buffer keeps
+            block_duration: Callback block size in seconds
+            source: Audio source with start(on_audio, on_end)/stop(); defaults to the microphone
+        """
+        self.sample_rate = sample_rate
+        self.block_size = int(block_duration * sample_rate)
+        self.ring = RingBuffer(int(buffer_seconds * sample_rate))
+        self.source = source or MicrophoneSource(sample_rate, self.block_size)
+        self.ended = False
+        self.running = False
+        self._cond = threading.Condition()
+
+    def start(self):
+        if self.running:
+            return
+        self.ended = False
+        self.running = True
+        self.source.start(self._on_audio, self._on_end)
+        logger.info(f"Audio capture started ({self.sample_rate} Hz, {self.ring.capacity / self.sample_rate:.0f}s buffer).")
+
+    def stop(self):
+        if not self.running:
+            return
+        self.source.stop()
+        self.running = False
+        with self._cond:
+            self._cond.notify_all()
+        logger.info("Audio capture stopped.")
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _on_audio(self, samples):
+        with self._cond:
+            self.ring.write(samples)
+            self._cond.notify_all()
+
+    def _on_end(self):
+        with self._cond:
+            self.ended = True
+            self._cond.notify_all()
+
+    @property
+    def position(self):
+        """Absolute sample position of the most recent audio."""
+        return self.ring.written
+
+    def wait_for(self, position, timeout=None):
+        """Block until audio up to `position` is available. Returns False if the source ended first."""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: self.ring.written >= position or self.ended or not self.running,
+                timeout=timeout,
+            ) and self.ring.written >= position
+
+    def read(self, start, end):
+        with self._cond:
+            return self.ring.read(start, end)
+
+    def record_utterance(self, **kwargs):
+        """
+        Segment the next utterance out of the live buffer and return it.
+        Takes the same arguments as find_utterance.
+
+        Returns:
+            (audio_data, sample_rate); audio_data is mono int16
+        """
+        begin, end = self.find_utterance(**kwargs)
+        return self.read(begin, end), self.sample_rate
+
+    def find_utterance(self, max_duration=5, frame_duration=0.03, silence_threshold=200,
+                       silence_duration=1.0, pre_roll=0.3, is_speech=None, start=None):
+        """
+        Wait for the next utterance in the live buffer and return its (begin, end)
+        sample positions.
+
+        Frames are read as views into the ring buffer, so scanning doesn't copy audio.
+        Once speech is detected, `pre_roll` seconds before its onset are included
+        so the first syllable isn't clipped.
+
+        Args:
+            max_duration: Maximum utterance length in seconds
+            frame_duration: Analysis frame length in seconds
+            silence_threshold: RMS threshold below which a frame is silence
+            silence_duration: Seconds of silence after speech that end the utterance
+            pre_roll: Seconds of audio kept before the speech onset
+            is_speech: Optional VAD (see core.vad) or callable(frame) -> bool
+                replacing the RMS check
+            start: Absolute sample position to scan from; defaults to now
+        """
+        if not self.running:
+            self.start()
+
+        sr = self.sample_rate
+        frame_len = int(frame_duration * sr)
+        silence_len = int(silence_duration * sr)
+        max_len = int(max_duration * sr)
+        pre_roll_len = int(pre_roll * sr)
+        if is_speech is None:
+            is_speech = lambda frame: frame_rms(frame) >= silence_threshold
+
+        if start is None:
+            start = self.position
+        start = pos = max(start, self.ring.oldest)
+        speech_start = None
+        last_speech = None
+
+        while pos - start < max_len:
+            if not self.wait_for(pos + frame_len, timeout=max_duration):
+                break
+            if pos < self.ring.oldest:
+                # Reader fell a whole buffer behind; skip ahead rather than read overwritten audio
+                logger.warning("Capture buffer overrun. Skipping ahead.")
+                pos = self.ring.oldest
+
+            # Classify everything captured so far in one batch
+            n_frames = min((self.position - pos) // frame_len, -(-(start + max_len - pos) // frame_len))
+            mask = speech_mask(is_speech, self.read(pos, pos + n_frames * frame_len), frame_len)
+
+            ended = False
+            for speech in mask:
+                if speech:
+                    if speech_start is None:
+                        speech_start = pos
+                    last_speech = pos + frame_len
+                pos += frame_len
+                if last_speech is not None and pos - last_speech >= silence_len:
+                    ended = True
+                    break
+
+            if ended:
+                logger.info(f"Silence detected after {(pos - start) / sr:.1f}s. Stopping recording.")
+                break
+
+        if speech_start is None:
+            return start, pos
+        return max(speech_start - pre_roll_len, self.ring.oldest), pos
@@ -0,0 +1,119 @@
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Rough cost of the chat template around each message (role tags, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+SUMMARY_HEADER = "Summary of the earlier conversation:"
+
+
+def estimate_tokens(text):
+    """Cheap token estimate (~4 characters per token for English), no tokenizer needed."""
+    return len(text) // 4 + 1
+
+
+def message_tokens(message):
+    return estimate_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+
+def _clip(text, limit):
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit - 3].rstrip() + "..."
+
+
+class ConversationContext:
+    def __init__(self, max_tokens=3072, keep_exchanges=4, summary_tokens=256, reply_tokens=512):
+        """
+        Keep the chat sent to the model inside a token budget.
+
+        The last `keep_exchanges` exchanges (a user message plus the replies to it)
+        are kept verbatim. Older exchanges are folded into a compact summary,
+        which keeps its newest lines within `summary_tokens`. If the kept
+        exchanges alone still don't fit, the oldest of them are folded too.
+
+        Args:
+            max_tokens: Budget for the prompt (should be below the model's num_ctx)
+            keep_exchanges: Recent exchanges kept word for word
+            summary_tokens: Budget for the summary of older turns
+            reply_tokens: Room left in the budget for the model's reply
+        """
+        self.max_tokens = max_tokens
+        self.keep_exchanges = keep_exchanges
+        self.summary_tokens = summary_tokens
+        self.reply_tokens = reply_tokens
+        self.summary_lines = []
+        self.folded = 0  # Messages folded into the summary so far
+
+    @property
+    def summary(self):
+        if not self.summary_lines:
+            return None
+        return {"role": "system", "content": "\n".join([SUMMARY_HEADER] + self.summary_lines)}
+
+    def reset(self):
+        self.summary_lines = []
+        self.folded = 0
+
+    def compact(self, system, messages):
+        """
+        Fold old exchanges of `messages` (everything after the system prompt) into
+        the summary. Returns the messages that are still kept verbatim.
+        """
+        exchanges = _split_exchanges(messages)
+        keep = max(1, self.keep_exchanges)
+        old, exchanges = exchanges[:-keep], exchanges[-keep:]
+        for exchange in old:
+            self._fold(exchange)
+
+        budget = self.max_tokens - self.reply_tokens
+        while len(exchanges) > 1 and self._tokens(system, exchanges) > budget:
+            self._fold(exchanges.pop(0))
+        return [message for exchange in exchanges for message in exchange]
+
+    def build(self, system, messages, pending=()):
+        """
+        The message list to send: system prompt, summary, then as many of the
+        most recent messages as fit. `pending` (this turn's retry messages) is
+        always sent.
+        """
+        pending = list(pending)
+        exchanges = _split_exchanges(messages)
+        budget = self.max_tokens - self.reply_tokens - sum(message_tokens(m) for m in pending)
+        while len(exchanges) > 1 and self._tokens(system, exchanges) > budget:
+            # Only trims this request; compact() decides what is kept for good
+            exchanges.pop(0)
+        summary = self.summary
+        head = [system] + ([summary] if summary else [])
+        return head + [message for exchange in exchanges for message in exchange] + pending
+
+    def _tokens(self, system, exchanges):
+        messages = [system] + [message for exchange in exchanges for message in exchange]
+        if self.summary_lines:
+            messages.append(self.summary)
+        return sum(message_tokens(message) for message in messages)
+
+    def _fold(self, exchange):
+        for message in exchange:
+            if message["role"] == "user":
+                self.summary_lines.append(f"- User: {_clip(message['content'], 160)}")
+            elif message["role"] == "assistant" and message["content"].strip():
+                self.summary_lines.append(f"- You: {_clip(message['content'], 120)}")
+        self.folded += len(exchange)
+        # Keep the newest lines that fit
+        while len(self.summary_lines) > 1 and self._summary_tokens() > self.summary_tokens:
+            self.summary_lines.pop(0)
+        logger.info(f"Folded {len(exchange)} old messages into the conversation summary.")
+
+    def _summary_tokens(self):
+        return estimate_tokens("\n".join([SUMMARY_HEADER] + self.summary_lines)) + MESSAGE_OVERHEAD_TOKENS
+
+
+def _split_exchanges(messages):
+    """Group messages into exchanges, each starting at a user message."""
+    exchanges = []
+    for message in messages:
+        if message["role"] == "user" or not exchanges:
+            exchanges.append([])
+        exchanges[-1].append(message)
+    return exchanges
@@ -0,0 +1,183 @@
+# Synonym tables: canonical value -> phrases that mean it (lowercase, any
+# whitespace between words). Add ASR mishearings here as they turn up.
+CAREERS = {
+    # career_path: (goal, phrases); earlier entries win when several match
+    "Web Developer": ("Learn Web Development", ["web developer", "web development", "web dev", "website developer"]),
+    "Data Scientist": ("Learn Data Science", ["data scientist", "data science", "detached scientist", "data size"]),
+    "AI Engineer": ("Learn AI", ["ai engineer", "a i engineer", "ai engineering", "machine learning engineer"]),
+}
+
+LEVELS = {
+    # Earlier entries win when several match
+    "Beginner": ["beginner", "new", "scratch", "starting", "begin", "beginning", "novice", "no experience"],
+    "Intermediate": ["intermediate"],
+    "Advanced": ["advanced", "expert"],
+}
+
+SKILLS = {
+    # Reported in this order
+    "Python": ["python"],
+    "HTML": ["html"],
+    "CSS": ["css"],
+    "Javascript": ["javascript", "java script", "js"],
+    "React": ["react", "reactjs", "react js"],
+    "Java": ["java"],
+    "Tensorflow": ["tensorflow", "tensor flow"],
+    "SQL": ["sql", "sequel"],
+    "GIT": ["git"],
+}
+
+# Words that negate the skills/levels/careers after them, up to the end of the clause
+NEGATIONS = ["no", "not", "never", "without", "don't", "dont", "do not", "haven't", "have not"]
+# "I have no skills"-style answers
+NO_SKILLS = ["none", "nothing", "no skills", "nope", "not really"]
+# Words for skills in general: negated, they mean no skills ("I don't know any programming")
+SKILL_WORDS = ["skills", "skill", "programming", "coding", "code", "programming languages", "languages"]
+# Words that end a negation's scope ("no python but some html")
+CLAUSE_BREAKS = ["but", "however", "though"]
+# Words that may join a negated list across a comma ("no python, java or sql")
+LIST_JOINERS = {"and", "or", "nor"}
+
+
+# Punctuation that ends a clause, or a list item
+CLAUSE_END = ".;!?"
+# Split off as their own words ("python/sql" and "front-end" are two words each)
+_SEPARATORS = [(c, f" {c} ") for c in CLAUSE_END + ","] + [(c, " ") for c in "/-"]
+_ENTRY = ""  # Trie key holding the (kind, value) of a phrase ending at that node
+
+
+def tokenize(text):
+    """Lowercase words of `text`, with clause punctuation and commas as words of their own."""
+    text = text.lower()
+    for char, spaced in _SEPARATORS:
+        # str.replace beats translate/regex on short utterances
+        if char in text:
+            text = text.replace(char, spaced)
+    return text.split()
+
+
+class InfoExtractor:
+    def __init__(self, careers=CAREERS, levels=LEVELS, skills=SKILLS, negations=NEGATIONS,
+                 no_skills=NO_SKILLS, clause_breaks=CLAUSE_BREAKS, skill_words=SKILL_WORDS):
+        """
+        Single-pass keyword extraction for the counselor's four fields.
+
+        Every phrase from the tables goes into one word-level trie, built once.
+        An utterance is split into words (so "java" never matches inside
+        "javascript" and "no" never matches inside "know") and walked once,
+        taking the longest phrase at each word. A negation word negates what
+        follows it until the end of the clause, so "no python but some html"
+        gives HTML only. A comma ends the clause too, unless the next item
+        directly continues a list. Negated general skill words ("I don't have
+        any skills") mean no skills; a bare negation ("I don't know") doesn't.
+        """
+        self.trie = {}
+        self.career_rank = {career: i for i, career in enumerate(careers)}
+        self.level_rank = {level: i for i, level in enumerate(levels)}
+        self.skill_rank = {skill: i for i, skill in enumerate(skills)}
+        self.goals = {career: goal for career, (goal, _) in careers.items()}
+
+        for career, (_, phrases) in careers.items():
+            self._add(phrases, "career", career)
+        for level, phrases in levels.items():
+            self._add(phrases, "level", level)
+        for skill, phrases in skills.items():
+            self._add(phrases, "skill", skill)
+        self._add(no_skills, "no_skills", None)
+        self._add(skill_words, "skill_word", None)
+        self._add(negations, "negation", None)
+        self._add(clause_breaks, "break", None)
+        self._add(list(CLAUSE_END), "end", None)
+        self._add([","], "comma", None)
+
+    def _add(self, phrases, kind, value):
+        for phrase in phrases:
+            node = self.trie
+            for word in phrase.lower().split():
+                node = node.setdefault(word, {})
+            # First table wins on duplicates
+            node.setdefault(_ENTRY, (kind, value))
+
+    def extract(self, text):
+        """
+        Return the fields mentioned in `text`: any of career_path, goal, level
+        and skills (a comma-separated list, or "none").
+        """
+        return self.scan(text)[0]
+
+    def scan(self, text):
+        """
+        Like extract, but also return the words of `text` that are not part of
+        any phrase from the tables, as (fields, unused_words).
+        """
+        careers, levels, skills = set(), set(), set()
+        unused = []
+        negated = False
+        said_no = False
+        after_comma = False  # Inside a negated clause, right after a comma
+        words = tokenize(text)
+        trie = self.trie
+        i, n = 0, len(words)
+        while i < n:
+            node = trie.get(words[i])
+            if node is None:
+                if after_comma and words[i] not in LIST_JOINERS:
+                    # "not a beginner, I'm intermediate": the negated clause is over
+                    negated = after_comma = False
+                unused.append(words[i])
+                i += 1
+                continue
+
+            # Longest phrase starting at this word
+            entry, end = node.get(_ENTRY), i + 1
+            j = i + 1
+            while j < n and words[j] in node:
+                node = node[words[j]]
+                j += 1
+                if _ENTRY in node:
+                    entry, end = node[_ENTRY], j
+            if entry is None:
+                unused.append(words[i])
+                i += 1
+                continue
+            start, i = i, end
+
+            kind, value = entry
+            after_comma = False
+            if kind == "comma":
+                after_comma = negated
+            elif kind == "end" or kind == "break":
+                negated = False
+            elif kind == "negation":
+                negated = True
+                said_no = said_no or words[end - 1] == "no"
+            elif kind == "no_skills":
+                said_no = True
+            elif kind == "skill_word":
+                if negated:
+                    said_no = True
+                else:
+                    # "I know some programming" names no skill; leave it for the LLM
+                    unused.extend(words[start:end])
+            elif negated:
+                # A negated skill still means "doesn't have that skill"
+                said_no = said_no or kind == "skill"
+            elif kind == "career":
+                careers.add(value)
+            elif kind == "level":
+                levels.add(value)
+            elif kind == "skill":
+                skills.add(value)
+
+        found = {}
+        if careers:
+            career = min(careers, key=self.career_rank.get)
+            found["career_path"] = career
+            found["goal"] = self.goals[career]
+        if levels:
+            found["level"] = min(levels, key=self.level_rank.get)
+        if skills:
+            found["skills"] = ", ".join(sorted(skills, key=self.skill_rank.get))
+        elif said_no:
+            found["skills"] = "none"
+        return found, unused
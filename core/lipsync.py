@@ -0,0 +1,235 @@
+"""
+Lightweight lip-sync: a viseme/amplitude timeline from the TTS audio drives
+precomputed mouth sprites composited onto the source image. No neural models,
+so it renders faster than real time on a single CPU core.
+"""
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+
+import cv2
+import numpy as np
+import scipy.io.wavfile as wav
+
+from core.render_queue import RenderCancelled
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Mouth shapes (a reduced Preston Blair set)
+REST, MBP, AI, E, O, FV = range(6)
+VISEME_NAMES = ["rest", "mbp", "ai", "e", "o", "fv"]
+
+# Per viseme: (width scale, max opening as a fraction of mouth width, teeth visible)
+VISEME_SHAPES = {
+    REST: (1.00, 0.00, False),
+    MBP: (0.95, 0.04, False),
+    AI: (1.00, 0.45, True),
+    E: (1.15, 0.25, True),
+    O: (0.70, 0.40, False),
+    FV: (1.05, 0.12, True),
+}
+OPENNESS_LEVELS = 8
+
+
+def _to_mono_float(audio):
+    audio = np.asarray(audio)
+    if audio.ndim > 1:
+        audio = audio.mean(axis=1)
+    if np.issubdtype(audio.dtype, np.integer):
+        return audio.astype(np.float32) / np.iinfo(audio.dtype).max
+    return audio.astype(np.float32)
+
+
+def viseme_timeline(audio, sample_rate, fps=25, silence_db=-45.0, closed_margin_db=12.0):
+    """
+    One viseme and mouth openness per video frame, computed in a single vectorized pass.
+
+    Each frame's window is classified from its energy, zero-crossing rate and
+    spectral centroid: quiet -> rest, a little above silence -> closed lips,
+    noisy/bright -> teeth (f, v, s), otherwise a vowel by centroid (o < a < e).
+
+    Args:
+        audio: Mono or (n, channels) samples, int or float
+        sample_rate: Audio sample rate
+        fps: Video frame rate
+        silence_db: Energy (dBFS) below which the mouth rests
+        closed_margin_db: Frames within this much of silence show closed lips
+
+    Returns:
+        (visemes, openness): int array and float array in [0, 1], one entry per frame
+    """
+    x = _to_mono_float(audio)
+    hop = sample_rate / fps
+    n_frames = int(np.ceil(len(x) / hop))
+    win = int(2 * hop)
+    # Centre a 2-hop window on every video frame
+    padded = np.pad(x, (win // 2, win + int(hop)))
+    starts = (np.arange(n_frames) * hop).astype(int)
+    frames = padded[starts[:, None] + np.arange(win)] * np.hanning(win).astype(np.float32)
+
+    energy_db = 10.0 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+    signs = np.signbit(frames)
+    zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+    spectrum = np.abs(np.fft.rfft(frames, axis=1))
+    freqs = np.fft.rfftfreq(win, 1.0 / sample_rate)
+    centroid = (spectrum @ freqs) / (spectrum.sum(axis=1) + 1e-10)
+
+    visemes = np.select(
+        [
+            energy_db < silence_db,
+            energy_db < silence_db + closed_margin_db,
+            (zcr > 0.3) | (centroid > 3500),
+            centroid < 900,
+            centroid < 1800,
+        ],
+        [REST, MBP, FV, O, AI],
+        default=E,
+    )
+
+    # Openness follows loudness between silence and the clip's peak, lightly smoothed
+    peak = max(float(energy_db.max()), silence_db + 1.0)
+    openness = np.clip((energy_db - silence_db) / (peak - silence_db), 0.0, 1.0)
+    openness = np.convolve(openness, np.ones(3) / 3, mode="same")
+    openness[visemes == REST] = 0.0
+    return visemes, openness
+
+
+def locate_mouth(image):
+    """
+    Guess the mouth centre and width (pixels) from a frontal face.
+    Uses OpenCV's Haar face detector when available, else assumes a centred portrait.
+    """
+    h, w = image.shape[:2]
+    cascade_cls = getattr(cv2, "CascadeClassifier", None)
+    cascade_path = os.path.join(getattr(getattr(cv2, "data", None), "haarcascades", ""),
+                                "haarcascade_frontalface_default.xml")
+    if cascade_cls is not None and os.path.exists(cascade_path):
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        faces = cascade_cls(cascade_path).detectMultiScale(gray, 1.1, 5, minSize=(w // 8, h // 8))
+        if len(faces):
+            fx, fy, fw, fh = max(faces, key=lambda f: f[2] * f[3])
+            return (int(fx + fw / 2), int(fy + 0.78 * fh)), int(0.38 * fw)
+    logger.info("No face detector available; assuming a centred portrait for the mouth position.")
+    return (w // 2, int(0.62 * h)), int(0.16 * w)
+
+
+class LipSyncRenderer:
+    def __init__(self, image_path, size=512, fps=25, mouth=None):
+        """
+        Precompute the mouth region composites for one source image.
+
+        Every (viseme, openness level) sprite is alpha-blended onto the source once
+        here; rendering a frame is then a single ROI copy into a reused buffer.
+
+        Args:
+            image_path: Source portrait
+            size: Longest side of the output video in pixels
+            fps: Output frame rate
+            mouth: Optional ((x, y), width) in output pixels; detected if None
+        """
+        image = cv2.imread(image_path)
+        if image is None:
+            raise FileNotFoundError(f"Can't read source image: {image_path}")
+        scale = size / max(image.shape[:2])
+        if scale < 1:
+            image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        # Even dimensions keep video encoders happy
+        self.base = np.ascontiguousarray(image[:image.shape[0] // 2 * 2, :image.shape[1] // 2 * 2])
+        self.fps = fps
+        (cx, cy), mouth_w = mouth or locate_mouth(self.base)
+        self.mouth_center = (cx, cy)
+        self.mouth_width = mouth_w
+
+        # ROI big enough for the widest and most open sprite
+        half_w = int(0.7 * mouth_w)
+        half_h = int(0.35 * mouth_w)
+        h, w = self.base.shape[:2]
+        self.roi = (max(0, cy - half_h), min(h, cy + half_h), max(0, cx - half_w), min(w, cx + half_w))
+        self.sprites = self._build_sprites()
+
+    def _build_sprites(self):
+        y0, y1, x0, x1 = self.roi
+        region = self.base[y0:y1, x0:x1].astype(np.float32)
+        cx, cy = self.mouth_center[0] - x0, self.mouth_center[1] - y0
+        lip_color = np.median(region.reshape(-1, 3), axis=0) * np.array([0.55, 0.5, 0.8])
+        feather = max(3, self.mouth_width // 20) | 1
+
+        sprites = np.empty((len(VISEME_SHAPES), OPENNESS_LEVELS) + region.shape, dtype=np.uint8)
+        for viseme, (width_scale, max_open, teeth) in VISEME_SHAPES.items():
+            for level in range(OPENNESS_LEVELS):
+                opening = max_open * self.mouth_width * level / (OPENNESS_LEVELS - 1)
+                if viseme == REST or opening < 1:
+                    sprites[viseme, level] = region.astype(np.uint8)
+                    continue
+                axes = (int(width_scale * self.mouth_width / 2), max(1, int(opening / 2)))
+                color = np.empty_like(region)
+                color[:] = lip_color
+                mask = np.zeros(region.shape[:2], dtype=np.float32)
+                # Lips, then the dark mouth interior, then the upper teeth
+                cv2.ellipse(mask, (cx, cy), (axes[0] + 3, axes[1] + 4), 0, 0, 360, 1.0, -1)
+                cv2.ellipse(color, (cx, cy), axes, 0, 0, 360, (35, 25, 45), -1)
+                if teeth:
+                    cv2.ellipse(color, (cx, cy - axes[1] // 2), (int(axes[0] * 0.8), max(1, axes[1] // 3)),
+                                0, 180, 360, (225, 230, 235), -1)
+                alpha = cv2.GaussianBlur(mask, (feather, feather), 0)[..., None]
+                sprites[viseme, level] = (region * (1 - alpha) + color * alpha).astype(np.uint8)
+        return sprites
+
+    def render(self, audio_path, output_path, cancel=None):
+        """
+        Render a lip-synced MP4 for `audio_path`. Audio is muxed in when ffmpeg is available.
+        Setting the `cancel` event stops the render with RenderCancelled.
+        """
+        sample_rate, audio = wav.read(audio_path)
+        visemes, openness = viseme_timeline(audio, sample_rate, self.fps)
+        levels = np.rint(openness * (OPENNESS_LEVELS - 1)).astype(int)
+
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        fd, silent_path = tempfile.mkstemp(suffix=".mp4", dir=os.path.dirname(os.path.abspath(output_path)))
+        os.close(fd)
+        try:
+            h, w = self.base.shape[:2]
+            writer = cv2.VideoWriter(silent_path, cv2.VideoWriter_fourcc(*"mp4v"), self.fps, (w, h))
+            if not writer.isOpened():
+                raise RuntimeError("OpenCV can't open an MP4 writer")
+            frame = self.base.copy()
+            y0, y1, x0, x1 = self.roi
+            for i, (viseme, level) in enumerate(zip(visemes, levels)):
+                if cancel is not None and i % self.fps == 0 and cancel.is_set():
+                    writer.release()
+                    raise RenderCancelled("Viseme render cancelled")
+                frame[y0:y1, x0:x1] = self.sprites[viseme, level]
+                writer.write(frame)
+            writer.release()
+
+            if not mux_audio(silent_path, audio_path, output_path):
+                os.replace(silent_path, output_path)
+        finally:
+            if os.path.exists(silent_path):
+                os.remove(silent_path)
+        return output_path
+
+
+def _ffmpeg_exe():
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return shutil.which("ffmpeg")
+
+
+def mux_audio(video_path, audio_path, output_path):
+    """Copy the video stream and add the audio track. Returns False if ffmpeg isn't available."""
+    ffmpeg = _ffmpeg_exe()
+    if ffmpeg is None:
+        logger.warning("ffmpeg not found; lip-sync video will have no audio track.")
+        return False
+    subprocess.run(
+        [ffmpeg, "-y", "-loglevel", "error", "-i", video_path, "-i", audio_path,
+         "-c:v", "copy", "-c:a", "aac", "-shortest", output_path],
+        check=True,
+    )
+    return True
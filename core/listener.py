@@ -1,22 +1,81 @@
-import sounddevice as sd
 import numpy as np
 import scipy.io.wavfile as wav
-from faster_whisper import WhisperModel
 import os
 import tempfile
 import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from core.capture import AudioCapture, frame_rms
+from core.vad import create_vad
+from core.whisper_pool import get_pool
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Whisper models expect 16 kHz mono audio
+WHISPER_SAMPLE_RATE = 16000
+
+# Segment filters against hallucinations (common in silence)
+NO_SPEECH_THRESHOLD = 0.6  # Stricter threshold (was implicit/default)
+MIN_AVG_LOGPROB = -1.5     # Further relaxed (was -1.0, then -0.8)
+
+
+def pcm16_to_float32(audio_data):
+    """
+    Convert an int16 recording (e.g. from sd.rec) to the normalized mono float32
+    array Whisper takes directly. Float input is passed through unchanged.
+    """
+    audio = np.asarray(audio_data)
+    if np.issubdtype(audio.dtype, np.floating):
+        out = audio.astype(np.float32, copy=False)
+    else:
+        # One float32 allocation, scaled in place
+        out = audio.astype(np.float32)
+        out *= 1.0 / 32768.0
+    if out.ndim > 1:
+        # (frames, channels) -> mono
+        out = out.reshape(-1) if out.shape[1] == 1 else out.mean(axis=1, dtype=np.float32)
+    return out
+
+
 class Listener:
-    def __init__(self, model_size="tiny", device="cpu", compute_type="int8"):
+    def __init__(self, model_size="tiny", device="cpu", compute_type="int8", capture=None, vad="energy",
+                 cpu_threads=0, num_workers=None, warm_up=True):
         """
         Initialize the Listener with a Whisper model.
+
+        The model comes from a shared pool, so Listeners for concurrent sessions
+        with the same (model_size, device, compute_type) share one warmed-up model.
+
+        Args:
+            capture: Optional AudioCapture. When set, VAD recording reads from its
+                continuous ring buffer instead of opening a stream per chunk.
+            vad: VAD backend name ('energy' or 'silero'), a VAD instance, or None
+                for the legacy fixed RMS threshold
+            cpu_threads: Threads per transcription (0 = pick from core count)
+            num_workers: Max concurrent transcriptions on the shared model
+            warm_up: Run a warm-up pass when the model is first loaded
+        """
+        self.pool = get_pool(model_size, device, compute_type, cpu_threads, num_workers, warm_up)
+        self.model = self.pool.model
+        self.capture = capture
+        self.vad = create_vad(vad) if isinstance(vad, str) else vad
+
+    def start_capture(self, source=None, sample_rate=WHISPER_SAMPLE_RATE):
+        """
+        Start continuous capture (microphone by default, or any source with
+        start(on_audio, on_end)/stop(), e.g. ArraySource for tests).
         """
-        logger.info(f"Loading Whisper model: {model_size} on {device}...")
-        self.model = WhisperModel(model_size, device=device, compute_type=compute_type)
-        logger.info("Whisper model loaded.")
+        if self.capture is None:
+            self.capture = AudioCapture(sample_rate=sample_rate, source=source)
+        self.capture.start()
+        return self.capture
+
+    def stop_capture(self):
+        if self.capture is not None:
+            self.capture.stop()
 
     def record_audio_with_vad(self, max_duration=5, sample_rate=16000, chunk_duration=0.5, silence_threshold=200, silence_chunks=6):
         """
@@ -27,7 +86,7 @@ class Listener:
             max_duration: Maximum recording duration in seconds
             sample_rate: Audio sample rate
             chunk_duration: Duration of each audio chunk in seconds
-            silence_threshold: RMS threshold below which audio is considered silence (lowered to 200 for better sensitivity)
+            silence_threshold: RMS threshold below which audio is considered silence, used only without a VAD
             silence_chunks: Number of consecutive silent chunks before stopping (6 chunks = 3 seconds)
         """
         chunk_size = int(chunk_duration * sample_rate)
@@ -36,6 +95,8 @@ class Listener:
         logger.info(f"Recording with VAD (max {max_duration}s, will stop after 3s of silence)...")
         print("🎙️  Speak now (will stop 3 seconds after you finish)...")
         
+        import sounddevice as sd
+
         chunks = []
         silent_chunk_count = 0
         has_detected_speech = False
@@ -45,13 +106,16 @@ class Listener:
             chunk = sd.rec(chunk_size, samplerate=sample_rate, channels=1, dtype='int16')
             sd.wait()
             
-            # Calculate RMS (Root Mean Square) to detect voice activity
-            rms = np.sqrt(np.mean(chunk**2))
-            
             chunks.append(chunk)
-            
+
             # Check if chunk is silent
-            if rms < silence_threshold:
+            if self.vad is not None:
+                is_silent = not self.vad.speech_mask(chunk).any()
+            else:
+                # RMS (Root Mean Square) in float so int16 samples can't overflow
+                is_silent = frame_rms(chunk) < silence_threshold
+
+            if is_silent:
                 silent_chunk_count += 1
                 # Only show silence indicator if we've already detected speech
                 if has_detected_speech:
@@ -81,55 +145,150 @@ class Listener:
         """
         Record audio from the microphone for a fixed duration.
         """
+        import sounddevice as sd
+
         logger.info(f"Recording for {duration} seconds...")
         audio_data = sd.rec(int(duration * sample_rate), samplerate=sample_rate, channels=1, dtype='int16')
         sd.wait()  # Wait until recording is finished
         logger.info("Recording complete.")
         return audio_data, sample_rate
 
-    def transcribe(self, audio_data, sample_rate):
+    def transcribe(self, audio_data, sample_rate, in_memory=True):
         """
         Transcribe audio data using Faster-Whisper.
+
+        16 kHz audio is handed to Whisper as a float32 array with no temp file.
+        Other sample rates (or in_memory=False) go through a temporary WAV file,
+        which lets faster-whisper decode and resample it.
         """
-        # Save to temporary file for Whisper (it expects a file path or array, but let's be safe with temp file for now)
-        # Actually faster-whisper accepts numpy array if flattened and normalized correctly, 
-        # but let's stick to file for robustness first.
-        
+        segments, info = self._transcribe_segments(audio_data, sample_rate, in_memory)
+        return self._filter_segments(segments)
+
+    def _transcribe_segments(self, audio_data, sample_rate, in_memory=True):
+        """Run Whisper on one clip. Returns (segments list, info)."""
+        if in_memory and sample_rate == WHISPER_SAMPLE_RATE:
+            audio = pcm16_to_float32(audio_data)
+            # Force English (en) to stop random Chinese/Russian noise
+            return self.pool.transcribe(audio, beam_size=5, language="en")
+
         with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp_file:
             wav.write(tmp_file.name, sample_rate, audio_data)
             tmp_path = tmp_file.name
 
         try:
-            # Force English (en) to stop random Chinese/Russian noise
-            segments, info = self.model.transcribe(tmp_path, beam_size=5, language="en")
-            
-            valid_segments = []
-            for segment in segments:
-                # Filter out hallucinations (common in silence)
-                if segment.no_speech_prob > 0.6: # Stricter threshold (was implicit/default)
-                    logger.info(f"Skipped (no_speech_prob={segment.no_speech_prob:.2f}): {segment.text}")
-                    continue
-                
-                if segment.avg_logprob < -1.5: # Further relaxed (was -1.0, then -0.8)
-                    logger.info(f"Skipped (low confidence={segment.avg_logprob:.2f}): {segment.text}")
-                    continue
-                    
-                valid_segments.append(segment.text)
-
-            text = " ".join(valid_segments)
-            return text.strip()
+            return self.pool.transcribe(tmp_path, beam_size=5, language="en")
         finally:
             os.remove(tmp_path)
 
-    def listen(self, duration=5, use_vad=True):
+    def transcribe_many(self, clips, max_in_flight=None):
+        """
+        Transcribe a batch of clips across the shared model's workers.
+
+        Results are yielded in input order as soon as each is ready, while later
+        clips keep decoding in the background. Throughput (audio seconds per wall
+        second) is logged at the end and kept in self.last_batch_stats.
+
+        Args:
+            clips: Iterable of file paths or (audio_data, sample_rate) tuples
+            max_in_flight: Clips decoding or waiting at once (default 2x workers)
+        """
+        max_in_flight = max_in_flight or 2 * self.pool.num_workers
+        started = time.perf_counter()
+        audio_seconds = 0.0
+        count = 0
+
+        def run(clip):
+            if isinstance(clip, str):
+                return self.pool.transcribe(clip, beam_size=5, language="en")
+            audio_data, sample_rate = clip
+            return self._transcribe_segments(audio_data, sample_rate)
+
+        with ThreadPoolExecutor(max_workers=self.pool.num_workers) as executor:
+            pending = deque()
+            clips = iter(clips)
+            while True:
+                # Keep the workers fed without reading the whole backlog into memory
+                while len(pending) < max_in_flight:
+                    clip = next(clips, None)
+                    if clip is None:
+                        break
+                    pending.append(executor.submit(run, clip))
+                if not pending:
+                    break
+
+                segments, info = pending.popleft().result()
+                audio_seconds += info.duration
+                count += 1
+                yield self._filter_segments(segments)
+
+        wall = time.perf_counter() - started
+        self.last_batch_stats = {
+            "clips": count,
+            "audio_seconds": audio_seconds,
+            "wall_seconds": wall,
+            "throughput": audio_seconds / wall if wall > 0 else 0.0,
+        }
+        logger.info(f"Transcribed {count} clips: {audio_seconds:.1f}s of audio in {wall:.1f}s "
+                    f"({self.last_batch_stats['throughput']:.1f} audio-s/s)")
+
+    def _valid_segments(self, segments):
+        """Yield segments that pass the hallucination / confidence filters."""
+        for segment in segments:
+            # Filter out hallucinations (common in silence)
+            if segment.no_speech_prob > NO_SPEECH_THRESHOLD:
+                logger.info(f"Skipped (no_speech_prob={segment.no_speech_prob:.2f}): {segment.text}")
+                continue
+
+            if segment.avg_logprob < MIN_AVG_LOGPROB:
+                logger.info(f"Skipped (low confidence={segment.avg_logprob:.2f}): {segment.text}")
+                continue
+
+            yield segment
+
+    def _filter_segments(self, segments):
+        """Drop hallucinated / low-confidence segments and join the rest."""
+        text = " ".join(segment.text for segment in self._valid_segments(segments))
+        return text.strip()
+
+    def transcribe_words(self, audio, initial_prompt=None, beam_size=5):
+        """
+        Transcribe a float32 16 kHz array into (word, end_seconds) pairs,
+        using the same segment filters as transcribe().
+        """
+        segments, info = self.pool.transcribe(
+            audio, beam_size=beam_size, language="en",
+            word_timestamps=True, initial_prompt=initial_prompt,
+        )
+        return [
+            (word.word.strip(), word.end)
+            for segment in self._valid_segments(segments)
+            for word in (segment.words or [])
+            if word.word.strip()
+        ]
+
+    def barge_in_monitor(self, vad="energy", **kwargs):
+        """
+        A BargeInMonitor on this Listener's live capture (see core.barge_in).
+        It gets its own VAD instance so it can run while the Listener is idle.
+        """
+        from core.barge_in import BargeInMonitor
+        if self.capture is None:
+            raise RuntimeError("Barge-in needs continuous capture; call start_capture() first")
+        return BargeInMonitor(self.capture, vad=vad, **kwargs)
+
+    def listen(self, duration=5, use_vad=True, start=None):
         """
         High-level method to record and transcribe.
         
         Args:
             duration: Duration in seconds (max duration if use_vad=True)
             use_vad: Whether to use Voice Activity Detection
+            start: Capture position to look for speech from (e.g. a barge-in onset);
+                only used with continuous capture
         """
-        if use_vad:
+        if use_vad and self.capture is not None:
+            audio, rate = self.capture.record_utterance(max_duration=duration, is_speech=self.vad, start=start)
+        elif use_vad:
             audio, rate = self.record_audio_with_vad(max_duration=duration)
         else:
             audio, rate = self.record_audio(duration)
@@ -137,6 +296,135 @@ class Listener:
         logger.info(f"Transcribed: '{text}'")
         return text
 
+    def listen_streaming(self, duration=10, on_partial=None, step=0.5, **segmentation):
+        """
+        Record and transcribe at the same time.
+
+        Uses continuous capture (started if needed) and a StreamingTranscriber, so
+        most of the utterance is already transcribed when the user stops talking.
+
+        Args:
+            duration: Maximum utterance length in seconds
+            on_partial: Optional callback(text) for stable partial transcripts
+            step: Seconds between background re-decodes
+            **segmentation: Extra arguments for AudioCapture.find_utterance
+        """
+        if self.capture is None or not self.capture.running:
+            self.start_capture()
+        segmentation.setdefault("is_speech", self.vad)
+        streamer = StreamingTranscriber(self, self.capture, step=step, on_partial=on_partial)
+        text = streamer.transcribe_utterance(max_duration=duration, **segmentation)
+        logger.info(f"Transcribed: '{text}'")
+        return text
+
+
+def _normalize_word(word):
+    return word.lower().strip(".,!?;:\"'")
+
+
+class StreamingTranscriber:
+    def __init__(self, listener, capture, step=0.5, beam_size=5, on_partial=None):
+        """
+        Transcribe an utterance while it is still being spoken.
+
+        A background thread re-decodes the audio captured since the last committed
+        word every `step` seconds. Words that two consecutive decodes agree on
+        (local agreement) are committed and never re-decoded, so when speech ends
+        only the short uncommitted tail still needs a final pass.
+
+        Args:
+            listener: Listener whose model does the decoding
+            capture: Running AudioCapture to read audio from
+            step: Seconds between background re-decodes
+            beam_size: Beam size for decoding
+            on_partial: Optional callback(text) called when the committed text grows
+        """
+        self.listener = listener
+        self.capture = capture
+        self.step = step
+        self.beam_size = beam_size
+        self.on_partial = on_partial
+
+    def transcribe_utterance(self, start=None, **segmentation):
+        """
+        Segment the next utterance from the capture buffer and return its transcript.
+        Extra keyword arguments go to AudioCapture.find_utterance.
+        """
+        if start is None:
+            start = self.capture.position
+        self.committed = []        # Committed words
+        self.commit_pos = start    # Sample position just after the last committed word
+        self.hypothesis = []       # Uncommitted words from the previous decode
+
+        done = threading.Event()
+        worker = threading.Thread(target=self._decode_loop, args=(done,), daemon=True)
+        worker.start()
+
+        _, self.end_pos = self.capture.find_utterance(start=start, **segmentation)
+        done.set()
+        worker.join()
+
+        # Final pass over the uncommitted tail only
+        if self.end_pos > self.commit_pos:
+            _, words = self._decode(self.commit_pos, self.end_pos)
+            self.committed.extend(word for word, end in words)
+        return " ".join(self.committed).strip()
+
+    def _decode(self, begin, end):
+        """
+        Decode the audio from `begin` to `end`. Returns the position decoding
+        actually started at (later than `begin` if the ring buffer overran) and
+        the words, with end times relative to that position.
+        """
+        oldest = self.capture.ring.oldest
+        if begin < oldest:
+            logger.warning(f"Utterance outran the capture buffer; {(oldest - begin) / self.capture.sample_rate:.1f}s "
+                           "of audio was lost.")
+            begin = oldest
+        audio = pcm16_to_float32(self.capture.read(begin, end))
+        prompt = " ".join(self.committed[-30:]) or None
+        return begin, self.listener.transcribe_words(audio, initial_prompt=prompt, beam_size=self.beam_size)
+
+    def _decode_loop(self, done):
+        sr = self.capture.sample_rate
+        while not done.wait(self.step):
+            end = self.capture.position
+            if end - self.commit_pos < int(self.step * sr):
+                continue
+            begin, words = self._decode(self.commit_pos, end)
+            if done.is_set():
+                break
+            self._agree(words, begin, sr)
+
+    def _agree(self, words, begin, sr):
+        """
+        Commit the prefix this decode shares with the previous one (LocalAgreement-2).
+        Word end times are relative to `begin`, where the decode started.
+        """
+        if begin != self.commit_pos:
+            # Audio before `begin` was overwritten: re-base the previous hypothesis
+            # there, dropping words that ended in the lost audio
+            shift = (begin - self.commit_pos) / sr
+            self.hypothesis = [(word, end - shift) for word, end in self.hypothesis if end > shift]
+            self.commit_pos = begin
+
+        agreed = 0
+        for (new, _), (old, _) in zip(words, self.hypothesis):
+            if _normalize_word(new) != _normalize_word(old):
+                break
+            agreed += 1
+
+        if agreed:
+            self.committed.extend(word for word, end in words[:agreed])
+            # Later decodes start right after the last committed word
+            self.commit_pos += int(words[agreed - 1][1] * sr)
+            self.hypothesis = [(word, end - words[agreed - 1][1]) for word, end in words[agreed:]]
+            if self.on_partial:
+                self.on_partial(" ".join(self.committed))
+        else:
+            self.hypothesis = words
+
+
 if __name__ == "__main__":
     listener = Listener()
     print("Speak now...")
@@ -1,10 +1,21 @@
+import heapq
 import json
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Points per kind of match; a course needs at least one to be recommended
+LEVEL_SCORE = 3
+CAREER_SCORE = 5
+SKILL_SCORE = 2
+
+
 class LMSInterface:
-    def __init__(self):
+    def __init__(self, courses=None):
+        """
+        Args:
+            courses: Catalog to search (list of course dicts). Defaults to the mock catalog.
+        """
         # Mock Data Database
         self.courses = [
             # Programming & Tech
@@ -171,6 +182,32 @@ class LMSInterface:
                 "url": "https://www.coursera.org/learn/conflict-resolution-skills"
             }
         ]
+        if courses is not None:
+            self.courses = list(courses)
+        self.build_index()
+
+    def build_index(self):
+        """
+        Index the catalog so a search only scores courses that match something.
+
+        Called at load time; call it again after changing self.courses.
+        Three maps from a lowercased key to course positions (in catalog order):
+        level, skill, and whole career path, plus each course's level by position. Career paths are matched as
+        substrings of the user's text, so that index is keyed by the full
+        phrase and a search checks each distinct phrase, not each course.
+        """
+        self.levels = [course["level"].lower() for course in self.courses]
+        self.level_index = {}
+        self.career_index = {}
+        self.skill_index = {}
+        for i, course in enumerate(self.courses):
+            self.level_index.setdefault(self.levels[i], []).append(i)
+            for career in {c.lower() for c in course["career_path"]}:
+                self.career_index.setdefault(career, []).append(i)
+            for skill in {s.lower() for s in course["skills"]}:
+                self.skill_index.setdefault(skill, []).append(i)
+        logger.info(f"Indexed {len(self.courses)} courses: {len(self.career_index)} career paths, "
+                    f"{len(self.skill_index)} skills")
 
     def recommend_courses(self, goal, level, skills, career_path):
         """
@@ -186,37 +223,39 @@ class LMSInterface:
 
         logger.info(f"Searching courses for: Level={level}, Career={career_path}, Skills={skills}")
         
-        recommendations = []
-        
-        # Simple keyword matching logic
-        for course in self.courses:
-            score = 0
-            
-            # Level match
-            if course["level"].lower() == level.lower():
-                score += 3
-            
-            # Career Path match
-            if any(c.lower() in career_path.lower() for c in course["career_path"]):
-                score += 5
-                
-            # Skill overlap
-            if skills and course["skills"]:
-               # simple check if any skill matches
-               user_skills = [s.strip().lower() for s in skills.split(',')]
-               course_skills = [s.lower() for s in course["skills"]]
-               if any(s in course_skills for s in user_skills):
-                   score += 2
+        # Career Path match
+        career_path = career_path.lower()
+        careers = set()
+        for career, ids in self.career_index.items():
+            if career in career_path:
+                careers.update(ids)
+        scores = dict.fromkeys(careers, CAREER_SCORE)
 
-            if score > 0:
-                recommendations.append({"course": course, "score": score})
+        # Skill overlap: any of the user's skills
+        if skills:
+            matched = set()
+            for skill in {s.strip().lower() for s in skills.split(',')}:
+                matched.update(self.skill_index.get(skill, ()))
+            for i in matched:
+                scores[i] = scores.get(i, 0) + SKILL_SCORE
 
-        # Sort by score
-        recommendations.sort(key=lambda x: x["score"], reverse=True)
-        
-        # Return top 3
-        top_courses = [r["course"] for r in recommendations[:3]]
-        return top_courses
+        # Level match
+        level = level.lower()
+        for i in scores:
+            if self.levels[i] == level:
+                scores[i] += LEVEL_SCORE
+        # Courses matching only on level all tie, so only the first 3 can make the top 3
+        level_only = 0
+        for i in self.level_index.get(level, ()):
+            if level_only == 3:
+                break
+            if i not in scores:
+                scores[i] = LEVEL_SCORE
+                level_only += 1
+
+        # Top 3 by score, earlier catalog entries first on ties
+        top = heapq.nlargest(3, scores, key=lambda i: (scores[i], -i))
+        return [self.courses[i] for i in top]
 
 if __name__ == "__main__":
     lms = LMSInterface()
@@ -0,0 +1,403 @@
+import json
+import logging
+import os
+import queue
+import re
+import tempfile
+import threading
+import time
+
+import scipy.io.wavfile as wav
+
+from core.text_utils import SentenceSplitter, split_sentences
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stage's output on its queue
+_DONE = object()
+
+URL_PATTERN = r'(https?://[^\s)]+)'
+
+# Spoken when a reply was only a course link
+COURSE_LINK_REPLY = "I've found a great course for you! Check the link below."
+
+# Comprehensive emoji pattern covering all Unicode emoji ranges
+EMOJI_PATTERN = re.compile(
+    "["
+    "\U0001F600-\U0001F64F"  # emoticons
+    "\U0001F300-\U0001F5FF"  # symbols & pictographs
+    "\U0001F680-\U0001F6FF"  # transport & map symbols
+    "\U0001F1E0-\U0001F1FF"  # flags (iOS)
+    "\U00002702-\U000027B0"  # dingbats
+    "\U000024C2-\U0001F251"  # enclosed characters
+    "\U0001F900-\U0001F9FF"  # supplemental symbols and pictographs
+    "\U0001FA00-\U0001FA6F"  # chess symbols
+    "\U0001FA70-\U0001FAFF"  # symbols and pictographs extended-A
+    "\U00002600-\U000026FF"  # miscellaneous symbols
+    "\U00002700-\U000027BF"  # dingbats
+    "]+",
+    flags=re.UNICODE
+)
+
+
+def strip_emojis(text):
+    """Remove emojis so TTS doesn't read them out."""
+    return EMOJI_PATTERN.sub(r'', text)
+
+
+def clean_response(response_text):
+    """
+    Turn a raw Thinker reply into (text_to_speak, url_to_display).
+    Handles JSON that slipped through and pulls the course URL off the end.
+    """
+    text_to_speak = response_text
+    url_to_display = None
+
+    # --- JSON FILTER FOR TTS ---
+    # Even with Thinker logic, sometimes JSON slips through (e.g. if tool call failed).
+    # We do NOT want to speak raw JSON.
+    if "{" in response_text and "}" in response_text and "action" in response_text:
+        try:
+            start = response_text.find("{")
+            end = response_text.rfind("}") + 1
+            data = json.loads(response_text[start:end])
+
+            # If it's a recommendation that slipped through
+            if data.get("action") == "recommend":
+                params = data.get("params", {})
+                text_to_speak = f"I recommend learning {params.get('skills', 'new skills')} to become a {params.get('career_path', 'professional')}."
+            else:
+                text_to_speak = "I am processing that information."
+        except Exception:
+            pass  # Speak original if parse fails
+
+    # Extract URL if present (Check last line specifically)
+    # The Thinker is instructed to put the URL at the VERY END on a new line.
+    lines = response_text.strip().split('\n')
+    urls = re.findall(URL_PATTERN, lines[-1].strip())
+
+    if urls:
+        url_to_display = urls[0]
+        # Remove the URL line from spoken text entirely
+        text_to_speak = "\n".join(lines[:-1]).strip()
+    else:
+        # Fallback: Check globally if instruction failed
+        urls = re.findall(URL_PATTERN, response_text)
+        if urls:
+            url_to_display = urls[0]
+            text_to_speak = response_text.replace(url_to_display, "")
+
+    # Fallback if text_to_speak became empty (e.g. model only output a URL)
+    if not text_to_speak.strip():
+        text_to_speak = COURSE_LINK_REPLY
+
+    return text_to_speak, url_to_display
+
+
+class TurnMetrics:
+    """Timestamps for one turn, relative to when the user's text was available."""
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.marks = {}
+
+    def mark(self, name):
+        # Only the first occurrence of each event counts
+        if name not in self.marks:
+            self.marks[name] = time.perf_counter() - self.start
+
+    @property
+    def time_to_first_audio(self):
+        return self.marks.get("first_audio")
+
+    @property
+    def cancel_latency(self):
+        """Seconds from barge-in until every stage had stopped, if the turn was interrupted."""
+        if "barge_in" in self.marks and "stopped" in self.marks:
+            return self.marks["stopped"] - self.marks["barge_in"]
+        return None
+
+    def summary(self):
+        return ", ".join(f"{name}={elapsed:.2f}s" for name, elapsed in self.marks.items())
+
+
+class TurnResult:
+    def __init__(self, text, url, metrics, videos=None, interrupted=False, barge_in_position=None):
+        self.text = text
+        self.url = url
+        self.metrics = metrics
+        self.videos = videos or []
+        self.interrupted = interrupted
+        self.barge_in_position = barge_in_position  # Capture position where the user cut in
+
+
+class TurnPipeline:
+    def __init__(self, thinker, speaker, avatar=None, animate=False, lookahead=2, on_sentence=None, barge_in=None):
+        """
+        Run one conversational turn as overlapping stages:
+
+            think -> [sentences] -> tts -> [audio files] -> play -> [audio files] -> animate
+
+        Each stage runs in its own thread and hands work to the next over a queue,
+        so the first sentence is playing while later ones are still being generated.
+        Speakers with a stream() method do tts + play themselves (gapless, one
+        output stream); others get a file per sentence.
+
+        Args:
+            thinker: Thinker used to produce the reply
+            speaker: Speaker used for synthesis and playback
+            avatar: Optional Avatar used to render video per sentence
+            animate: Whether to render avatar video (slow without SadTalker on GPU)
+            lookahead: Max synthesized sentences waiting for playback
+            on_sentence: Optional callback invoked with each sentence as it is ready
+            barge_in: Optional BargeInMonitor; when the user starts talking, playback,
+                the Thinker's stream and pending avatar renders are cancelled
+        """
+        self.thinker = thinker
+        self.speaker = speaker
+        self.avatar = avatar
+        self.animate = animate and avatar is not None
+        self.lookahead = lookahead
+        self.on_sentence = on_sentence
+        self.barge_in = barge_in
+        self.cancel = threading.Event()
+
+    def interrupt(self):
+        """Cancel the turn in flight: stop playback, generation and pending renders."""
+        self.cancel.set()
+        if self.animate and hasattr(self.avatar, "cancel_session"):
+            self.avatar.cancel_session(id(self))
+
+    def run_turn(self, user_text):
+        """
+        Process one user utterance end to end. Blocks until playback (and
+        animation, if enabled) finishes, or until the turn is interrupted, and
+        returns a TurnResult.
+        """
+        metrics = TurnMetrics()
+        result = {"text": "", "url": None, "videos": []}
+        self.cancel = threading.Event()
+
+        if self.barge_in is not None:
+            def on_barge_in():
+                metrics.mark("barge_in")
+                self.interrupt()
+            self.barge_in.start(on_barge_in)
+
+        text_q = queue.Queue()
+        audio_q = queue.Queue(maxsize=self.lookahead)
+        video_q = queue.Queue()
+
+        stages = [
+            threading.Thread(target=self._think_stage, args=(user_text, text_q, result, metrics), daemon=True),
+        ]
+        streaming = hasattr(self.speaker, "stream")
+        if not streaming:
+            stages.append(threading.Thread(target=self._tts_stage, args=(text_q, audio_q, metrics), daemon=True))
+        if self.animate:
+            stages.append(threading.Thread(target=self._animate_stage, args=(video_q, result, metrics), daemon=True))
+
+        for stage in stages:
+            stage.start()
+
+        # Playback stays on the calling thread
+        if streaming:
+            self._stream_stage(text_q, video_q, metrics)
+        else:
+            self._play_stage(audio_q, video_q, metrics)
+
+        for stage in stages:
+            stage.join()
+        interrupted = self.cancel.is_set()
+        barge_in_position = None
+        if self.barge_in is not None:
+            self.barge_in.stop()
+            barge_in_position = self.barge_in.onset
+        if interrupted:
+            metrics.mark("stopped")
+        metrics.mark("done")
+
+        if metrics.time_to_first_audio is not None:
+            logger.info(f"Time to first audio: {metrics.time_to_first_audio:.2f}s")
+        if metrics.cancel_latency is not None:
+            logger.info(f"Barge-in: everything stopped {metrics.cancel_latency * 1000:.0f}ms after the user cut in")
+        logger.info(f"Turn timings: {metrics.summary()}")
+        return TurnResult(result["text"], result["url"], metrics, result["videos"], interrupted, barge_in_position)
+
+    def _think_stage(self, user_text, text_q, result, metrics):
+        try:
+            if hasattr(self.thinker, "process_input_stream"):
+                self._think_streaming(user_text, text_q, result, metrics)
+            else:
+                response_text = self.thinker.process_input(user_text)
+                metrics.mark("first_text")
+                text_to_speak, url = clean_response(response_text)
+                for sentence in split_sentences(text_to_speak):
+                    if self.cancel.is_set():
+                        break
+                    self._publish(sentence, text_q)
+                result["text"] = text_to_speak
+                result["url"] = url
+        except Exception as e:
+            logger.error(f"Think stage failed: {e}")
+        finally:
+            text_q.put(_DONE)
+
+    def _think_streaming(self, user_text, text_q, result, metrics):
+        """Feed sentences to TTS as the Thinker streams them."""
+        splitter = SentenceSplitter()
+        spoken = []
+
+        def publish(sentence):
+            # The course URL goes on screen, not through TTS
+            urls = re.findall(URL_PATTERN, sentence)
+            if urls:
+                result["url"] = result["url"] or urls[0]
+                for url in urls:
+                    sentence = sentence.replace(url, "")
+                sentence = sentence.strip()
+            if sentence:
+                spoken.append(sentence)
+                self._publish(sentence, text_q)
+
+        stream = self.thinker.process_input_stream(user_text)
+        for piece in stream:
+            if self.cancel.is_set():
+                # Closing the generator stops Ollama and fixes up the Thinker's history
+                stream.close()
+                break
+            metrics.mark("first_text")
+            # Buffered JSON replies arrive as one piece; clean them like a full reply
+            if "{" in piece and "}" in piece and "action" in piece:
+                piece, url = clean_response(piece)
+                result["url"] = result["url"] or url
+                piece += "\n"
+            for sentence in splitter.feed(piece):
+                publish(sentence)
+        if self.cancel.is_set():
+            result["text"] = " ".join(spoken)
+            return
+        for sentence in splitter.flush():
+            publish(sentence)
+
+        # Fallback if nothing speakable was left (e.g. model only output a URL)
+        if not spoken:
+            publish(COURSE_LINK_REPLY)
+        result["text"] = " ".join(spoken)
+
+    def _publish(self, sentence, text_q):
+        """Push one sentence onto the TTS queue."""
+        if self.on_sentence:
+            self.on_sentence(sentence)
+        text_q.put(sentence)
+
+    def _tts_stage(self, text_q, audio_q, metrics):
+        try:
+            while True:
+                sentence = text_q.get()
+                if sentence is _DONE:
+                    break
+                spoken = strip_emojis(sentence).strip()
+                if not spoken or self.cancel.is_set():
+                    continue
+                audio_path = self.speaker.speak_to_file(spoken)
+                metrics.mark("first_tts")
+                audio_q.put(audio_path)
+        except Exception as e:
+            logger.error(f"TTS stage failed: {e}")
+        finally:
+            audio_q.put(_DONE)
+
+    def _first_audio(self, metrics):
+        if "first_audio" not in metrics.marks and self.barge_in is not None:
+            # The echo level until now was room noise; re-learn it from the avatar's voice
+            self.barge_in.playback_started()
+        metrics.mark("first_audio")
+
+    def _stream_stage(self, text_q, video_q, metrics):
+        """
+        Synthesize and play through Speaker.stream: gapless playback from one
+        output stream, and the same PCM written out for the avatar.
+        """
+        def sentences():
+            while True:
+                sentence = text_q.get()
+                if sentence is _DONE:
+                    return
+                spoken = strip_emojis(sentence).strip()
+                if spoken:
+                    # Newline keeps the speaker's splitter from merging sentences
+                    yield spoken + "\n"
+
+        def on_audio(sentence, audio, sample_rate):
+            metrics.mark("first_tts")
+            if self.animate:
+                tf = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
+                tf.close()
+                wav.write(tf.name, sample_rate, audio)
+                video_q.put(tf.name)
+
+        pending = sentences()
+        try:
+            self.speaker.stream(
+                pending,
+                lookahead=self.lookahead,
+                on_sentence=lambda sentence: self._first_audio(metrics),
+                on_audio=on_audio,
+                cancel=self.cancel,
+            )
+            # Let the think stage finish even if stream() stopped reading early
+            for _ in pending:
+                pass
+        except Exception as e:
+            logger.error(f"Streaming playback failed: {e}")
+            # Keep draining so the think stage never blocks
+            for _ in pending:
+                pass
+        finally:
+            video_q.put(_DONE)
+
+    def _play_stage(self, audio_q, video_q, metrics):
+        try:
+            while True:
+                audio_path = audio_q.get()
+                if audio_path is _DONE:
+                    break
+                if self.cancel.is_set():
+                    os.remove(audio_path)
+                    continue
+                self._first_audio(metrics)
+                self.speaker.play(audio_path)
+                if self.animate:
+                    video_q.put(audio_path)
+                elif os.path.exists(audio_path):
+                    os.remove(audio_path)
+        except Exception as e:
+            logger.error(f"Playback stage failed: {e}")
+            # Keep draining so the TTS stage never blocks on a full queue
+            while audio_q.get() is not _DONE:
+                pass
+        finally:
+            video_q.put(_DONE)
+
+    def _animate_stage(self, video_q, result, metrics):
+        index = 0
+        while True:
+            audio_path = video_q.get()
+            if audio_path is _DONE:
+                break
+            try:
+                if self.cancel.is_set():
+                    continue
+                # Each segment renders in its own job directory, so concurrent turns can't collide
+                job = self.avatar.submit(audio_path, priority=index, session=id(self))
+                video_path = job.wait()
+                if video_path:
+                    result["videos"].append(video_path)
+                    metrics.mark("first_video")
+            except Exception as e:
+                logger.error(f"Animate stage failed: {e}")
+            finally:
+                index += 1
+                if os.path.exists(audio_path):
+                    os.remove(audio_path)
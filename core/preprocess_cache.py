@@ -0,0 +1,108 @@
+import hashlib
+import logging
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Bump when the layout of a cache entry changes
+CACHE_VERSION = 1
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PreprocessCache:
+    def __init__(self, cache_dir="outputs/cache/preprocess"):
+        """
+        On-disk cache of preprocessed source images (crop, landmarks, 3DMM coefficients).
+
+        Entries are keyed by the image's content hash plus every setting that
+        changes the result (preprocess mode, still mode, face size), so editing the
+        image or the config simply misses the old entry instead of reusing it.
+
+        Args:
+            cache_dir: Directory holding one subdirectory per entry
+        """
+        self.cache_dir = os.path.abspath(cache_dir)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self._digests = {}  # (path, mtime_ns, size) -> sha256, so unchanged images aren't re-read
+        self._lock = threading.Lock()
+
+    def image_digest(self, image_path):
+        stat = os.stat(image_path)
+        stamp = (os.path.abspath(image_path), stat.st_mtime_ns, stat.st_size)
+        digest = self._digests.get(stamp)
+        if digest is None:
+            digest = file_digest(image_path)
+            self._digests[stamp] = digest
+        return digest
+
+    def key(self, image_path, preprocess, still, size):
+        parts = f"v{CACHE_VERSION}|{self.image_digest(image_path)}|{preprocess}|{bool(still)}|{size}"
+        return hashlib.sha256(parts.encode()).hexdigest()[:32]
+
+    def _load(self, entry_dir):
+        meta_path = os.path.join(entry_dir, "meta.pkl")
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, "rb") as f:
+            meta = pickle.load(f)
+        coeff_path = os.path.join(entry_dir, meta["coeff"])
+        crop_pic_path = os.path.join(entry_dir, meta["crop_pic"])
+        if not (os.path.exists(coeff_path) and os.path.exists(crop_pic_path)):
+            return None
+        return coeff_path, crop_pic_path, meta["crop_info"]
+
+    def get_or_create(self, image_path, preprocess, still, size, build):
+        """
+        Return (first_coeff_path, crop_pic_path, crop_info) for the image, running
+        `build(work_dir)` (which must return the same tuple) on a miss.
+        The returned paths point into the cache and stay valid across renders.
+        """
+        key = self.key(image_path, preprocess, still, size)
+        entry_dir = os.path.join(self.cache_dir, key)
+
+        with self._lock:
+            cached = self._load(entry_dir)
+            if cached is not None:
+                self.hits += 1
+                logger.info(f"Preprocess cache hit for {os.path.basename(image_path)} ({preprocess})")
+                return cached
+
+            self.misses += 1
+            logger.info(f"Preprocess cache miss for {os.path.basename(image_path)} ({preprocess}). Extracting...")
+            work_dir = tempfile.mkdtemp(prefix=f".{key}-", dir=self.cache_dir)
+            try:
+                coeff_path, crop_pic_path, crop_info = build(work_dir)
+                meta = {
+                    "coeff": os.path.relpath(coeff_path, work_dir),
+                    "crop_pic": os.path.relpath(crop_pic_path, work_dir),
+                    "crop_info": crop_info,
+                }
+                with open(os.path.join(work_dir, "meta.pkl"), "wb") as f:
+                    pickle.dump(meta, f)
+                # Publish the whole entry at once so readers never see half of it
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                os.replace(work_dir, entry_dir)
+            finally:
+                shutil.rmtree(work_dir, ignore_errors=True)
+            return self._load(entry_dir)
+
+    def clear(self):
+        with self._lock:
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._digests.clear()
@@ -0,0 +1,190 @@
+import itertools
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+import uuid
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+
+
+class RenderQueueFull(RuntimeError):
+    """More jobs are waiting than the queue allows."""
+
+
+class RenderCancelled(RuntimeError):
+    """The render was cancelled before it finished."""
+
+
+def default_render_workers(threads_per_render=4):
+    """One render worker per `threads_per_render` cores (torch uses several threads per render)."""
+    return max(1, (os.cpu_count() or 1) // threads_per_render)
+
+
+class RenderJob:
+    def __init__(self, audio_path, job_dir, image_path=None, priority=0, session=None):
+        self.id = os.path.basename(job_dir)
+        self.audio_path = audio_path
+        self.image_path = image_path
+        self.priority = priority
+        self.session = session
+        self.job_dir = job_dir
+        self.output_path = os.path.join(job_dir, "result.mp4")
+        self.state = QUEUED
+        self.error = None
+        self.submitted_at = time.time()
+        self.finished_at = None
+        self.cancel_event = threading.Event()  # Passed to generate_video so a running render can stop
+        self._done = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self.state == CANCELLED
+
+    def cancel(self):
+        """
+        Cancel the job. Queued jobs never start; a running render is told to stop
+        (see RenderQueue) and its output is discarded.
+        """
+        if self.state in (QUEUED, RUNNING):
+            self.state = CANCELLED
+            self.cancel_event.set()
+            self._finish()
+
+    def wait(self, timeout=None):
+        """Block until the job finishes. Returns the video path, or None if it failed or was cancelled."""
+        self._done.wait(timeout)
+        return self.output_path if self.state == DONE else None
+
+    def _finish(self):
+        self.finished_at = time.time()
+        self._done.set()
+
+
+class RenderQueue:
+    def __init__(self, avatar, workers=None, max_pending=16, jobs_dir="outputs/jobs",
+                 retention_seconds=3600, keep_jobs=50):
+        """
+        Bounded priority queue of avatar render jobs.
+
+        Every job renders into its own directory under `jobs_dir`, so concurrent
+        sessions never see each other's files. Lower `priority` values run first;
+        jobs with equal priority run in submission order.
+
+        Args:
+            avatar: Avatar used to render: anything with
+                generate_video(audio_path, image_path, output_path=..., cancel=None)
+                that stops with RenderCancelled once the `cancel` event is set
+            workers: Concurrent renders (None = one per 4 cores)
+            max_pending: Jobs allowed to wait; submit raises RenderQueueFull beyond that
+            jobs_dir: Parent directory of the per-job directories
+            retention_seconds: Finished job directories older than this are deleted
+            keep_jobs: Finished job directories kept at most
+        """
+        self.avatar = avatar
+        self.workers = workers or default_render_workers()
+        self.jobs_dir = jobs_dir
+        self.retention_seconds = retention_seconds
+        self.keep_jobs = keep_jobs
+        self.jobs = {}
+        self._pending = queue.PriorityQueue(maxsize=max_pending)
+        self._order = itertools.count()
+        self._lock = threading.Lock()
+        os.makedirs(jobs_dir, exist_ok=True)
+        self.cleanup()
+
+        self._threads = [threading.Thread(target=self._worker, daemon=True) for _ in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"Render queue started with {self.workers} workers.")
+
+    def submit(self, audio_path, image_path=None, priority=0, session=None):
+        """Queue a render and return its RenderJob."""
+        job_dir = os.path.join(self.jobs_dir, uuid.uuid4().hex[:12])
+        os.makedirs(job_dir)
+        job = RenderJob(audio_path, job_dir, image_path, priority, session)
+        try:
+            self._pending.put_nowait((priority, next(self._order), job))
+        except queue.Full:
+            shutil.rmtree(job_dir, ignore_errors=True)
+            raise RenderQueueFull(f"Render queue full ({self._pending.maxsize} jobs waiting)")
+        with self._lock:
+            self.jobs[job.id] = job
+        return job
+
+    def cancel_session(self, session):
+        """Cancel every unfinished job of a session (e.g. when the user barges in)."""
+        with self._lock:
+            jobs = [job for job in self.jobs.values() if job.session == session and job.state in (QUEUED, RUNNING)]
+        for job in jobs:
+            job.cancel()
+        return len(jobs)
+
+    def _worker(self):
+        while True:
+            _, _, job = self._pending.get()
+            if job is None:
+                break
+            if job.state == QUEUED:
+                self._run(job)
+            else:
+                shutil.rmtree(job.job_dir, ignore_errors=True)
+            self.cleanup()
+
+    def _run(self, job):
+        job.state = RUNNING
+        try:
+            self.avatar.generate_video(job.audio_path, job.image_path, output_path=job.output_path,
+                                       cancel=job.cancel_event)
+            if job.state == RUNNING:
+                job.state = DONE
+        except RenderCancelled:
+            logger.info(f"Render job {job.id} stopped mid-render.")
+        except Exception as e:
+            logger.error(f"Render job {job.id} failed: {e}")
+            if job.state == RUNNING:
+                job.state = FAILED
+                job.error = str(e)
+        finally:
+            job._finish()
+            if job.cancelled:
+                logger.info(f"Render job {job.id} was cancelled; discarding output.")
+                shutil.rmtree(job.job_dir, ignore_errors=True)
+
+    def cleanup(self):
+        """Delete finished job directories past the retention age or count, including leftovers from earlier runs."""
+        now = time.time()
+        with self._lock:
+            finished = sorted((job for job in self.jobs.values() if job.finished_at is not None),
+                              key=lambda job: job.finished_at, reverse=True)
+            expired = finished[self.keep_jobs:] + [
+                job for job in finished[:self.keep_jobs] if now - job.finished_at > self.retention_seconds
+            ]
+            for job in expired:
+                del self.jobs[job.id]
+                shutil.rmtree(job.job_dir, ignore_errors=True)
+
+            for name in os.listdir(self.jobs_dir):
+                path = os.path.join(self.jobs_dir, name)
+                if name not in self.jobs and os.path.isdir(path) and now - os.path.getmtime(path) > self.retention_seconds:
+                    shutil.rmtree(path, ignore_errors=True)
+
+    def close(self):
+        """Cancel waiting jobs and stop the workers once running renders finish."""
+        while True:
+            try:
+                _, _, job = self._pending.get_nowait()
+            except queue.Empty:
+                break
+            job.cancel()
+            shutil.rmtree(job.job_dir, ignore_errors=True)
+        for _ in self._threads:
+            # Sentinels sort after every real job
+            self._pending.put((float("inf"), next(self._order), None))
+        for thread in self._threads:
+            thread.join()
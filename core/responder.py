@@ -0,0 +1,90 @@
+import logging
+
+from core.extraction import CLAUSE_END, InfoExtractor, tokenize
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# The order the counselor asks for missing information
+QUESTION_ORDER = ["career_path", "level", "skills"]
+
+QUESTIONS = {
+    "career_path": "What career are you aiming for? For example web developer, data scientist or AI engineer.",
+    "level": "Are you a complete beginner, or do you already have some experience?",
+    "skills": "Do you have any technical skills already, like HTML, Python or SQL?",
+}
+
+ACKNOWLEDGEMENTS = {
+    "career_path": "{career_path} is an exciting career choice!",
+    "level": "Got it, thanks!",
+    "skills": "Great, {skills} will come in handy.",
+}
+NO_SKILLS_ACKNOWLEDGEMENT = "No problem, everyone starts somewhere."
+
+# Caveats, hedges and feelings: the user is saying more than the answer, so the LLM replies
+OPEN_ENDED_WORDS = {
+    "but", "however", "though", "although", "because", "if", "unless",
+    "worried", "worry", "scared", "afraid", "nervous", "anxious", "unsure", "doubt", "maybe", "perhaps",
+    "confused", "overwhelmed", "frustrated", "struggle", "struggling", "stuck", "hard", "difficult", "hate",
+}
+OPEN_ENDED_PHRASES = ["not sure", "not certain", "no idea", "i wonder", "kind of", "sort of"]
+# Words that carry nothing beyond the extracted answer
+FILLER_WORDS = {
+    "i", "i'm", "im", "i'd", "id", "i've", "ive", "me", "my", "am", "a", "an", "the", "to", "be", "become",
+    "want", "wanna", "like", "would", "know", "little", "bit", "of", "some", "and", "or", "really", "just",
+    "is", "it", "in", "at", "with", "from", "as", "so", "yes", "yeah", "ok", "okay", "well", "um", "uh",
+    "hi", "hello", "hey", "interested", "into", "do", "have", "got", "already", "pretty", "very", "quite",
+    "complete", "completely", "total", "totally", "level", "skills", "skill", "experience", "career", "yet",
+    "thanks", "thank", "you", "guess", "think", "lot", "basic", "basics", "good", "great", "sounds", "fun",
+}
+# More unused (non-filler) words than this, or than half the utterance, and the LLM replies
+MAX_UNUSED_WORDS = 2
+
+
+class TemplateResponder:
+    """
+    Deterministic replies for turns where the next question is already decided.
+
+    When the user's message filled in at least one field and said nothing
+    else, the reply is just "acknowledge what they said, ask for the next
+    missing field", so it comes from templates instead of the LLM. Anything
+    else (nothing extracted, a question, a caveat or feeling, words the
+    extractor didn't account for, all fields known) is left to the LLM.
+    """
+    def __init__(self, extractor=None):
+        """
+        Args:
+            extractor: InfoExtractor used to find the words an answer didn't account for
+        """
+        self.extractor = extractor or InfoExtractor()
+
+    def respond(self, collected_info, updated_fields, user_text):
+        """Return the reply text, or None if the LLM should answer."""
+        # Goal is always set together with career_path
+        acknowledged = [field for field in QUESTION_ORDER if field in updated_fields]
+        if not acknowledged or self.open_ended(user_text):
+            return None
+        missing = [field for field in QUESTION_ORDER if collected_info.get(field) is None]
+        if not missing:
+            return None  # Complete: the recommendation path takes over
+
+        acknowledged = acknowledged[-1]
+        if acknowledged == "skills" and collected_info["skills"] == "none":
+            ack = NO_SKILLS_ACKNOWLEDGEMENT
+        else:
+            ack = ACKNOWLEDGEMENTS[acknowledged].format(**collected_info)
+        return f"{ack} {QUESTIONS[missing[0]]}"
+
+    def open_ended(self, user_text):
+        """True when the message says more than an answer to the counselor's question."""
+        if "?" in user_text:
+            return True
+        words = [word for word in tokenize(user_text) if word not in CLAUSE_END + ","]
+        if OPEN_ENDED_WORDS.intersection(words):
+            return True
+        joined = f" {' '.join(words)} "
+        if any(f" {phrase} " in joined for phrase in OPEN_ENDED_PHRASES):
+            return True
+        _, unused = self.extractor.scan(user_text)
+        unused = [word for word in unused if word not in FILLER_WORDS and word not in CLAUSE_END + ","]
+        return len(unused) > MAX_UNUSED_WORDS or len(unused) > len(words) / 2
@@ -0,0 +1,357 @@
+"""
+Multi-session conversation server over WebSocket.
+
+Protocol (one WebSocket per client; connect to ws://host:port/?session=<token> to
+resume a session that hasn't expired yet):
+
+    server -> {"type": "ready", "session": token, "sample_rate": 16000}
+    client -> binary frames: mono int16 PCM at `sample_rate`
+    client -> {"type": "end_of_utterance"}   transcribe what was sent and reply
+    client -> {"type": "text", "text": ...}  typed input, skips speech recognition
+    client -> {"type": "interrupt"}          cancel the reply in progress (barge-in)
+    server -> {"type": "transcript", "text": ...}
+    server -> {"type": "text", "text": sentence}
+    server -> {"type": "audio", "sample_rate": sr, "samples": n}, then a binary frame of int16 PCM
+    server -> {"type": "video", "bytes": n}, then a binary frame of MP4 (when animating)
+    server -> {"type": "turn_end", "text": reply, "url": url, "interrupted": bool, "timings": {...}}
+    server -> {"type": "error", "message": ...}
+
+Whisper, TTS, the avatar and the course catalog are loaded once and shared. Each session gets its
+own Thinker (history, collected_info). Sessions idle for `idle_timeout`
+seconds expire and can no longer be resumed.
+
+Trust model: there are no user accounts. The session token is a bearer
+credential: whoever presents it resumes that conversation, history included.
+Tokens are random (secrets.token_urlsafe) so they can't be guessed or
+enumerated, but they must travel only over TLS (wss:// behind a terminating
+proxy) and should not be logged or put in shared links. An unknown or expired
+token just starts a new session.
+"""
+import asyncio
+import json
+import logging
+import os
+import re
+import tempfile
+import secrets
+import time
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import scipy.io.wavfile as wav
+
+from core.pipeline import COURSE_LINK_REPLY, URL_PATTERN, strip_emojis
+from core.text_utils import SentenceSplitter
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+# Close code for "try again later" (RFC 6455)
+TRY_AGAIN_LATER = 1013
+# Random bytes per session token (encoded as ~22 URL-safe characters)
+TOKEN_BYTES = 16
+
+
+class Session:
+    def __init__(self, session_id, thinker, max_utterance_seconds=30):
+        self.id = session_id
+        # The id is the resume token, so logs name the session by this instead
+        self.label = secrets.token_hex(4)
+        self.thinker = thinker
+        self.audio = bytearray()
+        self.max_audio_bytes = int(max_utterance_seconds * SAMPLE_RATE) * 2
+        self.websocket = None
+        self.turn = None  # asyncio.Task of the reply in progress
+        self.turns = 0
+        self.last_active = time.monotonic()
+
+    @property
+    def busy(self):
+        return self.turn is not None and not self.turn.done()
+
+    def touch(self):
+        self.last_active = time.monotonic()
+
+    def add_audio(self, data):
+        self.audio += data
+        if len(self.audio) > self.max_audio_bytes:
+            # Keep the most recent audio only
+            del self.audio[:len(self.audio) - self.max_audio_bytes]
+
+    def take_audio(self):
+        audio = np.frombuffer(bytes(self.audio), dtype=np.int16)
+        self.audio.clear()
+        return audio
+
+
+class SessionManager:
+    def __init__(self, create_thinker, idle_timeout=300, max_sessions=100, max_utterance_seconds=30):
+        """
+        Per-user state, isolated per session and evicted when idle.
+
+        Args:
+            create_thinker: Factory returning a fresh Thinker for a new session
+            idle_timeout: Seconds without activity before a session is evicted
+            max_sessions: Sessions allowed at once; more are refused
+            max_utterance_seconds: Audio buffered per utterance at most
+        """
+        self.create_thinker = create_thinker
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.max_utterance_seconds = max_utterance_seconds
+        self.sessions = {}
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def get(self, session_id):
+        return self.sessions.get(session_id)
+
+    def expired(self, session, now=None):
+        """True once `session` has been idle past the timeout (never while a reply is in progress)."""
+        now = time.monotonic() if now is None else now
+        return not session.busy and now - session.last_active > self.idle_timeout
+
+    def open(self, session_id=None):
+        """Resume `session_id` if it hasn't expired, else start a new session. Returns None when full."""
+        session = self.sessions.get(session_id) if session_id else None
+        if session is not None and self.expired(session):
+            # The evictor may not have run yet; an idle session can't be resumed either way
+            self.close(session.id)
+            session = None
+        if session is None:
+            if len(self.sessions) >= self.max_sessions:
+                return None
+            session = Session(secrets.token_urlsafe(TOKEN_BYTES), self.create_thinker(), self.max_utterance_seconds)
+            self.sessions[session.id] = session
+            logger.info(f"Session {session.label} opened ({len(self.sessions)} active).")
+        session.touch()
+        return session
+
+    def close(self, session_id):
+        session = self.sessions.pop(session_id, None)
+        if session is not None and session.busy:
+            session.turn.cancel()
+        return session
+
+    def idle(self, now=None):
+        """Sessions past the idle timeout (never one with a reply in progress)."""
+        return [session for session in self.sessions.values() if self.expired(session, now)]
+
+
+class ConversationServer:
+    def __init__(self, listener, speaker, create_thinker=None, ollama_client=None, avatar=None, animate=False,
+                 idle_timeout=300, max_sessions=100, tts_sample_rate=SAMPLE_RATE):
+        """
+        Host many concurrent conversations on one set of models.
+
+        Args:
+            listener: Shared Listener (its Whisper pool serves every session)
+            speaker: Shared Speaker (TTS backend and cache)
+            create_thinker: Factory for per-session Thinkers (default: AsyncThinker
+                on the shared `ollama_client` and one shared LMSInterface)
+            ollama_client: Shared AsyncOllamaClient for the default factory
+            avatar: Shared Avatar, used when `animate` is set
+            animate: Render and send a video per sentence
+            idle_timeout: Seconds before an idle session is evicted
+            max_sessions: Concurrent sessions allowed
+            tts_sample_rate: Sample rate of the audio sent to clients
+        """
+        if create_thinker is None:
+            from core.async_thinker import AsyncOllamaClient, AsyncThinker
+            from core.lms_interface import LMSInterface
+            ollama_client = ollama_client or AsyncOllamaClient()
+            # The course catalog and its indexes are read-only, so every session recommends from one copy
+            lms = LMSInterface()
+            create_thinker = lambda: AsyncThinker(client=ollama_client, lms=lms)
+        self.listener = listener
+        self.speaker = speaker
+        self.avatar = avatar
+        self.animate = animate and avatar is not None
+        self.tts_sample_rate = tts_sample_rate
+        self.sessions = SessionManager(create_thinker, idle_timeout, max_sessions)
+
+    async def serve(self, host="0.0.0.0", port=8765):
+        """Run until cancelled."""
+        from websockets.asyncio.server import serve
+
+        async with serve(self.handle, host, port, max_size=2 ** 22) as server:
+            logger.info(f"Conversation server listening on ws://{host}:{port}")
+            evictor = asyncio.create_task(self._evict_loop())
+            try:
+                await server.serve_forever()
+            finally:
+                evictor.cancel()
+
+    async def handle(self, websocket):
+        query = parse_qs(urlparse(websocket.request.path).query)
+        session = self.sessions.open(query.get("session", [None])[0])
+        if session is None:
+            await websocket.close(TRY_AGAIN_LATER, "Server is full")
+            return
+        session.websocket = websocket
+        await self._send(websocket, {"type": "ready", "session": session.id, "sample_rate": SAMPLE_RATE})
+
+        try:
+            async for message in websocket:
+                session.touch()
+                if isinstance(message, bytes):
+                    session.add_audio(message)
+                    continue
+                try:
+                    request = json.loads(message)
+                except ValueError:
+                    await self._send(websocket, {"type": "error", "message": "Expected JSON or binary PCM"})
+                    continue
+
+                kind = request.get("type")
+                if kind == "interrupt":
+                    if session.busy:
+                        session.turn.cancel()
+                elif kind in ("end_of_utterance", "text"):
+                    if session.busy:
+                        # Talking over the reply cancels it, like barge-in on the console
+                        session.turn.cancel()
+                        await asyncio.gather(session.turn, return_exceptions=True)
+                    if kind == "text":
+                        session.audio.clear()
+                        turn = self._turn(session, websocket, text=request.get("text", ""))
+                    else:
+                        turn = self._turn(session, websocket, audio=session.take_audio())
+                    session.turn = asyncio.create_task(turn)
+                else:
+                    await self._send(websocket, {"type": "error", "message": f"Unknown message type: {kind}"})
+        finally:
+            # Keep the session for a reconnect until it idles out; just stop talking to this socket
+            if session.websocket is websocket:
+                session.websocket = None
+            if session.busy:
+                session.turn.cancel()
+            session.touch()
+
+    async def _turn(self, session, websocket, audio=None, text=None):
+        started = time.perf_counter()
+        timings = {}
+        reply = {"text": [], "url": None}
+        interrupted = False
+        sentences = asyncio.Queue()
+        speaker_task = asyncio.create_task(self._speak(session, websocket, sentences, started, timings))
+        try:
+            if text is None:
+                text = await asyncio.to_thread(self.listener.transcribe, audio, SAMPLE_RATE) if len(audio) else ""
+                timings["transcribed"] = time.perf_counter() - started
+                await self._send(websocket, {"type": "transcript", "text": text})
+            if text.strip():
+                session.turns += 1
+                await self._think(session, text, sentences, reply, timings, started)
+        except asyncio.CancelledError:
+            interrupted = True
+            speaker_task.cancel()
+            if self.animate:
+                self.avatar.cancel_session(session.id)
+        except Exception as e:
+            logger.error(f"Session {session.label} turn failed: {e}")
+            await self._send(websocket, {"type": "error", "message": str(e)})
+        finally:
+            await sentences.put(None)
+            await asyncio.gather(speaker_task, return_exceptions=True)
+            timings["total"] = time.perf_counter() - started
+            await self._send(websocket, {
+                "type": "turn_end",
+                "text": " ".join(reply["text"]),
+                "url": reply["url"],
+                "interrupted": interrupted,
+                "timings": timings,
+            })
+            session.touch()
+
+    async def _think(self, session, text, sentences, reply, timings, started):
+        """Stream the Thinker's reply, handing each sentence to the speaker task as soon as it's complete."""
+        splitter = SentenceSplitter()
+
+        async def publish(sentence):
+            urls = re.findall(URL_PATTERN, sentence)
+            if urls:
+                reply["url"] = reply["url"] or urls[0]
+                for url in urls:
+                    sentence = sentence.replace(url, "")
+            sentence = strip_emojis(sentence).strip()
+            if sentence:
+                reply["text"].append(sentence)
+                await sentences.put(sentence)
+
+        stream = session.thinker.process_input_stream(text)
+        try:
+            async for piece in stream:
+                timings.setdefault("first_text", time.perf_counter() - started)
+                for sentence in splitter.feed(piece):
+                    await publish(sentence)
+        finally:
+            # On cancellation this closes the Ollama stream and records the partial reply
+            await stream.aclose()
+        for sentence in splitter.flush():
+            await publish(sentence)
+        if not reply["text"]:
+            await publish(COURSE_LINK_REPLY)
+
+    async def _speak(self, session, websocket, sentences, started, timings):
+        """Synthesize sentences in order and send text, audio and (optionally) video."""
+        index = 0
+        while True:
+            sentence = await sentences.get()
+            if sentence is None:
+                break
+            audio, sample_rate = await asyncio.to_thread(self.speaker.synthesize, sentence, self.tts_sample_rate)
+            audio = np.ascontiguousarray(audio, dtype=np.int16)
+            await self._send(websocket, {"type": "text", "text": sentence})
+            await self._send(websocket, {"type": "audio", "sample_rate": sample_rate, "samples": len(audio)})
+            await self._send(websocket, audio.tobytes())
+            timings.setdefault("first_audio", time.perf_counter() - started)
+            if self.animate:
+                await self._send_video(session, websocket, audio, sample_rate, index)
+            index += 1
+
+    async def _send_video(self, session, websocket, audio, sample_rate, index):
+        fd, audio_path = tempfile.mkstemp(suffix=".wav")
+        os.close(fd)
+        try:
+            wav.write(audio_path, sample_rate, audio)
+            job = self.avatar.submit(audio_path, priority=index, session=session.id)
+            video_path = await asyncio.to_thread(job.wait)
+            if video_path:
+                with open(video_path, "rb") as f:
+                    data = f.read()
+                await self._send(websocket, {"type": "video", "bytes": len(data)})
+                await self._send(websocket, data)
+        finally:
+            os.remove(audio_path)
+
+    async def _send(self, websocket, message):
+        if websocket is None:
+            return
+        if isinstance(message, dict):
+            message = json.dumps(message)
+        try:
+            await websocket.send(message)
+        except Exception:
+            # Client went away; the session stays until it idles out
+            pass
+
+    async def _evict_loop(self):
+        interval = max(1.0, min(30.0, self.sessions.idle_timeout / 2))
+        while True:
+            await asyncio.sleep(interval)
+            await self.evict_idle()
+
+    async def evict_idle(self, now=None):
+        """Drop idle sessions, closing their sockets. Returns the evicted session ids."""
+        evicted = []
+        for session in self.sessions.idle(now):
+            self.sessions.close(session.id)
+            if session.websocket is not None:
+                await session.websocket.close(1000, "Session idle")
+            evicted.append(session.id)
+        if evicted:
+            logger.info(f"Evicted {len(evicted)} idle sessions ({len(self.sessions)} active).")
+        return evicted
@@ -1,22 +1,290 @@
+import io
+import math
 import subprocess
 import logging
 import os
 import sys
 import tempfile
+import threading
+import queue
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import scipy.io.wavfile as wav
+from scipy.signal import resample_poly
+
+from core.text_utils import SentenceSplitter, split_sentences
+from core.tts_cache import TTSCache
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class Speaker:
+
+def float_to_pcm16(audio):
+    """float samples in [-1, 1] -> int16, clipping overs."""
+    return (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
+
+
+def resample(audio, from_rate, to_rate):
+    """Polyphase resampling of int16 audio between integer sample rates."""
+    if from_rate == to_rate:
+        return audio
+    g = math.gcd(from_rate, to_rate)
+    out = resample_poly(audio.astype(np.float32) / 32768.0, to_rate // g, from_rate // g)
+    return float_to_pcm16(out)
+
+
+def read_wav(data):
+    """Decode WAV bytes to (mono int16 samples, sample_rate)."""
+    sample_rate, audio = wav.read(io.BytesIO(data))
+    if audio.ndim > 1:
+        audio = audio.mean(axis=1)
+    if audio.dtype != np.int16:
+        if np.issubdtype(audio.dtype, np.floating):
+            audio = float_to_pcm16(audio)
+        elif audio.dtype == np.uint8:
+            audio = ((audio.astype(np.int16) - 128) << 8).astype(np.int16)
+        else:
+            audio = (audio.astype(np.int64) >> (8 * audio.dtype.itemsize - 16)).astype(np.int16)
+    return audio, sample_rate
+
+
+class SayBackend:
+    """macOS 'say', writing 16-bit PCM WAV directly."""
+    name = "say"
+    sample_format = "LEI16@44100"
+    sample_rate = 44100
+
     def __init__(self, voice="Samantha", rate=175):
+        self.voice = voice
+        self.rate = str(rate)
+
+    def synthesize(self, text, output_path):
+        try:
+            subprocess.run([
+                "say",
+                "-v", self.voice,
+                "-r", self.rate,
+                "-o", output_path,
+                "--data-format=LEI16@44100",
+                text
+            ])
+        except Exception as e:
+            logger.error(f"macOS TTS File Error: {e}")
+
+
+class GTTSBackend:
+    """
+    Google TTS over the network. The MP3 is kept in memory and decoded and
+    resampled in-process (PyAV, via faster-whisper): no temp MP3, no ffmpeg.
+    """
+    name = "gtts"
+
+    def __init__(self, voice=None, rate=None, lang="en", sample_rate=44100):
+        self.lang = lang
+        self.sample_rate = sample_rate
+        self.sample_format = f"pcm_s16le@{sample_rate}/mono"
+
+    def synthesize_array(self, text, sample_rate=None):
+        """Synthesize to mono int16 samples. Returns (audio, sample_rate)."""
+        sample_rate = sample_rate or self.sample_rate
+        try:
+            from gtts import gTTS
+            from faster_whisper import decode_audio
+
+            mp3 = io.BytesIO()
+            gTTS(text=text, lang=self.lang, slow=False).write_to_fp(mp3)
+            mp3.seek(0)
+            audio = decode_audio(mp3, sampling_rate=sample_rate)
+            return float_to_pcm16(audio), sample_rate
+        except ImportError:
+            logger.error("gTTS not installed. Install with: pip install gtts")
+            raise
+        except Exception as e:
+            logger.error(f"gTTS Error: {e}")
+            raise
+
+    def synthesize(self, text, output_path):
+        audio, sample_rate = self.synthesize_array(text)
+        wav.write(output_path, sample_rate, audio)
+
+
+class Pyttsx3Backend:
+    """
+    Offline, in-process TTS via pyttsx3 (espeak-ng on Linux).
+    espeak renders PCM straight into the WAV file: no network, no transcode.
+    """
+    name = "pyttsx3"
+    sample_format = "pcm_s16le@22050/mono"
+    sample_rate = 22050
+
+    def __init__(self, voice=None, rate=175):
+        # The engine isn't thread-safe and re-initializing it per call is slow, so
+        # one dedicated thread creates it and runs every job from a queue
+        self._jobs = queue.Queue()
+        started = queue.Queue(maxsize=1)
+        threading.Thread(target=self._run, args=(voice, rate, started), name="pyttsx3", daemon=True).start()
+        error = started.get()
+        if error is not None:
+            raise error
+
+    def _run(self, voice, rate, started):
+        try:
+            import pyttsx3
+
+            engine = pyttsx3.init()
+            engine.setProperty("rate", int(rate))
+            if voice:
+                for v in engine.getProperty("voices"):
+                    if voice.lower() in (v.name or "").lower():
+                        engine.setProperty("voice", v.id)
+                        break
+        except Exception as e:
+            started.put(e)
+            return
+        started.put(None)
+        while True:
+            text, output_path, done = self._jobs.get()
+            try:
+                engine.save_to_file(text, output_path)
+                engine.runAndWait()
+            except Exception as e:
+                done.put(e)
+            else:
+                done.put(None)
+
+    def synthesize(self, text, output_path):
+        """Run on the engine thread; callers on any thread wait their turn."""
+        done = queue.Queue(maxsize=1)
+        self._jobs.put((text, output_path, done))
+        error = done.get()
+        if error is not None:
+            raise error
+
+
+TTS_BACKENDS = {
+    "say": SayBackend,
+    "gtts": GTTSBackend,
+    "pyttsx3": Pyttsx3Backend,
+}
+
+
+def create_backend(name="auto", voice="Samantha", rate=175):
+    """
+    Build a TTS backend by name. 'auto' picks 'say' on macOS, and on Linux the
+    offline pyttsx3 engine, falling back to gTTS if espeak isn't installed.
+    """
+    if name == "auto":
+        if sys.platform == "darwin":
+            return SayBackend(voice, rate)
+        try:
+            return Pyttsx3Backend(None, rate)
+        except Exception as e:
+            logger.warning(f"Offline TTS unavailable ({e}). Falling back to gTTS.")
+            return GTTSBackend()
+    try:
+        backend = TTS_BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown TTS backend: {name}. Choose from {list(TTS_BACKENDS)}")
+    return backend(voice, rate)
+
+class SoundDeviceOutput:
+    """
+    One long-lived sd.OutputStream. Blocking writes queue audio back to back,
+    so consecutive sentences play with no gap between them.
+    """
+    def __init__(self, device=None):
+        import sounddevice as sd
+
+        self._sd = sd
+        self.device = device
+        self.stream = None
+        self.sample_rate = None
+
+    def start(self, sample_rate):
+        if self.stream is not None and self.sample_rate != sample_rate:
+            self.close()
+        if self.stream is None:
+            self.stream = self._sd.OutputStream(
+                samplerate=sample_rate, channels=1, dtype='int16', device=self.device,
+            )
+            self.sample_rate = sample_rate
+        if not self.stream.active:
+            self.stream.start()
+
+    def write(self, audio):
+        self.stream.write(np.ascontiguousarray(audio, dtype=np.int16).reshape(-1, 1))
+
+    def drain(self):
+        """Block until everything written has played."""
+        if self.stream is not None and self.stream.active:
+            self.stream.stop()
+
+    def abort(self):
+        """Stop right away, dropping audio still queued in the device buffer."""
+        if self.stream is not None and self.stream.active:
+            self.stream.abort()
+
+    def close(self):
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+
+
+class NullOutput:
+    """
+    Headless stand-in for the sound card: discards audio (or records it, for
+    tests), optionally taking as long as real playback would.
+    """
+    def __init__(self, realtime=False, record=False):
+        self.realtime = realtime
+        self.record = record
+        self.written = []
+        self.sample_rate = None
+
+    def start(self, sample_rate):
+        self.sample_rate = sample_rate
+
+    def write(self, audio):
+        if self.record:
+            self.written.append(np.array(audio, dtype=np.int16))
+        if self.realtime:
+            time.sleep(len(audio) / self.sample_rate)
+
+    def drain(self):
+        pass
+
+    def abort(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class Speaker:
+    def __init__(self, voice="Samantha", rate=175, backend="auto", cache_dir="outputs/cache/tts", cache_max_mb=200,
+                 output=None):
         """
         Initialize cross-platform TTS engine.
-        Uses macOS 'say' on Mac, gTTS on Linux/other platforms.
+        Uses macOS 'say' on Mac; on Linux the offline pyttsx3 engine, or gTTS.
+
+        Args:
+            voice: Voice name
+            rate: Speaking rate (words per minute)
+            backend: File synthesis backend ('auto', 'say', 'gtts' or 'pyttsx3')
+            cache_dir: Where synthesized audio is cached (None disables the cache)
+            cache_max_mb: Disk budget for the cache
+            output: Audio output for stream() (default: the sound card, or
+                NullOutput when there is none)
         """
         self.voice = voice  # Used for macOS
         self.rate = str(rate)  # Used for macOS
         self.platform = self._detect_platform()
+        self.backend = create_backend(backend, voice, rate)
+        logger.info(f"TTS backend: {self.backend.name}")
+        self.cache = TTSCache(cache_dir, max_bytes=cache_max_mb * 1024 * 1024) if cache_dir else None
+        self.output = output
         
     def _detect_platform(self):
         """Detect the operating system."""
@@ -38,6 +306,117 @@ class Speaker:
             # For now, just log (since Docker typically runs headless)
             logger.info("[Linux] TTS would play here (headless mode)")
     
+    def play(self, audio_path):
+        """
+        Play an already-synthesized audio file (blocking).
+        Avoids synthesizing the same text twice when a file already exists.
+        """
+        logger.info(f"Playing: {audio_path}")
+
+        if self.platform == "macos":
+            try:
+                subprocess.run(["afplay", audio_path])
+            except Exception as e:
+                logger.error(f"macOS playback Error: {e}")
+        else:
+            logger.info("[Linux] Audio would play here (headless mode)")
+
+    def _get_output(self):
+        if self.output is None:
+            try:
+                self.output = SoundDeviceOutput()
+            except Exception as e:
+                logger.info(f"No audio output device ({e}). Streaming in headless mode.")
+                self.output = NullOutput()
+        return self.output
+
+    def stream(self, text_iter, lookahead=2, sample_rate=None, on_sentence=None, on_audio=None, block_duration=0.05,
+               cancel=None):
+        """
+        Speak streamed text (e.g. the Thinker's token stream) sentence by sentence.
+
+        Sentences are synthesized on a small thread pool up to `lookahead` ahead
+        of playback, and played back to back through one output stream. Each
+        sentence is synthesized once; the same PCM goes to `on_audio` (e.g. for
+        the avatar) and to the speakers.
+
+        Args:
+            text_iter: Iterable of text chunks
+            lookahead: Sentences synthesized ahead of the one playing
+            sample_rate: Playback rate (default: the backend's native rate)
+            on_sentence: Called with each sentence as it starts playing
+            on_audio: Called with (sentence, audio, sample_rate) before playback
+            block_duration: Seconds of audio written to the device at a time
+            cancel: Optional threading.Event; setting it stops playback within
+                one block, drops queued audio and stops reading text_iter
+
+        Returns:
+            List of the sentences played (fully or partly)
+        """
+        sample_rate = sample_rate or getattr(self.backend, "sample_rate", 44100)
+        output = self._get_output()
+        pending = queue.Queue(maxsize=lookahead)
+        executor = ThreadPoolExecutor(max_workers=lookahead)
+
+        def produce():
+            splitter = SentenceSplitter()
+            try:
+                for chunk in text_iter:
+                    if cancel is not None and cancel.is_set():
+                        break
+                    for sentence in splitter.feed(chunk):
+                        pending.put((sentence, executor.submit(self.synthesize, sentence, sample_rate)))
+                if cancel is None or not cancel.is_set():
+                    for sentence in splitter.flush():
+                        pending.put((sentence, executor.submit(self.synthesize, sentence, sample_rate)))
+            except Exception as e:
+                logger.error(f"Text stream failed: {e}")
+            finally:
+                pending.put(None)
+
+        producer = threading.Thread(target=produce, daemon=True)
+        producer.start()
+
+        spoken = []
+        block = max(1, int(block_duration * sample_rate))
+        output.start(sample_rate)
+        try:
+            while True:
+                item = pending.get()
+                if item is None:
+                    break
+                sentence, future = item
+                try:
+                    audio, _ = future.result()
+                except Exception as e:
+                    logger.error(f"TTS failed for '{sentence}': {e}")
+                    continue
+                if cancel is not None and cancel.is_set():
+                    break
+                if on_audio:
+                    on_audio(sentence, audio, sample_rate)
+                if on_sentence:
+                    on_sentence(sentence)
+                spoken.append(sentence)
+                for i in range(0, len(audio), block):
+                    if cancel is not None and cancel.is_set():
+                        break
+                    output.write(audio[i:i + block])
+            if cancel is not None and cancel.is_set():
+                # Barge-in: cut the device buffer too, not just future writes
+                output.abort()
+            else:
+                output.drain()
+        finally:
+            # If playback stopped early, keep draining so the producer can finish
+            while producer.is_alive():
+                try:
+                    pending.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            executor.shutdown(wait=False, cancel_futures=True)
+        return spoken
+
     def _speak_macos(self, text):
         """Use macOS 'say' command."""
         try:
@@ -55,65 +434,90 @@ class Speaker:
             output_path = tf.name
             tf.close()
             
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self._cache_key(text)
+            if self.cache.get(cache_key, output_path):
+                logger.info(f"TTS cache hit: '{text[:40]}'")
+                return output_path
+
         logger.info(f"Saving speech to {output_path}...")
         
-        if self.platform == "macos":
-            self._speak_to_file_macos(text, output_path)
-        else:
-            self._speak_to_file_gtts(text, output_path)
+        self.backend.synthesize(text, output_path)
             
         # Verify file exists
         if not os.path.exists(output_path):
             logger.error("TTS File generation failed.")
+        elif cache_key is not None and os.path.getsize(output_path) > 0:
+            self.cache.put(cache_key, output_path)
         
         return output_path
-    
-    def _speak_to_file_macos(self, text, output_path):
-        """Use macOS 'say' command to save to file."""
-        try:
-            subprocess.run([
-                "say", 
-                "-v", self.voice, 
-                "-r", self.rate, 
-                "-o", output_path, 
-                "--data-format=LEI16@44100", 
-                text
-            ])
-        except Exception as e:
-            logger.error(f"macOS TTS File Error: {e}")
-    
-    def _speak_to_file_gtts(self, text, output_path):
-        """Use gTTS (Google Text-to-Speech) to save to file."""
-        try:
-            from gtts import gTTS
-            
-            # Generate speech
-            tts = gTTS(text=text, lang='en', slow=False)
-            
-            # gTTS saves as MP3 by default, but we need WAV for compatibility
-            # Save as MP3 first, then convert to WAV using ffmpeg
-            temp_mp3 = output_path.replace('.wav', '.mp3')
-            tts.save(temp_mp3)
-            
-            # Convert MP3 to WAV using ffmpeg (already in Dockerfile)
-            subprocess.run([
-                "ffmpeg", "-y", "-i", temp_mp3,
-                "-acodec", "pcm_s16le",
-                "-ar", "44100",
-                "-ac", "1",
-                output_path
-            ], check=True, capture_output=True)
-            
-            # Clean up temp MP3
-            if os.path.exists(temp_mp3):
-                os.remove(temp_mp3)
-                
-        except ImportError:
-            logger.error("gTTS not installed. Install with: pip install gtts")
-            raise
-        except Exception as e:
-            logger.error(f"gTTS Error: {e}")
-            raise
+
+    def synthesize(self, text, sample_rate=None, output_path=None):
+        """
+        Synthesize to a NumPy array, resampled for the consumer (e.g. 16000 for
+        Whisper-style models). Goes through the TTS cache; with `output_path`
+        a WAV copy is written too.
+
+        Returns:
+            (audio, sample_rate); audio is mono int16
+        """
+        cache_key = self._cache_key(text) if self.cache is not None else None
+        data = self.cache.get_bytes(cache_key) if cache_key else None
+        if data is not None:
+            audio, native_rate = read_wav(data)
+        else:
+            if hasattr(self.backend, "synthesize_array"):
+                audio, native_rate = self.backend.synthesize_array(text)
+            else:
+                tf = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
+                tf.close()
+                try:
+                    self.backend.synthesize(text, tf.name)
+                    with open(tf.name, "rb") as f:
+                        audio, native_rate = read_wav(f.read())
+                finally:
+                    os.remove(tf.name)
+            if cache_key and len(audio):
+                buffer = io.BytesIO()
+                wav.write(buffer, native_rate, audio)
+                self.cache.put_bytes(cache_key, buffer.getvalue())
+
+        sample_rate = sample_rate or native_rate
+        audio = resample(audio, native_rate, sample_rate)
+        if output_path:
+            wav.write(output_path, sample_rate, audio)
+        return audio, sample_rate
+
+    def _cache_key(self, text):
+        return TTSCache.key(text, self.voice, self.rate, self.backend.name, self.backend.sample_format)
+
+    def prewarm(self, phrases):
+        """
+        Synthesize fixed phrases into the cache ahead of time (e.g. at startup, in a thread).
+        Each phrase is cached whole and sentence by sentence, since the turn
+        pipeline speaks replies one sentence at a time.
+        """
+        if self.cache is None:
+            return
+        texts = []
+        for phrase in phrases:
+            for text in [phrase] + split_sentences(phrase):
+                if text not in texts:
+                    texts.append(text)
+
+        start = time.time()
+        warmed = 0
+        for text in texts:
+            if self._cache_key(text) in self.cache:
+                continue
+            try:
+                path = self.speak_to_file(text)
+                os.remove(path)
+                warmed += 1
+            except Exception as e:
+                logger.warning(f"TTS pre-warm failed for '{text}': {e}")
+        logger.info(f"TTS cache pre-warmed {warmed} new phrases in {time.time() - start:.1f}s.")
 
 if __name__ == "__main__":
     speaker = Speaker()
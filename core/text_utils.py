@@ -0,0 +1,30 @@
+import re
+
+# Sentence boundary: end punctuation followed by whitespace, or a line break
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+|\n+')
+
+
+def split_sentences(text):
+    """Split text into non-empty sentences."""
+    return [s.strip() for s in SENTENCE_BOUNDARY.split(text) if s.strip()]
+
+
+class SentenceSplitter:
+    """
+    Incremental sentence splitter for streamed text.
+    feed() returns the sentences completed so far; flush() returns the rest.
+    """
+    def __init__(self):
+        self.buffer = ""
+
+    def feed(self, text):
+        self.buffer += text
+        parts = SENTENCE_BOUNDARY.split(self.buffer)
+        # The last part may still be growing
+        self.buffer = parts.pop()
+        return [p.strip() for p in parts if p.strip()]
+
+    def flush(self):
+        rest = self.buffer.strip()
+        self.buffer = ""
+        return [rest] if rest else []
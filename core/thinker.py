@@ -1,20 +1,206 @@
 import ollama
 import json
 import logging
+from core.context import ConversationContext
+from core.extraction import InfoExtractor
 from core.lms_interface import LMSInterface
-import httpx
+from core.responder import TemplateResponder
+from core.text_utils import SENTENCE_BOUNDARY
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+FORCED_RECOMMENDATION = '{"action": "recommend", "params": {}}'
+OLLAMA_ERROR_REPLY = "I'm having trouble thinking right now. Is Ollama running?"
+FALLBACK_REPLY = "Could you tell me a bit more about what you'd like to learn?"
+
+ASK_USER_CORRECTION = "SYSTEM: You failed the rule. Do NOT describe the question. ASK it directly. Example: 'What are your skills?'"
+LEAKAGE_CORRECTION = "SYSTEM: You are outputting internal debug text. STOP. Just ask the question in natural English."
+DEBUG_CORRECTION = "SYSTEM: Do NOT output debug info about state. Just ask the question naturally."
+FINAL_JSON_CORRECTION = "SYSTEM: STOP. Do NOT output JSON. Just write a friendly message to the user."
+
+INFO_EXTRACTOR = InfoExtractor()
+
+DEBUG_PATTERNS = [
+    "Current State of Information",
+    "MISSING items:",
+    "collected_info:",
+    "- Goal:",
+    "- Level:",
+    "- Skills:",
+    "- Career Path:",
+]
+
+# How far back into already-released text the stream filters look,
+# so phrases split across chunk boundaries are still caught
+STREAM_FILTER_WINDOW = 32
+
+
+class _StreamFilter:
+    """
+    Incremental version of the process_input reply filters.
+
+    Streamed text is held back until a sentence boundary, scanned together with
+    the tail of what was already released, then released if clean.
+    """
+    def __init__(self, filter_phrases=True):
+        self.filter_phrases = filter_phrases
+        self.text = ""           # Everything received so far
+        self.released = 0        # Index into text up to which text has been released
+        self.output = ""         # Text actually handed to the caller
+        self.correction = None   # Set when the reply must be retried
+        self.buffered = False    # JSON reply: hold everything for the blocking path
+        self.held = False        # "{" after text was released: hold the rest until the end
+        self.stopped = False     # Reply was cut short; ignore the rest of the stream
+        self.strip_quotes = False
+
+    def feed(self, piece):
+        """Add a streamed piece. Returns the text that can be released now."""
+        self.text += piece
+        if self.stopped or self.buffered or self.held:
+            return []
+
+        cut = self._filter(final=False)
+        if cut is not None:
+            return cut
+
+        # Release up to the last complete sentence
+        end = None
+        for m in SENTENCE_BOUNDARY.finditer(self.text, self.released):
+            end = m.end()
+        return self._release(end) if end else []
+
+    def finish(self):
+        """End of stream. Returns whatever is left to release."""
+        if self.stopped or self.buffered or self.correction:
+            return []
+
+        if self.held:
+            rest = self.text[self.released:]
+            if "}" in rest and "action" in rest:
+                logger.warning("Dropping JSON that followed already-released text.")
+                return []
+            # Just a stray brace, let it through
+            self.held = False
+
+        cut = self._filter(final=True)
+        if cut is not None:
+            return cut
+        return self._release(len(self.text))
+
+    def _filter(self, final):
+        """
+        Run the reply filters over the unreleased text plus a window of released text.
+        Returns the text to release if the reply was cut short, else None.
+        """
+        window = self.text[max(0, self.released - STREAM_FILTER_WINDOW):]
+
+        if self.filter_phrases:
+            lower = window.lower()
+            correction = None
+            if "ask the user" in lower:
+                logger.warning("Detected bad phrasing: 'Ask the user'.")
+                correction = ASK_USER_CORRECTION
+            elif "action:" in lower or "params:" in lower:
+                logger.warning("Detected internal state leakage (Action/Params).")
+                correction = LEAKAGE_CORRECTION
+
+            if correction:
+                self.stopped = True
+                if self.output:
+                    # Can't take back what was already spoken, so just end the reply here
+                    logger.warning("Reply already partly released. Truncating instead of retrying.")
+                else:
+                    self.correction = correction
+                return []
+
+            if any(phrase in window for phrase in DEBUG_PATTERNS):
+                if "\n" not in self.text and not final:
+                    return []  # Wait for the end of the first line
+                logger.warning("Detected debug info in response. Filtering...")
+                return self._keep_first_line()
+
+        if not final and "{" in self.text[self.released:]:
+            if self.output:
+                self.held = True
+            else:
+                self.buffered = True
+            return []
+
+        return None
+
+    def _keep_first_line(self):
+        """Extract only the first line (the actual question), like process_input."""
+        self.stopped = True
+        first_line_end = self.text.find("\n")
+        if first_line_end == -1:
+            first_line_end = len(self.text)
+        first_line = self.text[:first_line_end].strip()
+
+        if not self.output and (not first_line or len(first_line) < 10):
+            # If first line is empty or too short, retry
+            self.text = first_line
+            self.correction = DEBUG_CORRECTION
+            return []
+        return self._release(first_line_end)
+
+    def _release(self, end):
+        if self.filter_phrases and self.released == 0 and self.text.startswith("ASK:"):
+            # Strip "ASK:" prefix if present
+            self.released = 4
+            self.strip_quotes = True
+
+        segment = self.text[self.released:end]
+        self.released = max(self.released, end)
+        if self.strip_quotes:
+            segment = segment.replace('"', "")
+            if not self.output:
+                segment = segment.lstrip()
+
+        if not segment:
+            return []
+        self.output += segment
+        return [segment]
+
+
+def _advance(steps, error=None):
+    """Next step of a _stream_steps generator (throwing `error` in, if any), or None when done."""
+    try:
+        return steps.throw(error) if error is not None else next(steps)
+    except StopIteration:
+        return None
+
+
 class Thinker:
-    def __init__(self):
-        self.client = httpx.Client(timeout=30.0)
+    def __init__(self, max_context_tokens=3072, keep_exchanges=4, num_ctx=4096, keep_alive="30m", fast_path=True,
+                 lms=None):
+        """
+        Args:
+            max_context_tokens: Token budget for the prompt sent to Ollama
+            keep_exchanges: Recent exchanges kept verbatim; older ones are summarized
+            num_ctx: Model context size; fixed so Ollama never reloads the model between turns
+            keep_alive: How long Ollama keeps the model (and its prompt cache) loaded when idle
+            fast_path: Answer from templates when the next question is already
+                decided, instead of calling the LLM
+            lms: LMSInterface to recommend from; pass one in to share its course
+                indexes between Thinkers (a new one is built if None)
+        """
         # Using smallest model for fastest inference
         self.model = "qwen3:1.7b"
-        self.lms = LMSInterface()
+        self.keep_alive = keep_alive
+        # The same options on every call: a change (e.g. num_ctx) would reload the model and drop its KV cache
+        self.options = {"num_ctx": num_ctx}
+        self.lms = lms or LMSInterface()
         self.history = []
+        self.context = ConversationContext(max_tokens=max_context_tokens, keep_exchanges=keep_exchanges)
+        self.pending = []  # This turn's rejected replies and corrections, sent only while retrying
+        self.state_message = None
+        self.turns = 0
+        self.responder = TemplateResponder(INFO_EXTRACTOR) if fast_path else None
+        self.updated_fields = []
+        self.llm_calls = 0
+        self.llm_calls_avoided = 0
 
         # Explicit State Tracking (to prevent hallucination)
         self.collected_info = {
@@ -33,7 +219,7 @@ RULES:
 1. Be conversational and professional!
 2. Ask ONE question at a time to keep it simple.
 3. ACKNOWLEDGE what the user just said before asking the next question.
-4. CHECK the 'Current State of Information' below. Ask ONLY for what is MISSING.
+4. CHECK the latest 'Current State of Information' message. Ask ONLY for what is MISSING.
 5. Do NOT ask about topics outside the 4 items (e.g. do not ask about Front-end vs Back-end).
 6. Do NOT output JSON until you have ALL 4 items.
 6. Do NOT say "Ask the user..." or add "ASK:". Just output the question.
@@ -58,98 +244,41 @@ FINAL OUTPUT FORMAT (only when ready):
   }
 }
 """
-        # Initialize history
+        # Initialize history. The system prompt never changes, so Ollama can reuse its KV cache
         self.history.append({"role": "system", "content": self.system_prompt})
 
     def _update_collected_info(self, user_text):
         """
         Extract information from user text and update collected_info.
-        Simple keyword-based extraction.
+        Keyword-based: one pass of the compiled synonym matcher (core.extraction).
         """
-        text_lower = user_text.lower()
-
-        # Career path / Goal detection
         # If user switches career, we might need to reset fields, but for now just update
-        if "web developer" in text_lower or "web development" in text_lower:
-            self.collected_info["career_path"] = "Web Developer"
-            self.collected_info["goal"] = "Learn Web Development"
-        elif (
-            "data scientist" in text_lower
-            or "data science" in text_lower
-            or "detached scientist" in text_lower
-            or "data size" in text_lower
-        ):  # Handle mishearing
-            self.collected_info["career_path"] = "Data Scientist"
-            self.collected_info["goal"] = "Learn Data Science"
-        elif "ai engineer" in text_lower:
-            self.collected_info["career_path"] = "AI Engineer"
-            self.collected_info["goal"] = "Learn AI"
-
-        # Level detection
-        if any(
-            w in text_lower
-            for w in [
-                "beginner",
-                "new",
-                "scratch",
-                "starting",
-                "begin",
-                "novice",
-                "no experience",
-            ]
-        ):
-            self.collected_info["level"] = "Beginner"
-        elif "intermediate" in text_lower:
-            self.collected_info["level"] = "Intermediate"
-        elif "advanced" in text_lower:
-            self.collected_info["level"] = "Advanced"
-
-        # Skills detection (look for common tech terms)
-        skills = []
-        common_skills = [
-            "python",
-            "html",
-            "css",
-            "javascript",
-            "react",
-            "java",
-            "tensorflow",
-            "sql",
-            "git",
-        ]
-        for skill in common_skills:
-            # Simple negation check
-            if f"no {skill}" in text_lower or f"not {skill}" in text_lower:
-                continue
-            if skill in text_lower:
-                skills.append(
-                    skill.upper()
-                    if skill in ["html", "css", "sql", "git"]
-                    else skill.capitalize()
-                )
-
-        if skills:
-            self.collected_info["skills"] = ", ".join(skills)
-        elif "none" in text_lower or "no" in text_lower or "nothing" in text_lower:
-            self.collected_info["skills"] = "none"
+        found = INFO_EXTRACTOR.extract(user_text)
+        self.collected_info.update(found)
+
+        if found.get("skills") == "none" and not self.collected_info["level"]:
             # Auto-inferred Level=Beginner if not set
-            if not self.collected_info["level"]:
-                self.collected_info["level"] = "Beginner"
-                logger.info("Auto-inferred Level='Beginner' from 'no skills'")
+            self.collected_info["level"] = "Beginner"
+            logger.info("Auto-inferred Level='Beginner' from 'no skills'")
 
         logger.info(f"Updated collected_info: {self.collected_info}")
 
-    def process_input(self, user_text):
+    def _prepare_turn(self, user_text):
         """
-        Process user text, query LLM, handle tool calls with robust retry loop.
+        Record the user's message, update collected_info and refresh the state block.
+        Returns True when every field is known and a recommendation should be forced.
         """
         logger.info(f"User: {user_text}")
         self.history.append({"role": "user", "content": user_text})
+        self.pending = []
+        self.turns += 1
 
         # Extract information from user's message
+        before = dict(self.collected_info)
         self._update_collected_info(user_text)
+        self.updated_fields = [k for k, v in self.collected_info.items() if v != before[k]]
 
-        # DYNAMIC SYSTEM PROMPT: Inject current state so LLM knows what it has
+        # DYNAMIC STATE: Tell the LLM what it has, in a message after the user's
         missing_items = [k for k, v in self.collected_info.items() if v is None]
 
         force_recommendation = False
@@ -169,8 +298,205 @@ Current State of Information:
 
 {status_msg}
 """
-        # Update the system message (always the first one)
-        self.history[0]["content"] = self.system_prompt + "\n" + current_state_str
+        # Sent last rather than folded into the system prompt, so everything before
+        # it is a byte-stable prefix and only the new messages need prompt evaluation
+        self.state_message = {"role": "system", "content": current_state_str}
+        return force_recommendation
+
+    def messages(self):
+        """
+        What is sent to Ollama: the static system prompt, the trimmed history,
+        then the state block and this turn's retry messages.
+        """
+        tail = ([self.state_message] if self.state_message else []) + self.pending
+        return self.context.build(self.history[0], self.history[1:], tail)
+
+    def _fast_reply(self, user_text):
+        """
+        Template reply when this turn only needs the next missing-field question.
+        Returns None when the LLM has to answer.
+        """
+        if self.responder is None:
+            return None
+        reply = self.responder.respond(self.collected_info, self.updated_fields, user_text)
+        if reply is not None:
+            self.llm_calls_avoided += 1
+            logger.info(f"Fast path: answered from templates ({self.llm_calls_avoided} LLM calls avoided).")
+            self._commit_reply(reply)
+        return reply
+
+    def _chat(self, stream=False):
+        """Send the current history to Ollama."""
+        self.llm_calls += 1
+        # Add temperature to encourage variety? Default is 0.8 usually.
+        return ollama.chat(model=self.model, messages=self.messages(), stream=stream,
+                           options=self.options, keep_alive=self.keep_alive)
+
+    def _retry(self, content, correction):
+        """Record a rejected reply and the correction for the next attempt."""
+        self.pending.append({"role": "assistant", "content": content})
+        self.pending.append({"role": "system", "content": correction})
+
+    def _commit_reply(self, content):
+        """
+        Persist the turn's final reply. Retry corrections are dropped (they only
+        mattered for this turn) and old exchanges are folded into the summary.
+        """
+        if self.pending:
+            logger.info(f"Dropping {len(self.pending)} retry messages from history.")
+            self.pending = []
+        self.history.append({"role": "assistant", "content": content})
+        self.history[1:] = self.context.compact(self.history[0], self.history[1:])
+
+    def _parse_action(self, content):
+        """Return the JSON action dict embedded in content, or None for natural language."""
+        if "{" in content and "}" in content and "action" in content:
+            try:
+                start = content.find("{")
+                end = content.rfind("}") + 1
+                json_data = json.loads(content[start:end])
+                if isinstance(json_data, dict):
+                    return json_data
+            except:
+                pass
+        return None
+
+    def _check_reply(self, content):
+        """
+        Run the natural-language filters on a reply.
+        Returns (content, correction); correction is None if the reply can be used.
+        """
+        # BAD PHRASE FILTER (Fix for small model regression)
+        if "ask the user" in content.lower():
+            logger.warning("Detected bad phrasing: 'Ask the user'. Retrying...")
+            # Stronger correction
+            return content, ASK_USER_CORRECTION
+
+        # INTERNAL STATE LEAKAGE FILTER
+        if "action:" in content.lower() or "params:" in content.lower():
+            logger.warning(
+                "Detected internal state leakage (Action/Params). Retrying..."
+            )
+            return content, LEAKAGE_CORRECTION
+
+        # Filter out debug information patterns
+        if any(phrase in content for phrase in DEBUG_PATTERNS):
+            logger.warning("Detected debug info in response. Filtering...")
+            # Extract only the first line/sentence (the actual question)
+            content = content.split("\n")[0].strip()
+            if not content or len(content) < 10:
+                # If first line is empty or too short, retry
+                return content, DEBUG_CORRECTION
+
+        # Strip "ASK:" prefix if present
+        if content.startswith("ASK:"):
+            content = content[4:].strip().replace('"', "")
+
+        return content, None
+
+    def _handle_action(self, content, json_data, force_recommendation):
+        """
+        Validate a JSON action and, for a valid recommendation, run the course search
+        and queue up the instruction for the final explanation pass.
+        Returns a correction message if the model must retry, else None.
+        """
+        action = json_data.get("action")
+
+        if action != "recommend":
+            # Unauthorized Action (e.g. "collect_info")
+            logger.warning(f"Ignored unauthorized action: {action}")
+            return "Do NOT output JSON. Ask the user a question in natural English."
+
+        # CHECK CONVERSATION LENGTH (Prevent premature guessing), UNLESS triggered manually
+        # Counts turns, since history is trimmed and no longer holds retries
+        if (
+            not force_recommendation and self.turns < 5
+        ):
+            logger.warning("Recommendation rejected: Conversation too short.")
+            return "SYSTEM: Too soon. You need to collect more info. Reply to the user with a QUESTION about their Level or Skills. Do NOT output JSON."
+
+        # STRICT VALIDATION: Check self.collected_info (what user actually told us)
+        # NOT params (which the model might hallucinate)
+        collected_count = sum(
+            1 for v in self.collected_info.values() if v is not None
+        )
+
+        if collected_count < 4:
+            # Model is hallucinating! Reject hard.
+            missing_fields = [
+                k for k, v in self.collected_info.items() if v is None
+            ]
+            logger.warning(
+                f"HALLUCINATION DETECTED. User only provided {collected_count}/4 fields. Missing: {missing_fields}"
+            )
+            return f"SYSTEM: STOP. The user has NOT told you about: {missing_fields}. You MUST ASK them first. Use the question templates. Do NOT output JSON."
+
+        # VALID: We have all 4 fields from user
+        logger.info("Tool Call Valid: recommend_courses")
+        # Use collected_info instead of params (to avoid using hallucinated data)
+        recommendations = self.lms.recommend_courses(
+            self.collected_info["goal"],
+            self.collected_info["level"],
+            self.collected_info["skills"],
+            self.collected_info["career_path"],
+        )
+
+        # RESET STATE so we don't loop forever
+        self.collected_info = {
+            "goal": None,
+            "level": None,
+            "skills": None,
+            "career_path": None,
+        }
+        # Also reset history? Maybe keep context but start fresh with new goal?
+        # For now just reset collected info so it doesn't auto-trigger again immediately.
+
+        # Create a clear instruction for the model to explain the result
+        tool_msg = (
+            f"SYSTEM: Good job. You found these courses: {json.dumps(recommendations)}.\n"
+            "NOW: Write a short, friendly message to the user recommending the best course.\n"
+            "- FIRST: Write a paragraph explaining WHY this course is perfect.\n"
+            "- SECOND: Say 'I found a great course for you!'\n"
+            "- FINALLY: Place the URL on a separate line at the very END.\n\n"
+            "Example:\n"
+            '"This Python course is perfect for beginners because... I found a great course for you!\n'
+            'https://url..."\n\n'
+            "Do NOT use emojis. Do NOT output JSON. Just talk."
+        )
+        self._retry(content, tool_msg)
+        return None
+
+    def process_input(self, user_text):
+        """
+        Process user text, query LLM, handle tool calls with robust retry loop.
+        """
+        steps = self._reply_steps(user_text)
+        try:
+            next(steps)
+            while True:
+                # Each step asks for the model's reply to the current messages
+                try:
+                    content = self._chat()["message"]["content"]
+                except Exception as e:
+                    steps.throw(e)
+                    continue
+                steps.send(content)
+        except StopIteration as done:
+            return done.value
+
+    def _reply_steps(self, user_text):
+        """
+        The turn's retry/correction loop without the I/O, shared with AsyncThinker.
+
+        A generator: each `yield` asks the caller for the model's reply to
+        self.messages(), which the caller sends in (or throws the Ollama error
+        in). Returns the final reply.
+        """
+        force_recommendation = self._prepare_turn(user_text)
+        if not force_recommendation:
+            fast_reply = self._fast_reply(user_text)
+            if fast_reply is not None:
+                return fast_reply
 
         max_retries = 3
         attempt = 0
@@ -180,211 +506,219 @@ Current State of Information:
 
             # Short-circuit: If we have all info, skip LLM thinking and force recommendation
             if force_recommendation:
-                content = '{"action": "recommend", "params": {}}'
+                content = FORCED_RECOMMENDATION
                 logger.info("Auto-triggering recommendation (all fields collected).")
             else:
                 try:
-                    # Add temperature to encourage variety? Default is 0.8 usually.
-                    response = ollama.chat(model=self.model, messages=self.history)
-                    content = response["message"]["content"]
+                    content = yield
                 except Exception as e:
                     logger.error(f"Ollama Error: {e}")
-                    return "I'm having trouble thinking right now. Is Ollama running?"
-
-            # Check if content looks like JSON
-            is_json_action = False
-            json_data = {}
+                    return OLLAMA_ERROR_REPLY
 
-            if "{" in content and "}" in content and "action" in content:
-                try:
-                    start = content.find("{")
-                    end = content.rfind("}") + 1
-                    json_str = content[start:end]
-                    json_data = json.loads(json_str)
-                    if isinstance(json_data, dict):
-                        is_json_action = True
-                except:
-                    pass
+            json_data = self._parse_action(content)
 
             # CASE 1: Natural Language (Good!)
-            if not is_json_action:
-                # BAD PHRASE FILTER (Fix for small model regression)
-                if "ask the user" in content.lower():
-                    logger.warning("Detected bad phrasing: 'Ask the user'. Retrying...")
-                    self.history.append({"role": "assistant", "content": content})
-                    # Stronger correction
-                    self.history.append(
-                        {
-                            "role": "system",
-                            "content": "SYSTEM: You failed the rule. Do NOT describe the question. ASK it directly. Example: 'What are your skills?'",
-                        }
-                    )
+            if json_data is None:
+                content, correction = self._check_reply(content)
+                if correction:
+                    self._retry(content, correction)
                     continue
-
-                # INTERNAL STATE LEAKAGE FILTER
-                if "action:" in content.lower() or "params:" in content.lower():
-                    logger.warning(
-                        "Detected internal state leakage (Action/Params). Retrying..."
-                    )
-                    self.history.append({"role": "assistant", "content": content})
-                    self.history.append(
-                        {
-                            "role": "system",
-                            "content": "SYSTEM: You are outputting internal debug text. STOP. Just ask the question in natural English.",
-                        }
-                    )
-                    continue
-
-                # Filter out debug information patterns
-                if any(
-                    phrase in content
-                    for phrase in [
-                        "Current State of Information",
-                        "MISSING items:",
-                        "collected_info:",
-                        "- Goal:",
-                        "- Level:",
-                        "- Skills:",
-                        "- Career Path:",
-                    ]
-                ):
-                    logger.warning("Detected debug info in response. Filtering...")
-                    # Extract only the first line/sentence (the actual question)
-                    lines = content.split("\n")
-                    content = lines[0].strip()
-                    if not content or len(content) < 10:
-                        # If first line is empty or too short, retry
-                        self.history.append({"role": "assistant", "content": content})
-                        self.history.append(
-                            {
-                                "role": "system",
-                                "content": "SYSTEM: Do NOT output debug info about state. Just ask the question naturally.",
-                            }
-                        )
-                        continue
-
-                # Strip "ASK:" prefix if present
-                if content.startswith("ASK:"):
-                    content = content[4:].strip().replace('"', "")
-
-                self.history.append({"role": "assistant", "content": content})
+                self._commit_reply(content)
                 return content
 
             # CASE 2: JSON Action Handling
-            action = json_data.get("action")
-
-            if action == "recommend":
-                # CHECK HISTORY LENGTH (Prevent premature guessing), UNLESS triggered manually
-                if (
-                    not force_recommendation and len(self.history) < 10
-                ):  # Increased from 6 to 10
-                    logger.warning("Recommendation rejected: Conversation too short.")
-                    retry_msg = "SYSTEM: Too soon. You need to collect more info. Reply to the user with a QUESTION about their Level or Skills. Do NOT output JSON."
-                    self.history.append({"role": "assistant", "content": content})
-                    self.history.append({"role": "system", "content": retry_msg})
-                    continue
+            correction = self._handle_action(content, json_data, force_recommendation)
+            if correction:
+                self._retry(content, correction)
+                continue  # Loop again
+            return (yield from self._final_pass_steps())
+
+        # Fallback if retries exhausted
+        self._commit_reply(FALLBACK_REPLY)
+        return FALLBACK_REPLY
+
+    def _final_pass_steps(self):
+        """Final pass to get natural language explanation of the recommendation."""
+        max_final_retries = 2
+        final_text = "Here is a recommendation..."
+
+        for _ in range(max_final_retries):
+            final_text = yield
 
-                params = json_data.get("params", {})
-
-                # STRICT VALIDATION: Check self.collected_info (what user actually told us)
-                # NOT params (which the model might hallucinate)
-                collected_count = sum(
-                    1 for v in self.collected_info.values() if v is not None
-                )
-
-                if collected_count < 4:
-                    # Model is hallucinating! Reject hard.
-                    missing_fields = [
-                        k for k, v in self.collected_info.items() if v is None
-                    ]
-                    logger.warning(
-                        f"HALLUCINATION DETECTED. User only provided {collected_count}/4 fields. Missing: {missing_fields}"
-                    )
-                    retry_msg = f"SYSTEM: STOP. The user has NOT told you about: {missing_fields}. You MUST ASK them first. Use the question templates. Do NOT output JSON."
-                    self.history.append({"role": "assistant", "content": content})
-                    self.history.append({"role": "system", "content": retry_msg})
+            # Sanity check: If it outputs JSON again, force it to stop
+            if "{" in final_text and "}" in final_text and "action" in final_text:
+                logger.warning("Final response was still JSON. Retrying...")
+                self._retry(final_text, FINAL_JSON_CORRECTION)
+                continue
+            else:
+                break
+
+        self._commit_reply(final_text)
+        return final_text
+
+    def process_input_stream(self, user_text):
+        """
+        Streaming version of process_input: yields reply text as Ollama produces it.
+
+        Text is released a sentence at a time, after the same filters as process_input
+        have passed over it, so callers can start TTS before generation finishes.
+        Bad output caught before anything was released triggers the usual retry;
+        bad output after that truncates the reply instead (released text can't be
+        taken back). JSON replies are buffered and handled exactly like process_input.
+
+        Closing the generator early (barge-in) closes the Ollama stream and
+        records only the text released so far as the assistant's reply.
+        """
+        released = []
+        reply = self._stream_reply(user_text)
+        try:
+            for text in reply:
+                released.append(text)
+                yield text
+        except GeneratorExit:
+            self._record_interrupted("".join(released))
+            raise
+        finally:
+            reply.close()
+
+    def _record_interrupted(self, released):
+        """Make the history show what the user actually got before interrupting."""
+        logger.info("Reply interrupted by the user.")
+        last = self.history[-1] if self.history else None
+        if last is not None and last["role"] == "assistant":
+            last["content"] = released
+        else:
+            self._commit_reply(released)
+
+    def _stream_content(self):
+        """Content pieces of a streaming chat. Closing this closes the HTTP stream."""
+        stream = self._chat(stream=True)
+        try:
+            for chunk in stream:
+                yield chunk["message"]["content"]
+        finally:
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()
+
+    def _stream_reply(self, user_text):
+        steps = self._stream_steps(user_text)
+        try:
+            step = _advance(steps)
+            while step is not None:
+                if not isinstance(step, _StreamFilter):
+                    yield step
+                    step = _advance(steps)
                     continue
+                # Stream the model's reply through the filter, releasing text as it clears
+                error = None
+                content_stream = self._stream_content()
+                try:
+                    for piece in content_stream:
+                        for text in step.feed(piece):
+                            yield text
+                        if step.stopped:
+                            break
+                except Exception as e:
+                    error = e
+                finally:
+                    content_stream.close()
+                step = _advance(steps, error)
+        finally:
+            steps.close()
+
+    def _stream_steps(self, user_text):
+        """
+        Streaming version of _reply_steps, shared with AsyncThinker. Yields either
+        text to release, or a _StreamFilter the caller should stream the model's
+        reply into (releasing what it lets through, and throwing any Ollama
+        error back in here).
+        """
+        force_recommendation = self._prepare_turn(user_text)
+        if not force_recommendation:
+            fast_reply = self._fast_reply(user_text)
+            if fast_reply is not None:
+                yield fast_reply
+                return
+
+        max_retries = 3
+        attempt = 0
 
-                # VALID: We have all 4 fields from user
-                logger.info("Tool Call Valid: recommend_courses")
-                # Use collected_info instead of params (to avoid using hallucinated data)
-                recommendations = self.lms.recommend_courses(
-                    self.collected_info["goal"],
-                    self.collected_info["level"],
-                    self.collected_info["skills"],
-                    self.collected_info["career_path"],
-                )
-
-                # RESET STATE so we don't loop forever
-                self.collected_info = {
-                    "goal": None,
-                    "level": None,
-                    "skills": None,
-                    "career_path": None,
-                }
-                # Also reset history? Maybe keep context but start fresh with new goal?
-                # For now just reset collected info so it doesn't auto-trigger again immediately.
-
-                # Create a clear instruction for the model to explain the result
-                tool_msg = (
-                    f"SYSTEM: Good job. You found these courses: {json.dumps(recommendations)}.\n"
-                    "NOW: Write a short, friendly message to the user recommending the best course.\n"
-                    "- FIRST: Write a paragraph explaining WHY this course is perfect.\n"
-                    "- SECOND: Say 'I found a great course for you!'\n"
-                    "- FINALLY: Place the URL on a separate line at the very END.\n\n"
-                    "Example:\n"
-                    '"This Python course is perfect for beginners because... I found a great course for you!\n'
-                    'https://url..."\n\n'
-                    "Do NOT use emojis. Do NOT output JSON. Just talk."
-                )
-                self.history.append({"role": "assistant", "content": content})
-                self.history.append({"role": "system", "content": tool_msg})
-
-                # Final pass to get natural language explanation
-                max_final_retries = 2
-                final_text = "Here is a recommendation..."
-
-                for _ in range(max_final_retries):
-                    final_resp = ollama.chat(model=self.model, messages=self.history)
-                    final_text = final_resp["message"]["content"]
-
-                    # Sanity check: If it outputs JSON again, force it to stop
-                    if (
-                        "{" in final_text
-                        and "}" in final_text
-                        and "action" in final_text
-                    ):
-                        logger.warning("Final response was still JSON. Retrying...")
-                        self.history.append(
-                            {"role": "assistant", "content": final_text}
-                        )
-                        self.history.append(
-                            {
-                                "role": "system",
-                                "content": "SYSTEM: STOP. Do NOT output JSON. Just write a friendly message to the user.",
-                            }
-                        )
-                        continue
-                    else:
-                        break
-
-                self.history.append({"role": "assistant", "content": final_text})
-                return final_text
+        while attempt < max_retries:
+            attempt += 1
 
+            if force_recommendation:
+                content = FORCED_RECOMMENDATION
+                logger.info("Auto-triggering recommendation (all fields collected).")
             else:
-                # Unauthorized Action (e.g. "collect_info")
-                logger.warning(f"Ignored unauthorized action: {action}")
-                retry_msg = (
-                    "Do NOT output JSON. Ask the user a question in natural English."
-                )
-                self.history.append({"role": "assistant", "content": content})
-                self.history.append({"role": "system", "content": retry_msg})
-                continue  # Loop again
+                reply = _StreamFilter()
+                try:
+                    yield reply
+                except Exception as e:
+                    logger.error(f"Ollama Error: {e}")
+                    if not reply.output:
+                        yield OLLAMA_ERROR_REPLY
+                        return
+                    reply.stopped = True
+
+                if reply.correction:
+                    self._retry(reply.text, reply.correction)
+                    continue
+
+                if not reply.buffered:
+                    # CASE 1: Natural Language, already filtered and (mostly) released
+                    yield from reply.finish()
+                    self._commit_reply(reply.output)
+                    return
+
+                content = reply.text
+
+            json_data = self._parse_action(content)
+
+            # Buffered but not an action after all: filter and release in one go
+            if json_data is None:
+                content, correction = self._check_reply(content)
+                if correction:
+                    self._retry(content, correction)
+                    continue
+                self._commit_reply(content)
+                yield content
+                return
+
+            correction = self._handle_action(content, json_data, force_recommendation)
+            if correction:
+                self._retry(content, correction)
+                continue
+            yield from self._final_pass_stream_steps()
+            return
 
         # Fallback if retries exhausted
-        fallback = "Could you tell me a bit more about what you'd like to learn?"
-        self.history.append({"role": "assistant", "content": fallback})
-        return fallback
+        self._commit_reply(FALLBACK_REPLY)
+        yield FALLBACK_REPLY
+
+    def _final_pass_stream_steps(self):
+        """Streaming version of _final_pass_steps."""
+        max_final_retries = 2
+        final_text = "Here is a recommendation..."
+
+        for _ in range(max_final_retries):
+            reply = _StreamFilter(filter_phrases=False)
+            yield reply
+            if not reply.buffered:
+                yield from reply.finish()
+                self._commit_reply(reply.output)
+                return
+
+            final_text = reply.text
+            # Sanity check: If it outputs JSON again, force it to stop
+            if "{" in final_text and "}" in final_text and "action" in final_text:
+                logger.warning("Final response was still JSON. Retrying...")
+                self._retry(final_text, FINAL_JSON_CORRECTION)
+                continue
+            break
+
+        self._commit_reply(final_text)
+        yield final_text
 
 
 if __name__ == "__main__":
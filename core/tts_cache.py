@@ -0,0 +1,151 @@
+import hashlib
+import logging
+import os
+import re
+import shutil
+import threading
+from collections import OrderedDict
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text):
+    """Collapse whitespace so trivially different strings share a cache entry."""
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class TTSCache:
+    def __init__(self, cache_dir="outputs/cache/tts", max_bytes=200 * 1024 * 1024, memory_items=64):
+        """
+        Content-addressed cache of synthesized audio.
+
+        Entries are keyed by everything that changes the output: normalized text,
+        voice, rate, backend and sample format. The most recent `memory_items`
+        files are also kept in memory. On disk, least recently used entries are
+        evicted once the cache grows past `max_bytes`.
+
+        Args:
+            cache_dir: Directory holding one <key>.wav per entry
+            max_bytes: Disk budget for the cache
+            memory_items: Entries kept in memory as well
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.memory_items = memory_items
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()  # key -> audio bytes
+        self._disk = OrderedDict()    # key -> size in bytes, least recently used first
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+        # Rebuild the LRU order from the previous run (mtime is bumped on every hit)
+        entries = []
+        for name in os.listdir(cache_dir):
+            if name.endswith(".wav"):
+                path = os.path.join(cache_dir, name)
+                entries.append((os.path.getmtime(path), name[:-4], os.path.getsize(path)))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+        self._evict()
+
+    @staticmethod
+    def key(text, voice, rate, backend, sample_format):
+        parts = "|".join([normalize_text(text), str(voice), str(rate), backend, sample_format])
+        return hashlib.sha256(parts.encode("utf-8")).hexdigest()[:32]
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.wav")
+
+    @property
+    def size_bytes(self):
+        return sum(self._disk.values())
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._memory or key in self._disk
+
+    def get_bytes(self, key):
+        """Cached audio file contents, or None on a miss."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self._disk.move_to_end(key)
+                data = self._memory[key]
+            elif key in self._disk and os.path.exists(self._path(key)):
+                self._disk.move_to_end(key)
+                with open(self._path(key), "rb") as f:
+                    data = f.read()
+                self._remember(key, data)
+            else:
+                self._disk.pop(key, None)
+                self.misses += 1
+                return None
+            self.hits += 1
+            try:
+                os.utime(self._path(key))
+            except OSError:
+                pass
+            return data
+
+    def get(self, key, output_path):
+        """Copy a cached entry to `output_path`. Returns False on a miss."""
+        data = self.get_bytes(key)
+        if data is None:
+            return False
+        with open(output_path, "wb") as f:
+            f.write(data)
+        return True
+
+    def put_bytes(self, key, data):
+        """Store synthesized audio file contents under `key`."""
+        tmp_path = self._path(key) + f".{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        with self._lock:
+            os.replace(tmp_path, self._path(key))
+            self._disk[key] = len(data)
+            self._disk.move_to_end(key)
+            self._remember(key, data)
+            self._evict()
+
+    def put(self, key, audio_path):
+        """Store a freshly synthesized file under `key`."""
+        with open(audio_path, "rb") as f:
+            self.put_bytes(key, f.read())
+
+    def _remember(self, key, data):
+        self._memory[key] = data
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _evict(self):
+        total = self.size_bytes
+        while total > self.max_bytes and len(self._disk) > 1:
+            key, size = self._disk.popitem(last=False)
+            self._memory.pop(key, None)
+            total -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        hit_rate = self.hits / lookups if lookups else 0.0
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": hit_rate,
+            "entries": len(self._disk),
+            "bytes": self.size_bytes,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._disk.clear()
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+            os.makedirs(self.cache_dir, exist_ok=True)
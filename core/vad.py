@@ -0,0 +1,197 @@
+import logging
+
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def frame_signal(audio, frame_len):
+    """
+    View mono audio as a (n_frames, frame_len) array without copying.
+    A trailing partial frame is dropped.
+    """
+    audio = np.asarray(audio).reshape(-1)
+    n_frames = len(audio) // frame_len
+    return audio[:n_frames * frame_len].reshape(n_frames, frame_len)
+
+
+def _to_float(audio):
+    """int16 -> float32 in [-1, 1); float input passed through."""
+    audio = np.asarray(audio)
+    if np.issubdtype(audio.dtype, np.floating):
+        return audio.astype(np.float32, copy=False)
+    return audio.astype(np.float32) * (1.0 / 32768.0)
+
+
+def frame_features(frames):
+    """
+    Per-frame energy (dBFS) and zero-crossing rate for a (n_frames, frame_len) array.
+    Computed in float32, so int16 input can't overflow.
+    """
+    x = _to_float(frames)
+    energy_db = 10.0 * np.log10(np.mean(x * x, axis=1) + 1e-10)
+    signs = np.signbit(x)
+    zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+    return energy_db, zcr
+
+
+class EnergyVAD:
+    def __init__(self, sample_rate=16000, frame_duration=0.03, threshold_db=10.0, min_speech_db=-50.0,
+                 max_zcr=0.35, noisy_margin_db=10.0, noise_window=2.0, initial_noise_db=-60.0, hangover=2):
+        """
+        Frame-level energy + zero-crossing VAD with an adaptive noise floor.
+
+        A frame is speech when its energy is `threshold_db` above the noise floor
+        (and above `min_speech_db` absolute). The floor is the quietest frame in the
+        last `noise_window` seconds (minimum statistics), so it follows steady
+        background noise up or down while the pauses in speech keep it low. Frames with a noise-like
+        zero-crossing rate need an extra `noisy_margin_db` to count, which rejects
+        hiss and fans without dropping loud fricatives.
+
+        Args:
+            sample_rate: Audio sample rate
+            frame_duration: Frame length in seconds (10-30 ms)
+            threshold_db: Margin above the noise floor for speech
+            min_speech_db: Absolute energy floor for speech (dBFS)
+            max_zcr: Zero-crossing rate above which a frame looks like noise
+            noisy_margin_db: Extra margin required for noise-like frames
+            noise_window: Seconds of history the noise floor is taken over
+            initial_noise_db: Noise floor assumed before any history exists (dBFS)
+            hangover: Frames kept as speech after the last speech frame
+        """
+        self.sample_rate = sample_rate
+        self.frame_len = int(frame_duration * sample_rate)
+        self.threshold_db = threshold_db
+        self.min_speech_db = min_speech_db
+        self.max_zcr = max_zcr
+        self.noisy_margin_db = noisy_margin_db
+        self.noise_frames = max(1, int(noise_window / frame_duration))
+        self.initial_noise_db = initial_noise_db
+        self.hangover = hangover
+        self._history = np.full(self.noise_frames, initial_noise_db, dtype=np.float32)
+        self._hang_left = 0
+
+    @property
+    def noise_db(self):
+        """Current noise floor estimate (dBFS)."""
+        return float(self._history.min())
+
+    def speech_mask(self, audio, frame_len=None):
+        """Classify every frame of `audio` in one vectorized pass. Returns a bool array."""
+        frames = frame_signal(audio, frame_len or self.frame_len)
+        n = len(frames)
+        if n == 0:
+            return np.zeros(0, dtype=bool)
+
+        energy_db, zcr = frame_features(frames)
+
+        # Per-frame noise floor: minimum over the preceding noise_window of frames
+        history = np.concatenate([self._history, energy_db.astype(np.float32)])
+        floor = np.lib.stride_tricks.sliding_window_view(history[:-1], self.noise_frames).min(axis=1)
+        self._history = history[-self.noise_frames:]
+
+        threshold = np.maximum(floor + self.threshold_db, self.min_speech_db)
+        raw = (energy_db > threshold) & ((zcr <= self.max_zcr) | (energy_db > threshold + self.noisy_margin_db))
+        return self._apply_hangover(raw)
+
+    def _apply_hangover(self, raw):
+        n = len(raw)
+        mask = raw.copy()
+        if self._hang_left:
+            mask[:self._hang_left] = True
+        if self.hangover:
+            mask |= np.convolve(raw, np.ones(self.hangover + 1, dtype=bool))[:n].astype(bool)
+
+        speech_idx = np.flatnonzero(raw)
+        if speech_idx.size:
+            self._hang_left = max(0, self.hangover - (n - 1 - speech_idx[-1]))
+        else:
+            self._hang_left = max(0, self._hang_left - n)
+        return mask
+
+    def __call__(self, frame):
+        """Single-frame check, for callers that pass frames one at a time."""
+        mask = self.speech_mask(frame, len(frame))
+        return bool(mask[0]) if len(mask) else False
+
+    def reset(self):
+        self._history[:] = self.initial_noise_db
+        self._hang_left = 0
+
+
+class SileroVAD:
+    # Silero scores fixed 512-sample windows at 16 kHz
+    WINDOW = 512
+
+    def __init__(self, sample_rate=16000, frame_duration=0.03, threshold=0.5):
+        """
+        Neural VAD using the Silero model bundled with faster-whisper.
+
+        Audio is scored in 512-sample windows; each frame takes the probability of
+        the most recent window that overlaps it. Leftover samples carry over between
+        calls, so it works on a live stream as well as on whole clips.
+        """
+        from faster_whisper.vad import get_vad_model
+
+        if sample_rate != 16000:
+            raise ValueError("SileroVAD requires 16 kHz audio")
+        self.model = get_vad_model()
+        self.sample_rate = sample_rate
+        self.frame_len = int(frame_duration * sample_rate)
+        self.threshold = threshold
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._last_prob = 0.0
+
+    def speech_probs(self, audio):
+        """Per-sample speech probability for `audio`, continuing from earlier calls."""
+        carried = len(self._pending)
+        x = np.concatenate([self._pending, _to_float(audio).reshape(-1)])
+        n_windows = len(x) // self.WINDOW
+        probs = np.full(len(x), self._last_prob, dtype=np.float32)
+        if n_windows:
+            window_probs = np.asarray(self.model(x[:n_windows * self.WINDOW])).reshape(-1)
+            probs[:n_windows * self.WINDOW] = np.repeat(window_probs, self.WINDOW)
+            self._last_prob = float(window_probs[-1])
+            probs[n_windows * self.WINDOW:] = self._last_prob
+        self._pending = x[n_windows * self.WINDOW:]
+        # Drop the carried-over samples, which were reported last call
+        return probs[carried:]
+
+    def speech_mask(self, audio, frame_len=None):
+        probs = self.speech_probs(audio)
+        frames = frame_signal(probs, frame_len or self.frame_len)
+        return frames.max(axis=1) >= self.threshold if len(frames) else np.zeros(0, dtype=bool)
+
+    def __call__(self, frame):
+        mask = self.speech_mask(frame, len(frame))
+        return bool(mask[0]) if len(mask) else False
+
+    def reset(self):
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._last_prob = 0.0
+
+
+VAD_BACKENDS = {
+    "energy": EnergyVAD,
+    "silero": SileroVAD,
+}
+
+
+def create_vad(name="energy", **kwargs):
+    """Build a VAD by name ('energy' or 'silero')."""
+    try:
+        backend = VAD_BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown VAD backend: {name}. Choose from {list(VAD_BACKENDS)}")
+    return backend(**kwargs)
+
+
+def speech_mask(detector, audio, frame_len):
+    """
+    Classify frames with any detector: VADs classify the whole block at once,
+    plain callables (frame -> bool) are called per frame.
+    """
+    if hasattr(detector, "speech_mask"):
+        return detector.speech_mask(audio, frame_len)
+    return np.array([bool(detector(frame)) for frame in frame_signal(audio, frame_len)], dtype=bool)
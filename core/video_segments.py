@@ -0,0 +1,199 @@
+"""
+Progressive avatar video: split the reply audio at pauses, render the pieces
+independently and publish them in order as each one finishes, so playback can
+start after the first segment instead of after the whole reply.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import scipy.io.wavfile as wav
+
+from core.vad import frame_features, frame_signal
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def find_split_points(audio, sample_rate, target_seconds=3.0, min_seconds=1.0, max_seconds=6.0,
+                      frame_duration=0.02, smooth_seconds=0.1, distance_penalty_db=3.0):
+    """
+    Pick segment boundaries at the quietest points of the audio.
+
+    For each segment, the boundary is searched between `min_seconds` and
+    `max_seconds` after its start. Frame energy is smoothed so a real pause wins
+    over a single quiet frame, and boundaries far from `target_seconds` pay
+    `distance_penalty_db` per second.
+
+    Returns:
+        List of (start, end) sample ranges covering the whole clip
+    """
+    audio = np.asarray(audio).reshape(-1)
+    frame_len = max(1, int(frame_duration * sample_rate))
+    frames = frame_signal(audio, frame_len)
+    if len(audio) <= max_seconds * sample_rate or len(frames) == 0:
+        return [(0, len(audio))]
+
+    energy_db, _ = frame_features(frames)
+    smooth = max(1, int(smooth_seconds / frame_duration))
+    energy_db = np.convolve(energy_db, np.ones(smooth) / smooth, mode="same")
+
+    min_frames = int(min_seconds / frame_duration)
+    max_frames = int(max_seconds / frame_duration)
+    target_frames = int(target_seconds / frame_duration)
+
+    ranges = []
+    start = 0
+    while len(frames) - start > max_frames:
+        window = np.arange(start + min_frames, min(start + max_frames, len(frames)))
+        score = energy_db[window] + distance_penalty_db * np.abs(window - start - target_frames) * frame_duration
+        cut = int(window[np.argmin(score)])
+        ranges.append((start * frame_len, cut * frame_len))
+        start = cut
+    ranges.append((start * frame_len, len(audio)))
+    return ranges
+
+
+class SegmentPlaylist:
+    def __init__(self, playlist_path=None):
+        """
+        Ordered queue of finished video segments, optionally mirrored to an
+        HLS-style .m3u8 playlist.
+
+        Segments may finish in any order; they are released strictly by index,
+        so iterating yields segment 0, 1, 2... as soon as each is playable.
+
+        Args:
+            playlist_path: Where to write the playlist (None = don't write one)
+        """
+        self.playlist_path = playlist_path
+        self.segments = []  # Released (index, path, duration), in order
+        self.total = None
+        self.first_segment_at = None
+        self.started_at = time.perf_counter()
+        self._pending = {}
+        self._cond = threading.Condition()
+
+    def publish(self, index, path, duration):
+        """Hand in a finished segment. `path` is None if the segment failed (it is skipped)."""
+        with self._cond:
+            self._pending[index] = (path, duration)
+            released = False
+            while len(self.segments) in self._pending:
+                i = len(self.segments)
+                path, duration = self._pending.pop(i)
+                self.segments.append((i, path, duration))
+                released = True
+                if path is not None and self.first_segment_at is None:
+                    self.first_segment_at = time.perf_counter() - self.started_at
+            if released:
+                self._write()
+                self._cond.notify_all()
+
+    def finish(self, total):
+        """Mark the playlist complete once all `total` segments are published."""
+        with self._cond:
+            self.total = total
+            self._write()
+            self._cond.notify_all()
+
+    @property
+    def complete(self):
+        return self.total is not None and len(self.segments) >= self.total
+
+    def __iter__(self):
+        """Yield (index, path, duration) in order, blocking until each is ready."""
+        i = 0
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: i < len(self.segments) or self.complete)
+                if i >= len(self.segments):
+                    return
+                segment = self.segments[i]
+            i += 1
+            if segment[1] is not None:
+                yield segment
+
+    def wait(self, timeout=None):
+        """Block until every segment is published. Returns False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self.complete, timeout=timeout)
+
+    def _write(self):
+        if not self.playlist_path:
+            return
+        playable = [(path, duration) for _, path, duration in self.segments if path is not None]
+        target = max([duration for _, duration in playable], default=1.0)
+        base = os.path.dirname(os.path.abspath(self.playlist_path))
+        lines = [
+            "#EXTM3U",
+            "#EXT-X-VERSION:3",
+            f"#EXT-X-TARGETDURATION:{int(np.ceil(target))}",
+            "#EXT-X-MEDIA-SEQUENCE:0",
+        ]
+        for path, duration in playable:
+            lines.append(f"#EXTINF:{duration:.3f},")
+            lines.append(os.path.relpath(path, base))
+        if self.complete:
+            lines.append("#EXT-X-ENDLIST")
+        # Write then rename so a player polling the playlist never reads half a file
+        tmp_path = self.playlist_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, self.playlist_path)
+
+
+def render_progressive(avatar, audio_path, output_dir, image_path=None, max_workers=None, **split_kwargs):
+    """
+    Split `audio_path` at pauses and render each piece with avatar.generate_video.
+
+    Rendering runs in the background; the returned SegmentPlaylist fills up as
+    segments finish and can be iterated right away.
+
+    Args:
+        avatar: Avatar (anything with generate_video(audio_path, image_path, output_path))
+        audio_path: Reply audio (WAV)
+        output_dir: Directory for segment audio, video and playlist.m3u8
+        image_path: Source image (None = avatar's configured image)
+        max_workers: Segments rendered at once (None = half the cores)
+        split_kwargs: Passed to find_split_points
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    sample_rate, audio = wav.read(audio_path)
+    ranges = find_split_points(audio if audio.ndim == 1 else audio[:, 0], sample_rate, **split_kwargs)
+    if max_workers is None:
+        max_workers = max(1, (os.cpu_count() or 1) // 2)
+    max_workers = min(max_workers, len(ranges))
+    logger.info(f"Rendering {len(ranges)} avatar segments with {max_workers} workers...")
+
+    playlist = SegmentPlaylist(os.path.join(output_dir, "playlist.m3u8"))
+
+    def render(index, start, end):
+        duration = (end - start) / sample_rate
+        segment_audio = os.path.join(output_dir, f"segment_{index:03d}.wav")
+        segment_video = os.path.join(output_dir, f"segment_{index:03d}.mp4")
+        try:
+            wav.write(segment_audio, sample_rate, audio[start:end])
+            path = avatar.generate_video(segment_audio, image_path, output_path=segment_video)
+        except Exception as e:
+            logger.error(f"Avatar segment {index} failed: {e}")
+            path = None
+        finally:
+            if os.path.exists(segment_audio):
+                os.remove(segment_audio)
+        playlist.publish(index, path, duration)
+
+    def run():
+        # Submitted in order, so earlier segments start first
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for index, (start, end) in enumerate(ranges):
+                executor.submit(render, index, start, end)
+        playlist.finish(len(ranges))
+        if playlist.first_segment_at is not None:
+            logger.info(f"Time to first avatar segment: {playlist.first_segment_at:.2f}s")
+
+    threading.Thread(target=run, daemon=True).start()
+    return playlist
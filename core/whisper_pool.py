@@ -0,0 +1,132 @@
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+from faster_whisper import WhisperModel
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Shared pools, keyed by (model_size, device, compute_type). _pools_lock only
+# guards the dicts; each key's own lock is held while its model loads and warms up.
+_pools = {}
+_pool_locks = {}
+_pools_lock = threading.Lock()
+
+
+def default_threads():
+    """
+    Split the machine's cores into workers: up to 4 intra-op threads per
+    transcription, and as many concurrent transcriptions as that allows.
+    Returns (cpu_threads, num_workers).
+    """
+    cores = os.cpu_count() or 1
+    cpu_threads = min(4, cores)
+    return cpu_threads, max(1, cores // cpu_threads)
+
+
+class WhisperPool:
+    def __init__(self, model_size="tiny", device="cpu", compute_type="int8", cpu_threads=0, num_workers=None):
+        """
+        One shared WhisperModel serving up to `num_workers` transcriptions at once.
+
+        faster-whisper runs concurrent transcribe() calls on separate CTranslate2
+        workers; the semaphore keeps callers from queueing more work than there are
+        workers, so extra sessions wait here instead of thrashing the CPU.
+
+        Args:
+            model_size: Whisper model size
+            device: 'cpu' or 'cuda'
+            compute_type: CTranslate2 compute type (e.g. 'int8')
+            cpu_threads: Intra-op threads per worker (0 = pick from core count)
+            num_workers: Concurrent transcriptions (None = pick from core count)
+        """
+        auto_threads, auto_workers = default_threads()
+        self.cpu_threads = cpu_threads or auto_threads
+        self.num_workers = num_workers or auto_workers
+        self.key = (model_size, device, compute_type)
+
+        logger.info(f"Loading Whisper model: {model_size} on {device} "
+                    f"({self.num_workers} workers x {self.cpu_threads} threads)...")
+        self.model = WhisperModel(
+            model_size,
+            device=device,
+            compute_type=compute_type,
+            cpu_threads=self.cpu_threads,
+            num_workers=self.num_workers,
+        )
+        self._slots = threading.BoundedSemaphore(self.num_workers)
+        self.warmed_up = False
+        logger.info("Whisper model loaded.")
+
+    @contextmanager
+    def acquire(self):
+        """Hold one worker slot for the duration of the block."""
+        self._slots.acquire()
+        try:
+            yield self.model
+        finally:
+            self._slots.release()
+
+    def transcribe(self, audio, **kwargs):
+        """
+        Run model.transcribe in a worker slot. Segments are consumed inside the
+        slot (faster-whisper decodes lazily), so this returns (list, info).
+        """
+        with self.acquire() as model:
+            segments, info = model.transcribe(audio, **kwargs)
+            return list(segments), info
+
+    def warm_up(self, seconds=1.0):
+        """
+        Run a short transcription on every worker so the first real utterance
+        doesn't pay for graph setup and allocator growth.
+        """
+        start = time.perf_counter()
+        rng = np.random.default_rng(0)
+        audio = (0.01 * rng.standard_normal(int(seconds * 16000))).astype(np.float32)
+
+        def run():
+            self.transcribe(audio, beam_size=5, language="en")
+
+        threads = [threading.Thread(target=run) for _ in range(self.num_workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.warmed_up = True
+        logger.info(f"Whisper warm-up done in {time.perf_counter() - start:.2f}s.")
+
+
+def get_pool(model_size="tiny", device="cpu", compute_type="int8", cpu_threads=0, num_workers=None, warm_up=True):
+    """
+    Return the shared pool for (model_size, device, compute_type), loading it on
+    first use. Thread settings only apply when the pool is first created.
+    Loading one model doesn't block callers of other, already loaded pools.
+    """
+    key = (model_size, device, compute_type)
+    with _pools_lock:
+        key_lock = _pool_locks.setdefault(key, threading.Lock())
+    with key_lock:
+        with _pools_lock:
+            pool = _pools.get(key)
+        if pool is None:
+            pool = WhisperPool(model_size, device, compute_type, cpu_threads, num_workers)
+            with _pools_lock:
+                _pools[key] = pool
+        elif (cpu_threads and cpu_threads != pool.cpu_threads) or (num_workers and num_workers != pool.num_workers):
+            logger.warning(f"Whisper pool {key} already loaded with {pool.num_workers} workers x "
+                           f"{pool.cpu_threads} threads; ignoring new thread settings.")
+        if warm_up and not pool.warmed_up:
+            pool.warm_up()
+    return pool
+
+
+def clear_pools():
+    """Drop all shared models (mainly for tests)."""
+    with _pools_lock:
+        _pools.clear()
+        _pool_locks.clear()
@@ -0,0 +1,60 @@
+"""
+Serve the avatar to many concurrent clients over WebSocket (see core/server.py
+for the protocol). The console app in main.py stays the single-user entry point.
+
+Usage:
+    python server.py [--port 8765] [--animate]
+"""
+import argparse
+import asyncio
+import logging
+import os
+
+from core.async_thinker import AsyncOllamaClient
+from core.listener import Listener
+from core.server import ConversationServer
+from core.speaker import Speaker
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--whisper-model", default="tiny")
+    parser.add_argument("--tts-backend", default=os.environ.get("TTS_BACKEND", "auto"))
+    parser.add_argument("--max-sessions", type=int, default=100)
+    parser.add_argument("--idle-timeout", type=float, default=300, help="Seconds before an idle session is evicted")
+    parser.add_argument("--ollama-concurrency", type=int, default=4, help="Ollama requests in flight at once")
+    parser.add_argument("--animate", action="store_true", help="Render and send avatar video per sentence")
+    args = parser.parse_args()
+
+    # Heavy models are loaded once here and shared by every session
+    listener = Listener(model_size=args.whisper_model)
+    speaker = Speaker(backend=args.tts_backend)
+    avatar = None
+    if args.animate:
+        from core.avatar import Avatar
+        avatar = Avatar()
+
+    async def run():
+        ollama_client = AsyncOllamaClient(max_concurrency=args.ollama_concurrency)
+        server = ConversationServer(
+            listener, speaker, ollama_client=ollama_client, avatar=avatar, animate=args.animate,
+            idle_timeout=args.idle_timeout, max_sessions=args.max_sessions,
+        )
+        try:
+            await server.serve(args.host, args.port)
+        finally:
+            await ollama_client.aclose()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        logger.info("Server stopped.")
+
+
+if __name__ == "__main__":
+    main()
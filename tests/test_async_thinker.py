@@ -0,0 +1,210 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from core.async_thinker import AsyncOllamaClient, AsyncThinker
+from core.thinker import OLLAMA_ERROR_REPLY
+
+
+class StubOllama:
+    """Local stand-in for Ollama's /api/chat: replies in 5-character chunks after `delay` seconds."""
+    def __init__(self, replies=("Great choice! Are you a beginner?",), delay=0.0, chunk_delay=0.0):
+        self.replies = list(replies)
+        self.delay = delay
+        self.chunk_delay = chunk_delay
+        self.requests = []
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with stub.lock:
+                    stub.requests.append(body)
+                    reply = stub.replies[min(len(stub.requests), len(stub.replies)) - 1]
+                    stub.active += 1
+                    stub.max_active = max(stub.max_active, stub.active)
+                try:
+                    time.sleep(stub.delay)
+                    if body["stream"]:
+                        self._stream(reply)
+                    else:
+                        self._send(json.dumps({"message": {"role": "assistant", "content": reply}, "done": True}))
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    with stub.lock:
+                        stub.active -= 1
+
+            def _send(self, data):
+                data = data.encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _stream(self, reply):
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                pieces = [reply[i:i + 5] for i in range(0, len(reply), 5)]
+                for piece in pieces + [None]:
+                    chunk = {"message": {"role": "assistant", "content": piece or ""}, "done": piece is None}
+                    line = (json.dumps(chunk) + "\n").encode()
+                    self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+                    self.wfile.flush()
+                    time.sleep(stub.chunk_delay)
+                self.wfile.write(b"0\r\n\r\n")
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_process_input_over_http():
+    stub = StubOllama()
+
+    async def main():
+        client = AsyncOllamaClient(stub.url)
+        thinker = AsyncThinker(client=client, fast_path=False)
+        reply = await thinker.process_input("I want to be a web developer")
+        await client.aclose()
+        return thinker, reply
+
+    try:
+        thinker, reply = run(main())
+    finally:
+        stub.close()
+    assert reply == "Great choice! Are you a beginner?"
+    assert thinker.history[-1] == {"role": "assistant", "content": reply}
+    request = stub.requests[0]
+    assert request["stream"] is False
+    assert request["keep_alive"] == thinker.keep_alive
+    assert request["options"] == thinker.options
+    assert request["messages"][0]["content"] == thinker.system_prompt
+
+
+def test_stream_retries_bad_phrase():
+    stub = StubOllama(["Ask the user about their level. Then continue.", "What is your level?"])
+
+    async def main():
+        client = AsyncOllamaClient(stub.url)
+        thinker = AsyncThinker(client=client)
+        reply = "".join([text async for text in thinker.process_input_stream("Hello")])
+        await client.aclose()
+        return thinker, reply
+
+    try:
+        thinker, reply = run(main())
+    finally:
+        stub.close()
+    assert reply == "What is your level?"
+    assert stub.requests[1]["messages"][-1]["content"].startswith("SYSTEM: You failed the rule")
+    assert [m["role"] for m in thinker.history] == ["system", "user", "assistant"]
+
+
+def test_concurrency_limit_is_shared_across_conversations():
+    stub = StubOllama(delay=0.1)
+
+    async def main():
+        client = AsyncOllamaClient(stub.url, max_concurrency=2)
+        thinkers = [AsyncThinker(client=client) for _ in range(6)]
+        replies = await asyncio.gather(*(t.process_input("Hi") for t in thinkers))
+        await client.aclose()
+        return replies
+
+    try:
+        replies = run(main())
+    finally:
+        stub.close()
+    assert replies == ["Great choice! Are you a beginner?"] * 6
+    assert stub.max_active == 2
+
+
+def test_cancel_mid_stream_records_released_text_and_frees_the_slot():
+    stub = StubOllama(["Great choice! Are you a beginner? Or do you have some experience?"], chunk_delay=0.05)
+
+    async def main():
+        client = AsyncOllamaClient(stub.url, max_concurrency=1)
+        thinker = AsyncThinker(client=client)
+        first = asyncio.Event()
+
+        async def consume():
+            async for _ in thinker.process_input_stream("Hello"):
+                first.set()
+
+        task = asyncio.create_task(consume())
+        await first.wait()
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        in_flight = client.in_flight
+        # The single slot is free again
+        reply = await thinker.process_input("Hello again")
+        await client.aclose()
+        return thinker, in_flight, reply
+
+    try:
+        thinker, in_flight, reply = run(main())
+    finally:
+        stub.close()
+    assert in_flight == 0
+    assert thinker.history[2]["content"].strip() == "Great choice!"
+    assert reply.startswith("Great choice!")
+
+
+def test_timeout_returns_error_reply():
+    stub = StubOllama(delay=1.0)
+
+    async def main():
+        client = AsyncOllamaClient(stub.url, timeout=0.2)
+        reply = await AsyncThinker(client=client).process_input("Hi")
+        await client.aclose()
+        return reply
+
+    try:
+        assert run(main()) == OLLAMA_ERROR_REPLY
+    finally:
+        stub.close()
+
+
+def test_chat_raises_timeout_error():
+    stub = StubOllama(delay=1.0)
+
+    async def main():
+        client = AsyncOllamaClient(stub.url)
+        try:
+            await client.chat("model", [], timeout=0.2)
+        finally:
+            await client.aclose()
+
+    try:
+        # asyncio.TimeoutError is only an alias of TimeoutError from Python 3.11
+        with pytest.raises(asyncio.TimeoutError):
+            run(main())
+    finally:
+        stub.close()
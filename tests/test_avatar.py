@@ -0,0 +1,155 @@
+import os
+import threading
+import time
+
+import pytest
+
+from core.avatar_worker import AvatarWorker, AvatarWorkerPool
+from core.preprocess_cache import PreprocessCache
+from core.render_queue import RenderCancelled
+
+
+def test_worker_renders_health_checks_and_respawns(tmp_path):
+    worker = AvatarWorker(engine="fake", startup_timeout=30, job_timeout=30)
+    try:
+        worker.start()
+        assert worker.ping()
+
+        first = worker.render("a.wav", "face.jpg", str(tmp_path / "first.mp4"))
+        assert os.path.exists(first)
+        pid = worker.proc.pid
+
+        # Simulate a crash between turns: the next job respawns the worker
+        worker.proc.kill()
+        worker.proc.wait()
+        second = worker.render("a.wav", "face.jpg", str(tmp_path / "second.mp4"))
+        assert os.path.exists(second)
+        assert worker.proc.pid != pid
+        # The successful render resets the crash count
+        assert worker.restarts == 0
+    finally:
+        worker.stop()
+    assert not worker.alive
+
+
+def test_only_consecutive_crashes_exhaust_the_restart_limit(tmp_path):
+    worker = AvatarWorker(engine="fake", startup_timeout=30, job_timeout=30, max_restarts=1)
+    try:
+        worker.start()
+        for i in range(3):
+            worker.proc.kill()
+            worker.proc.wait()
+            assert os.path.exists(worker.render("a.wav", "face.jpg", str(tmp_path / f"{i}.mp4")))
+    finally:
+        worker.stop()
+
+
+def test_idle_worker_is_health_checked_before_rendering(tmp_path, monkeypatch):
+    worker = AvatarWorker(engine="fake", startup_timeout=30, job_timeout=30, idle_ping_after=0)
+    try:
+        worker.start()
+        worker.render("a.wav", "face.jpg", str(tmp_path / "first.mp4"))
+        pid = worker.proc.pid
+
+        # A hung worker stays alive but stops answering pings
+        monkeypatch.setattr(worker, "ping", lambda timeout=5: False)
+        worker.render("a.wav", "face.jpg", str(tmp_path / "second.mp4"))
+        assert worker.proc.pid != pid
+    finally:
+        worker.stop()
+
+
+def test_ping_does_not_wait_behind_a_render(tmp_path):
+    worker = AvatarWorker(engine="fake", startup_timeout=30, job_timeout=30)
+    try:
+        worker.start()
+        assert worker.ping()
+        job = {"cmd": "render", "output_path": str(tmp_path / "slow.mp4"), "delay": 2.0}
+        render = threading.Thread(target=worker._request, args=(job, 30))
+        render.start()
+        time.sleep(0.2)
+
+        start = time.perf_counter()
+        assert worker.ping(timeout=1)
+        assert time.perf_counter() - start < 0.5
+        render.join()
+    finally:
+        worker.stop()
+
+
+def test_cancel_kills_the_busy_worker_and_respawns_it(tmp_path):
+    worker = AvatarWorker(engine="fake", startup_timeout=30, job_timeout=30)
+    try:
+        worker.start()
+        assert worker.ping()
+        pid = worker.proc.pid
+        cancel = threading.Event()
+        threading.Timer(0.2, cancel.set).start()
+
+        job = {"cmd": "render", "output_path": str(tmp_path / "slow.mp4"), "delay": 10.0}
+        start = time.perf_counter()
+        with pytest.raises(RenderCancelled):
+            worker._request(job, 30, cancel)
+        assert time.perf_counter() - start < 2
+        assert worker.proc.pid != pid and worker.restarts == 0
+        assert worker.ping(timeout=30)
+    finally:
+        worker.stop()
+
+
+def test_pool_renders_on_separate_workers(monkeypatch):
+    used = []
+
+    def slow_render(self, audio_path, image_path, output_path, **kwargs):
+        used.append(self)
+        time.sleep(0.3)
+        return output_path
+
+    monkeypatch.setattr(AvatarWorker, "render", slow_render)
+    pool = AvatarWorkerPool(2, engine="fake")
+    start = time.perf_counter()
+    threads = [threading.Thread(target=pool.render, args=("a.wav", "face.jpg", f"{i}.mp4")) for i in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert time.perf_counter() - start < 0.5  # Both ran at once
+    assert set(used) == set(pool.workers)
+
+
+def _fake_extract(calls):
+    def build(work_dir):
+        calls.append(work_dir)
+        frame_dir = os.path.join(work_dir, "first_frame_dir")
+        os.makedirs(frame_dir)
+        coeff, crop = os.path.join(frame_dir, "face.mat"), os.path.join(frame_dir, "face.png")
+        for path in (coeff, crop):
+            with open(path, "w") as f:
+                f.write("x")
+        return coeff, crop, ((256, 256), (0, 0, 256, 256), (1, 2, 3, 4))
+    return build
+
+
+def test_preprocess_cache_reuses_and_invalidates(tmp_path):
+    image = tmp_path / "face.jpg"
+    image.write_bytes(b"image-v1")
+    cache = PreprocessCache(str(tmp_path / "cache"))
+    calls = []
+
+    first = cache.get_or_create(str(image), "crop", True, 256, _fake_extract(calls))
+    again = cache.get_or_create(str(image), "crop", True, 256, _fake_extract(calls))
+    assert first == again
+    assert os.path.exists(first[0]) and first[2][0] == (256, 256)
+    assert (cache.hits, cache.misses, len(calls)) == (1, 1, 1)
+
+    # A config change or an edited image is a miss
+    cache.get_or_create(str(image), "full", True, 256, _fake_extract(calls))
+    image.write_bytes(b"image-v2")
+    cache.get_or_create(str(image), "crop", True, 256, _fake_extract(calls))
+    assert cache.misses == 3
+
+    # Entries survive a new process (fresh cache object on the same directory)
+    reopened = PreprocessCache(str(tmp_path / "cache"))
+    reopened.get_or_create(str(image), "crop", True, 256, _fake_extract(calls))
+    assert reopened.hits == 1
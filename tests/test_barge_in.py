@@ -0,0 +1,78 @@
+import threading
+
+import numpy as np
+
+from core.barge_in import BargeInMonitor
+from core.capture import AudioCapture, ArraySource
+
+SR = 16000
+
+
+def tone(seconds, amplitude, freq=220):
+    t = np.arange(int(seconds * SR)) / SR
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype(np.int16)
+
+
+class HeldSource(ArraySource):
+    """ArraySource that only starts feeding audio once `release` is set."""
+    def __init__(self, audio, sample_rate):
+        super().__init__(audio, sample_rate)
+        self.release = threading.Event()
+
+    def start(self, on_audio, on_end=None):
+        def feed(samples):
+            self.release.wait()
+            on_audio(samples)
+        super().start(feed, on_end)
+
+
+def run_monitor(audio, playback_start=None):
+    source = HeldSource(audio, SR)
+    capture = AudioCapture(sample_rate=SR, source=source)
+    fired = threading.Event()
+    monitor = BargeInMonitor(capture)
+    with capture:
+        monitor.start(fired.set, start=0)
+        if playback_start is not None:
+            monitor.playback_started(playback_start)
+        source.release.set()
+        fired.wait(timeout=2)
+        monitor.stop()
+    return monitor
+
+
+def test_steady_echo_does_not_trigger():
+    # The avatar's own voice leaking into the mic at a constant level
+    monitor = run_monitor(tone(3.0, 2000))
+    assert not monitor.triggered
+
+
+def test_user_talking_over_echo_triggers_at_onset():
+    audio = tone(3.0, 1000)
+    audio[int(2.0 * SR):] = tone(1.0, 16000, freq=300)
+    monitor = run_monitor(audio)
+
+    assert monitor.triggered
+    # Onset within a couple of frames of where the louder voice starts
+    assert abs(monitor.onset / SR - 2.0) < 0.1
+
+
+def noise(seconds, amplitude, seed=0):
+    rng = np.random.default_rng(seed)
+    return (amplitude * rng.standard_normal(int(seconds * SR))).astype(np.int16)
+
+
+def test_echo_starting_after_quiet_thinking_does_not_trigger():
+    # Room noise while the Thinker works, then the avatar's voice through the speakers
+    audio = np.concatenate([noise(2.5, 30), tone(3.0, 2000)])
+    monitor = run_monitor(audio, playback_start=int(2.5 * SR))
+    assert not monitor.triggered
+
+
+def test_user_talking_over_late_echo_triggers():
+    audio = np.concatenate([noise(2.5, 30), tone(3.0, 1000)])
+    audio[int(4.0 * SR):] = tone(1.5, 16000, freq=300)
+    monitor = run_monitor(audio, playback_start=int(2.5 * SR))
+
+    assert monitor.triggered
+    assert abs(monitor.onset / SR - 4.0) < 0.1
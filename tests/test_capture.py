@@ -0,0 +1,46 @@
+import numpy as np
+
+from core.capture import AudioCapture, ArraySource, RingBuffer
+
+SR = 16000
+
+
+def tone(seconds, amplitude=8000):
+    t = np.arange(int(seconds * SR)) / SR
+    return (amplitude * np.sin(2 * np.pi * 220 * t)).astype(np.int16)
+
+
+def silence(seconds):
+    return np.zeros(int(seconds * SR), dtype=np.int16)
+
+
+def test_ring_buffer_wraps_and_reads_views():
+    ring = RingBuffer(10)
+    ring.write(np.arange(8, dtype=np.int16))
+    view = ring.read(2, 6)
+    assert np.shares_memory(view, ring.data)
+    ring.write(np.arange(8, 14, dtype=np.int16))
+    assert ring.oldest == 4
+    np.testing.assert_array_equal(ring.read(6, 14), np.arange(6, 14))
+
+
+def test_record_utterance_from_synthetic_source():
+    audio = np.concatenate([silence(1.0), tone(1.0), silence(2.0)])
+    capture = AudioCapture(sample_rate=SR, source=ArraySource(audio, SR))
+
+    with capture:
+        utterance, rate = capture.record_utterance(max_duration=5, silence_duration=0.5, pre_roll=0.3, start=0)
+
+    assert rate == SR
+    # pre-roll + speech + trailing silence, within a frame or two
+    assert abs(len(utterance) / SR - (0.3 + 1.0 + 0.5)) < 0.1
+    # Onset is not clipped: the utterance starts in the pre-roll silence
+    assert not utterance[:int(0.2 * SR)].any()
+    assert utterance[int(0.35 * SR):int(1.2 * SR)].any()
+
+
+def test_record_utterance_stops_when_source_ends():
+    capture = AudioCapture(sample_rate=SR, source=ArraySource(silence(0.5), SR))
+    with capture:
+        utterance, _ = capture.record_utterance(max_duration=5, start=0)
+    assert len(utterance) <= int(0.5 * SR)
@@ -0,0 +1,49 @@
+from core.context import ConversationContext, message_tokens
+
+SYSTEM = {"role": "system", "content": "You are a counselor."}
+
+
+def exchange(i, words=5):
+    return [
+        {"role": "user", "content": f"user message {i} " + "word " * words},
+        {"role": "assistant", "content": f"reply {i}. " + "word " * words},
+    ]
+
+
+def test_compact_keeps_recent_exchanges_and_summarizes_the_rest():
+    context = ConversationContext(keep_exchanges=2)
+    messages = [m for i in range(5) for m in exchange(i)]
+
+    kept = context.compact(SYSTEM, messages)
+
+    assert kept == messages[-4:]
+    summary = context.summary["content"]
+    assert "user message 0" in summary and "user message 2" in summary
+    assert "user message 3" not in summary
+    assert context.folded == 6
+
+
+def test_compact_respects_the_token_budget():
+    context = ConversationContext(max_tokens=400, keep_exchanges=10, summary_tokens=60, reply_tokens=100)
+    messages = [m for i in range(10) for m in exchange(i, words=40)]
+
+    kept = context.compact(SYSTEM, messages)
+    sent = context.build(SYSTEM, kept)
+
+    assert sum(message_tokens(m) for m in sent) <= 300
+    assert kept[-1] == messages[-1]
+    # The summary keeps its newest lines within its own budget
+    assert message_tokens(context.summary) <= 60 + 40
+
+
+def test_build_always_sends_pending_retry_messages():
+    context = ConversationContext(max_tokens=200, reply_tokens=0)
+    messages = [m for i in range(3) for m in exchange(i, words=40)]
+    pending = [{"role": "assistant", "content": "bad"}, {"role": "system", "content": "SYSTEM: fix it"}]
+
+    sent = context.build(SYSTEM, messages, pending)
+
+    assert sent[0] == SYSTEM
+    assert sent[-2:] == pending
+    # Older exchanges were trimmed from this request only
+    assert sent[1]["content"].startswith("user message 2")
@@ -0,0 +1,46 @@
+from core.extraction import InfoExtractor
+
+extract = InfoExtractor().extract
+
+
+def test_word_boundaries():
+    assert extract("I know JavaScript") == {"skills": "Javascript"}
+    # "know" contains "no", but it isn't a "no skills" answer
+    assert extract("I know Python") == {"skills": "Python"}
+    assert extract("I use GitHub and know nothing else") == {"skills": "none"}
+
+
+def test_negation_lasts_until_the_clause_ends():
+    assert extract("no python but some html and css") == {"skills": "HTML, CSS"}
+    assert extract("I don't know Java. I do know SQL!") == {"skills": "SQL"}
+    assert extract("I have never used python or react") == {"skills": "none"}
+    assert extract("I'm not a beginner, I'm intermediate")["level"] == "Intermediate"
+
+
+def test_careers_levels_and_mishearings():
+    assert extract("I want to be a detached scientist") == {
+        "career_path": "Data Scientist", "goal": "Learn Data Science"}
+    assert extract("I'm a total novice who wants web development")["career_path"] == "Web Developer"
+    assert extract("I'm a novice who wants web development")["level"] == "Beginner"
+    assert extract("I don't want data science, I want to be an AI engineer")["career_path"] == "AI Engineer"
+    assert extract("Hello there") == {}
+
+
+def test_table_is_extensible():
+    skills = {"Rust": ["rust", "rust lang"]}
+    assert InfoExtractor(skills=skills).extract("I write Rust  lang daily") == {"skills": "Rust"}
+
+
+def test_negated_lists_continue_across_commas():
+    assert extract("no python, java or sql, but I know git") == {"skills": "GIT"}
+
+
+def test_negated_skill_words_mean_no_skills():
+    assert extract("I don't have any skills") == {"skills": "none"}
+    assert extract("I don't know any programming") == {"skills": "none"}
+    assert extract("I have never written code") == {"skills": "none"}
+    assert extract("no coding experience but I know html") == {"skills": "HTML"}
+    # A bare negation or a positive mention says nothing about skills
+    assert extract("I don't know") == {}
+    assert extract("not sure") == {}
+    assert extract("I know some programming") == {}
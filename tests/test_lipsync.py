@@ -0,0 +1,64 @@
+import threading
+import time
+
+import cv2
+import numpy as np
+import pytest
+import scipy.io.wavfile as wav
+
+from core.lipsync import AI, FV, REST, LipSyncRenderer, viseme_timeline
+from core.render_queue import RenderCancelled
+
+SR = 16000
+
+
+def test_timeline_tracks_silence_vowels_and_hiss():
+    rng = np.random.default_rng(0)
+    t = np.arange(SR) / SR
+    vowel = 0.4 * np.sin(2 * np.pi * 1000 * t) + 0.2 * np.sin(2 * np.pi * 1500 * t)
+    hiss = 0.2 * rng.standard_normal(SR)
+    audio = (np.concatenate([np.zeros(SR), vowel, hiss]) * 32767 * 0.5).astype(np.int16)
+
+    visemes, openness = viseme_timeline(audio, SR, fps=25)
+
+    assert len(visemes) == len(openness) == 75
+    assert (visemes[5:20] == REST).all() and (openness[5:20] == 0).all()
+    assert (visemes[30:45] == AI).all() and openness[30:45].min() > 0.5
+    assert (visemes[55:70] == FV).all()
+
+
+def test_renders_faster_than_real_time(tmp_path):
+    image = np.full((640, 480, 3), 180, dtype=np.uint8)
+    cv2.circle(image, (240, 300), 150, (150, 170, 210), -1)
+    image_path = str(tmp_path / "face.png")
+    cv2.imwrite(image_path, image)
+
+    seconds = 4
+    t = np.arange(seconds * SR) / SR
+    speech = 0.3 * np.sin(2 * np.pi * 500 * t) * (np.sin(2 * np.pi * 2 * t) > 0)
+    audio_path = str(tmp_path / "reply.wav")
+    wav.write(audio_path, SR, (speech * 32767).astype(np.int16))
+
+    renderer = LipSyncRenderer(image_path, size=480, fps=25)
+    start = time.perf_counter()
+    output = renderer.render(audio_path, str(tmp_path / "out.mp4"))
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < seconds
+    video = cv2.VideoCapture(output)
+    assert int(video.get(cv2.CAP_PROP_FRAME_COUNT)) == seconds * 25
+    assert int(video.get(cv2.CAP_PROP_FRAME_HEIGHT)) == 480
+
+
+def test_cancelled_render_stops_and_leaves_no_output(tmp_path):
+    image_path = str(tmp_path / "face.png")
+    cv2.imwrite(image_path, np.full((480, 480, 3), 180, dtype=np.uint8))
+    audio_path = str(tmp_path / "reply.wav")
+    wav.write(audio_path, SR, np.zeros(2 * SR, dtype=np.int16))
+
+    cancel = threading.Event()
+    cancel.set()
+    renderer = LipSyncRenderer(image_path, size=480, fps=25, mouth=((240, 300), 120))
+    with pytest.raises(RenderCancelled):
+        renderer.render(audio_path, str(tmp_path / "out.mp4"), cancel=cancel)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["face.png", "reply.wav"]
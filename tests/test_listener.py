@@ -1,9 +1,16 @@
 import sys
 import os
+import time
+from types import SimpleNamespace
 
 # Project root added via pytest.ini
 
-from core.listener import Listener
+import numpy as np
+
+import core.whisper_pool as whisper_pool
+from core.capture import AudioCapture, ArraySource
+from core.listener import Listener, StreamingTranscriber, pcm16_to_float32
+
 
 def test_listener():
     print("Initializing Listener...")
@@ -20,5 +27,116 @@ def test_listener():
     else:
         print("⚠️ Test Warning: No text captured (maybe silence?).")
 
+
+def test_pcm16_to_float32():
+    recording = np.array([[0], [16384], [-32768]], dtype=np.int16)  # sd.rec shape
+    audio = pcm16_to_float32(recording)
+    assert audio.dtype == np.float32
+    assert audio.shape == (3,)
+    np.testing.assert_allclose(audio, [0.0, 0.5, -1.0])
+
+
+class ScriptedListener:
+    """Stands in for the Whisper model: 'hears' the words spoken so far."""
+    def __init__(self, words, words_per_second=3.0):
+        self.words = words
+        self.words_per_second = words_per_second
+        self.decoded_seconds = []
+
+    def transcribe_words(self, audio, initial_prompt=None, beam_size=5):
+        seconds = len(audio) / 16000
+        self.decoded_seconds.append(seconds)
+        # Drop words already committed (they are in the prompt)
+        skip = len(initial_prompt.split()) if initial_prompt else 0
+        heard = int(seconds * self.words_per_second)
+        return [(w, (i + 1) / self.words_per_second) for i, w in enumerate(self.words[skip:skip + heard])]
+
+
+def test_streaming_transcriber_commits_while_speaking():
+    sr = 16000
+    t = np.arange(3 * sr) / sr
+    speech = (8000 * np.sin(2 * np.pi * 220 * t)).astype(np.int16)
+    audio = np.concatenate([speech, np.zeros(sr, dtype=np.int16)])
+    words = "i want to become a data scientist one day soon".split()
+
+    partials = []
+    capture = AudioCapture(sample_rate=sr, source=ArraySource(audio, sr, realtime=True))
+    fake = ScriptedListener(words)
+    with capture:
+        text = StreamingTranscriber(fake, capture, step=0.25, on_partial=partials.append).transcribe_utterance(
+            start=0, max_duration=5, silence_duration=0.5)
+
+    assert text == " ".join(words)
+    # Stable partials were emitted before the end, and the final pass only saw the tail
+    assert partials and len(partials[0].split()) < len(words)
+    assert fake.decoded_seconds[-1] < 3.0
+
+
+class LevelListener:
+    """
+    Stands in for the Whisper model: each stretch of constant level in the
+    audio is one word named after the level. The first `stall` decodes hear
+    nothing they agree on, so nothing is committed for a while.
+    """
+    def __init__(self, stall):
+        self.stall = stall
+        self.calls = 0
+
+    def transcribe_words(self, audio, initial_prompt=None, beam_size=5):
+        self.calls += 1
+        if self.calls <= self.stall:
+            return [(f"uh{self.calls}", 0.1)]
+        levels = np.round(audio * 32768).astype(int)
+        edges = np.flatnonzero(np.diff(levels)) + 1
+        words = []
+        for start, end in zip(np.r_[0, edges], np.r_[edges, len(levels)]):
+            if levels[start] and end < len(levels):  # Complete, non-silent stretches only
+                words.append((f"w{levels[start]}", end / 16000))
+        return words
+
+
+def test_streaming_transcriber_survives_ring_overrun():
+    sr = 16000
+    # 12 words of 0.25 s each, then silence; the ring only holds 1 s
+    speech = np.repeat(np.arange(1, 13) * 1000, sr // 4).astype(np.int16)
+    audio = np.concatenate([speech, np.zeros(sr, dtype=np.int16)])
+    capture = AudioCapture(sample_rate=sr, buffer_seconds=1, source=ArraySource(audio, sr, realtime=True))
+    fake = LevelListener(stall=8)  # Nothing committed for the first 2 s
+    with capture:
+        text = StreamingTranscriber(fake, capture, step=0.25).transcribe_utterance(
+            start=0, max_duration=5, silence_duration=0.5)
+
+    words = text.split()
+    # Early words are lost to the overrun, but the rest come once each, in order
+    expected = [f"w{i * 1000}" for i in range(1, 13)]
+    assert words == expected[len(expected) - len(words):]
+    assert len(words) >= 5
+
+
+def test_transcribe_many_keeps_order_and_filters(monkeypatch):
+    class FakeModel:
+        def __init__(self, model_size, **kwargs):
+            pass
+
+        def transcribe(self, audio, **kwargs):
+            seconds = len(audio) / 16000
+            time.sleep(0.2 / seconds)  # Shorter clips finish later
+            segments = [
+                SimpleNamespace(text=f"clip {seconds:.0f}s", no_speech_prob=0.1, avg_logprob=-0.3),
+                SimpleNamespace(text="hallucination", no_speech_prob=0.9, avg_logprob=-0.3),
+                SimpleNamespace(text="mumble", no_speech_prob=0.1, avg_logprob=-2.0),
+            ]
+            return iter(segments), SimpleNamespace(duration=seconds)
+
+    monkeypatch.setattr(whisper_pool, "WhisperModel", FakeModel)
+    whisper_pool.clear_pools()
+    listener = Listener(model_size="fake", num_workers=3, warm_up=False)
+
+    clips = [(np.zeros(n * 16000, dtype=np.int16), 16000) for n in (1, 2, 3, 4)]
+    assert list(listener.transcribe_many(clips)) == ["clip 1s", "clip 2s", "clip 3s", "clip 4s"]
+    assert listener.last_batch_stats["audio_seconds"] == 10
+    whisper_pool.clear_pools()
+
+
 if __name__ == "__main__":
     test_listener()
@@ -0,0 +1,52 @@
+import random
+
+from core.lms_interface import LMSInterface
+
+
+def scan(courses, level, skills, career_path):
+    """The linear scan recommend_courses used before the indexes."""
+    recommendations = []
+    for course in courses:
+        score = 0
+        if course["level"].lower() == level.lower():
+            score += 3
+        if any(c.lower() in career_path.lower() for c in course["career_path"]):
+            score += 5
+        if skills and course["skills"]:
+            user_skills = [s.strip().lower() for s in skills.split(',')]
+            if any(s in [c.lower() for c in course["skills"]] for s in user_skills):
+                score += 2
+        if score > 0:
+            recommendations.append({"course": course, "score": score})
+    recommendations.sort(key=lambda x: x["score"], reverse=True)
+    return [r["course"] for r in recommendations[:3]]
+
+
+def test_mock_catalog_recommendations():
+    recs = LMSInterface().recommend_courses("Learn AI", "Beginner", "Python", "Data Scientist")
+    assert [c["id"] for c in recs] == ["py-101", "ds-201", "ml-301"]
+
+
+def test_matches_linear_scan():
+    rng = random.Random(0)
+    careers = ["Web Developer", "Developer", "Data Scientist", "AI Engineer", "Any", "Sales", "Manager"]
+    skills = ["Python", "python", "HTML", "SQL", "Git", "React", "Math"]
+    courses = [{
+        "id": str(i),
+        "level": rng.choice(["Beginner", "Intermediate", "advanced"]),
+        "skills": rng.sample(skills, rng.randint(0, 3)),
+        "career_path": rng.sample(careers, rng.randint(1, 2)),
+    } for i in range(300)]
+    lms = LMSInterface(courses=courses)
+
+    for _ in range(300):
+        level = rng.choice(["Beginner", "intermediate", "Advanced", ""])
+        user_skills = ", ".join(rng.sample(skills + ["none"], rng.randint(0, 3)))
+        # Career paths are substring matches: "Web Developer" also matches "Developer"
+        career = rng.choice(careers + ["Senior Web Developer, Sales", "company lead", ""])
+        assert lms.recommend_courses(None, level, user_skills, career) == scan(courses, level, user_skills, career)
+
+
+def test_no_match_returns_nothing():
+    courses = [{"id": "a", "level": "Beginner", "skills": ["Python"], "career_path": ["Data Scientist"]}]
+    assert LMSInterface(courses=courses).recommend_courses(None, "Advanced", "Go", "Chef") == []
@@ -0,0 +1,156 @@
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from core.avatar import Avatar
+from core.pipeline import TurnPipeline, clean_response
+from core.text_utils import SentenceSplitter
+
+
+class FakeThinker:
+    def __init__(self, reply):
+        self.reply = reply
+
+    def process_input(self, user_text):
+        return self.reply
+
+
+class FakeSpeaker:
+    def __init__(self, synth_delay=0.0):
+        self.synth_delay = synth_delay
+        self.synthesized = []
+        self.played = []
+
+    def speak_to_file(self, text, output_path=None):
+        time.sleep(self.synth_delay)
+        self.synthesized.append(text)
+        tf = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
+        tf.close()
+        return tf.name
+
+    def play(self, audio_path):
+        self.played.append(audio_path)
+
+
+def test_sentence_splitter():
+    splitter = SentenceSplitter()
+    assert splitter.feed("Hello there. How") == ["Hello there."]
+    assert splitter.feed(" are you? I'm") == ["How are you?"]
+    assert splitter.flush() == ["I'm"]
+
+
+def test_clean_response_strips_trailing_url():
+    text, url = clean_response("This course is great. I found a great course for you!\nhttps://example.com/c")
+    assert url == "https://example.com/c"
+    assert "https://" not in text
+
+
+def test_pipeline_plays_each_sentence_and_reports_first_audio():
+    reply = "Great choice! Are you a beginner? Do you know any Python?"
+    speaker = FakeSpeaker(synth_delay=0.05)
+    spoken = []
+    pipeline = TurnPipeline(FakeThinker(reply), speaker, on_sentence=spoken.append)
+
+    turn = pipeline.run_turn("I want to be a web developer")
+
+    assert speaker.synthesized == ["Great choice!", "Are you a beginner?", "Do you know any Python?"]
+    assert spoken == speaker.synthesized
+    assert len(speaker.played) == 3
+    # Temp audio is removed after playback
+    assert not any(os.path.exists(p) for p in speaker.played)
+    # First sentence plays before the whole reply has been synthesized
+    assert turn.metrics.time_to_first_audio < turn.metrics.marks["done"]
+
+
+class FakeStreamingThinker(FakeThinker):
+    def process_input_stream(self, user_text):
+        for i in range(0, len(self.reply), 7):
+            yield self.reply[i:i + 7]
+
+
+def test_pipeline_streams_sentences_and_pulls_url():
+    reply = "This course is perfect for you. I found a great course for you!\nhttps://example.com/course"
+    speaker = FakeSpeaker()
+    pipeline = TurnPipeline(FakeStreamingThinker(reply), speaker)
+
+    turn = pipeline.run_turn("Recommend something")
+
+    assert speaker.synthesized == ["This course is perfect for you.", "I found a great course for you!"]
+    assert turn.url == "https://example.com/course"
+
+
+def test_pipeline_streams_through_speaker_stream():
+    class StreamingSpeaker(FakeSpeaker):
+        def stream(self, text_iter, lookahead=2, sample_rate=None, on_sentence=None, on_audio=None, cancel=None):
+            for chunk in text_iter:
+                sentence = chunk.strip()
+                self.synthesized.append(sentence)
+                on_audio(sentence, np.zeros(160, dtype=np.int16), 16000)
+                on_sentence(sentence)
+
+    speaker = StreamingSpeaker()
+    turn = TurnPipeline(FakeThinker("Great choice! Are you a beginner?"), speaker).run_turn("hi")
+
+    assert speaker.synthesized == ["Great choice!", "Are you a beginner?"]
+    assert speaker.played == []  # Nothing went through the file path
+    assert turn.metrics.time_to_first_audio is not None
+
+
+def test_barge_in_cancels_generation_and_playback():
+    class SlowThinker:
+        closed = False
+
+        def process_input_stream(self, user_text):
+            try:
+                for i in range(100):
+                    time.sleep(0.02)
+                    yield f"Sentence number {i}. "
+            except GeneratorExit:
+                SlowThinker.closed = True
+                raise
+
+    class CancellableSpeaker(FakeSpeaker):
+        def stream(self, text_iter, lookahead=2, sample_rate=None, on_sentence=None, on_audio=None, cancel=None):
+            for chunk in text_iter:
+                if cancel.is_set():
+                    return
+                self.synthesized.append(chunk.strip())
+                on_sentence(chunk)
+                time.sleep(0.01)  # "Playing"
+
+    class FakeMonitor:
+        onset = 12345
+        playback_starts = 0
+
+        def playback_started(self):
+            self.playback_starts += 1
+
+        def start(self, on_barge_in):
+            self.timer = threading.Timer(0.15, on_barge_in)
+            self.timer.start()
+
+        def stop(self):
+            self.timer.cancel()
+
+    speaker = CancellableSpeaker()
+    monitor = FakeMonitor()
+    pipeline = TurnPipeline(SlowThinker(), speaker, barge_in=monitor)
+    turn = pipeline.run_turn("hi")
+
+    assert turn.interrupted
+    assert monitor.playback_starts == 1  # Echo level re-learned once, at first audio
+    assert turn.barge_in_position == 12345
+    assert SlowThinker.closed
+    assert 0 < len(speaker.synthesized) < 100
+    assert turn.metrics.cancel_latency < 0.1
+
+
+def test_interrupt_does_not_create_the_render_queue(tmp_path):
+    avatar = Avatar(sadtalker_path=str(tmp_path / "missing"), config_path=str(tmp_path / "missing.yaml"))
+    pipeline = TurnPipeline(FakeThinker("Hi."), FakeSpeaker(), avatar=avatar, animate=True)
+    pipeline.interrupt()
+    assert avatar._render_queue is None
+    assert avatar.cancel_session(id(pipeline)) == 0
@@ -0,0 +1,117 @@
+import os
+import threading
+import time
+
+import pytest
+
+from core.render_queue import CANCELLED, DONE, RenderCancelled, RenderQueue, RenderQueueFull
+
+
+class GatedAvatar:
+    """Records render order; each render waits until the gate opens."""
+    def __init__(self):
+        self.gate = threading.Event()
+        self.rendered = []
+
+    def generate_video(self, audio_path, image_path=None, output_path=None, cancel=None):
+        self.gate.wait(5)
+        self.rendered.append(audio_path)
+        with open(output_path, "w") as f:
+            f.write(audio_path)
+        return output_path
+
+
+def test_jobs_render_into_their_own_dirs_by_priority(tmp_path):
+    avatar = GatedAvatar()
+    renders = RenderQueue(avatar, workers=1, jobs_dir=str(tmp_path))
+    try:
+        blocker = renders.submit("blocker.wav")
+        time.sleep(0.05)  # Let the worker pick up the blocker
+        low = renders.submit("low.wav", priority=5)
+        high = renders.submit("high.wav", priority=0)
+        avatar.gate.set()
+
+        assert open(low.wait(5)).read() == "low.wav"
+        assert open(high.wait(5)).read() == "high.wav"
+        assert avatar.rendered == ["blocker.wav", "high.wav", "low.wav"]
+        assert len({blocker.job_dir, low.job_dir, high.job_dir}) == 3
+    finally:
+        renders.close()
+
+
+def test_queue_is_bounded_and_sessions_cancel(tmp_path):
+    avatar = GatedAvatar()
+    renders = RenderQueue(avatar, workers=1, max_pending=2, jobs_dir=str(tmp_path))
+    try:
+        running = renders.submit("a.wav", session="alice")
+        time.sleep(0.05)
+        queued = renders.submit("b.wav", session="alice")
+        other = renders.submit("c.wav", session="bob")
+        with pytest.raises(RenderQueueFull):
+            renders.submit("d.wav")
+
+        assert renders.cancel_session("alice") == 2
+        assert queued.wait(1) is None and queued.state == CANCELLED
+        avatar.gate.set()
+
+        assert other.wait(5) and other.state == DONE
+        assert running.wait(5) is None
+        time.sleep(0.05)
+        assert "b.wav" not in avatar.rendered
+        assert not os.path.exists(running.job_dir) and not os.path.exists(queued.job_dir)
+    finally:
+        renders.close()
+
+
+class SlowAvatar:
+    """Renders for up to 5 s, stopping early when cancelled."""
+    def __init__(self):
+        self.started = threading.Event()
+        self.stopped_early = False
+
+    def generate_video(self, audio_path, image_path=None, output_path=None, cancel=None):
+        self.started.set()
+        if cancel.wait(5):
+            self.stopped_early = True
+            raise RenderCancelled("cancelled")
+        with open(output_path, "w") as f:
+            f.write(audio_path)
+        return output_path
+
+
+def test_cancelling_a_running_job_stops_the_render(tmp_path):
+    avatar = SlowAvatar()
+    renders = RenderQueue(avatar, workers=1, jobs_dir=str(tmp_path))
+    try:
+        job = renders.submit("a.wav")
+        assert avatar.started.wait(5)
+        job.cancel()
+        # The worker is free again long before the 5 s render would have ended
+        follow_up = renders.submit("b.wav")
+        avatar.started.clear()
+        assert avatar.started.wait(1)
+        assert avatar.stopped_early and job.state == CANCELLED
+        follow_up.cancel()
+    finally:
+        renders.close()
+
+
+def test_cleanup_enforces_retention(tmp_path):
+    avatar = GatedAvatar()
+    avatar.gate.set()
+    stale = tmp_path / "leftover"
+    stale.mkdir()
+    os.utime(stale, (0, 0))
+
+    renders = RenderQueue(avatar, workers=1, jobs_dir=str(tmp_path), keep_jobs=1)
+    try:
+        assert not stale.exists()
+        first = renders.submit("a.wav")
+        first.wait(5)
+        second = renders.submit("b.wav")
+        second.wait(5)
+        renders.cleanup()
+        assert not os.path.exists(first.job_dir)
+        assert os.path.exists(second.output_path)
+    finally:
+        renders.close()
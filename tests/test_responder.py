@@ -0,0 +1,43 @@
+from core.responder import TemplateResponder, QUESTIONS
+
+
+def info(**fields):
+    base = {"goal": None, "level": None, "skills": None, "career_path": None}
+    base.update(fields)
+    return base
+
+
+def test_acknowledges_and_asks_next_missing_field():
+    responder = TemplateResponder()
+    collected = info(goal="Learn Data Science", career_path="Data Scientist")
+    reply = responder.respond(collected, ["goal", "career_path"], "I'd like to be a data scientist")
+    assert reply == f"Data Scientist is an exciting career choice! {QUESTIONS['level']}"
+
+
+def test_no_skills_gets_a_friendly_acknowledgement():
+    collected = info(skills="none", level="Beginner")
+    reply = TemplateResponder().respond(collected, ["skills", "level"], "nothing yet")
+    assert reply.startswith("No problem")
+    assert reply.endswith(QUESTIONS["career_path"])
+
+
+def test_leaves_open_ended_turns_to_the_llm():
+    responder = TemplateResponder()
+    assert responder.respond(info(), [], "Hello!") is None
+    assert responder.respond(info(level="Beginner"), ["level"], "I'm new, what do you suggest?") is None
+    complete = info(goal="g", level="Beginner", skills="none", career_path="AI Engineer")
+    assert responder.respond(complete, ["skills"], "no skills") is None
+
+
+def test_caveats_and_unexplained_words_go_to_the_llm():
+    responder = TemplateResponder()
+    collected = info(goal="Learn Data Science", career_path="Data Scientist", level="Beginner")
+    for text in [
+        "I'm a beginner but worried about the math",
+        "I know Python, though I'm not sure this is for me",
+        "I'm a beginner and honestly my job is killing me",
+    ]:
+        assert responder.open_ended(text), text
+        assert responder.respond(collected, ["level"], text) is None
+    # A plain answer, with filler, still takes the fast path
+    assert not responder.open_ended("I know a little HTML.")
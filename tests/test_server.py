@@ -0,0 +1,145 @@
+import asyncio
+import json
+
+import numpy as np
+from websockets.asyncio.client import connect
+from websockets.asyncio.server import serve
+
+from core.server import ConversationServer, SessionManager
+from core.speaker import TTS_BACKENDS, Speaker
+
+
+class FakeListener:
+    def __init__(self):
+        self.calls = 0
+
+    def transcribe(self, audio, sample_rate):
+        self.calls += 1
+        return f"I heard {len(audio)} samples"
+
+
+class FakeThinker:
+    """Per-session state: counts its own turns."""
+    def __init__(self):
+        self.history = []
+
+    async def process_input_stream(self, user_text):
+        self.history.append(user_text)
+        for piece in [f"Turn {len(self.history)} for you. ", "Are you a beginner?"]:
+            await asyncio.sleep(0.01)
+            yield piece
+
+
+class SilentBackend:
+    name = "silent"
+    sample_format = "pcm_s16le@16000/mono"
+    sample_rate = 16000
+
+    def __init__(self, voice=None, rate=None):
+        pass
+
+    def synthesize_array(self, text, sample_rate=None):
+        return np.ones(160 * len(text.split()), dtype=np.int16), 16000
+
+
+def make_server(monkeypatch, **kwargs):
+    monkeypatch.setitem(TTS_BACKENDS, "silent", SilentBackend)
+    speaker = Speaker(backend="silent", cache_dir=None)
+    return ConversationServer(FakeListener(), speaker, create_thinker=FakeThinker, **kwargs)
+
+
+async def talk(url, pcm=None, text=None):
+    """One turn; returns (session id, events, audio bytes received)."""
+    async with connect(url) as ws:
+        ready = json.loads(await ws.recv())
+        if text is not None:
+            await ws.send(json.dumps({"type": "text", "text": text}))
+        else:
+            for i in range(0, len(pcm), 1600):
+                await ws.send(pcm[i:i + 1600].tobytes())
+            await ws.send(json.dumps({"type": "end_of_utterance"}))
+        events, audio = [], 0
+        while True:
+            message = await ws.recv()
+            if isinstance(message, bytes):
+                audio += len(message)
+                continue
+            event = json.loads(message)
+            events.append(event)
+            if event["type"] == "turn_end":
+                return ready["session"], events, audio
+
+
+def test_concurrent_sessions_share_models_and_keep_state_apart(monkeypatch):
+    server = make_server(monkeypatch)
+
+    async def main():
+        async with serve(server.handle, "127.0.0.1", 0) as ws_server:
+            port = ws_server.sockets[0].getsockname()[1]
+            url = f"ws://127.0.0.1:{port}"
+            pcm = np.zeros(8000, dtype=np.int16)
+            return await asyncio.gather(*(talk(url, pcm=pcm) for _ in range(5)))
+
+    results = asyncio.run(main())
+
+    assert len({session for session, _, _ in results}) == 5
+    assert len(server.sessions) == 5
+    assert server.listener.calls == 5
+    for _, events, audio in results:
+        kinds = [event["type"] for event in events]
+        assert kinds[0] == "transcript" and events[0]["text"] == "I heard 8000 samples"
+        assert kinds.count("audio") == 2
+        assert audio == sum(event["samples"] * 2 for event in events if event["type"] == "audio")
+        # Each session's Thinker saw only its own first turn
+        assert events[-1]["text"] == "Turn 1 for you. Are you a beginner?"
+        assert events[-1]["timings"]["first_audio"] <= events[-1]["timings"]["total"]
+
+
+def test_reconnect_resumes_session(monkeypatch):
+    server = make_server(monkeypatch)
+
+    async def main():
+        async with serve(server.handle, "127.0.0.1", 0) as ws_server:
+            url = f"ws://127.0.0.1:{ws_server.sockets[0].getsockname()[1]}"
+            session, _, _ = await talk(url, text="hello")
+            _, events, _ = await talk(f"{url}/?session={session}", text="again")
+            return session, events
+
+    session, events = asyncio.run(main())
+    assert events[-1]["text"].startswith("Turn 2")
+    assert server.sessions.get(session).thinker.history == ["hello", "again"]
+
+
+def test_default_thinkers_share_one_course_catalog(monkeypatch):
+    monkeypatch.setitem(TTS_BACKENDS, "silent", SilentBackend)
+    server = ConversationServer(FakeListener(), Speaker(backend="silent", cache_dir=None))
+    first = server.sessions.open().thinker
+    second = server.sessions.open().thinker
+    assert first is not second
+    assert first.lms is second.lms
+
+
+def test_idle_sessions_are_evicted():
+    sessions = SessionManager(FakeThinker, idle_timeout=10, max_sessions=2)
+    first = sessions.open()
+    second = sessions.open()
+    assert sessions.open() is None  # Full
+
+    second.touch()
+    idle = sessions.idle(now=first.last_active + 11)
+    assert first in idle
+    sessions.close(first.id)
+    assert sessions.open() is not None
+
+
+def test_session_tokens_are_unguessable_and_expire():
+    sessions = SessionManager(FakeThinker, idle_timeout=10)
+    first = sessions.open()
+    second = sessions.open()
+    assert len(first.id) >= 22 and first.id != second.id
+
+    assert sessions.open(first.id) is first
+    first.last_active -= 11
+    resumed = sessions.open(first.id)
+    assert resumed is not first and resumed.id != first.id
+    assert sessions.get(first.id) is None
@@ -1,10 +1,19 @@
 import sys
 import os
+import subprocess
+import threading
+import time
+import types
+
+import numpy as np
+import pytest
+import scipy.io.wavfile as wav
 
 # Add project root to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from core.speaker import Speaker
+from core.speaker import NullOutput, Pyttsx3Backend, Speaker, TTS_BACKENDS, create_backend
+
 
 def test_speaker():
     print("Initializing Speaker...")
@@ -25,5 +34,109 @@ def test_speaker():
     if os.path.exists(path):
         os.remove(path)
 
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        create_backend("festival")
+
+
+def test_gtts_decodes_in_memory_and_resamples(tmp_path, monkeypatch):
+    gtts = pytest.importorskip("gtts")
+
+    class FakeGTTS:
+        """Writes one second of 24 kHz audio (gTTS's native rate) to the buffer."""
+        def __init__(self, text, lang="en", slow=False):
+            pass
+
+        def write_to_fp(self, fp):
+            t = np.arange(24000) / 24000
+            wav.write(fp, 24000, (0.3 * np.sin(2 * np.pi * 440 * t) * 32767).astype(np.int16))
+
+    def no_subprocess(*args, **kwargs):
+        raise AssertionError("gTTS path must not spawn a process")
+
+    monkeypatch.setattr(gtts, "gTTS", FakeGTTS)
+    monkeypatch.setattr(subprocess, "run", no_subprocess)
+
+    speaker = Speaker(backend="gtts", cache_dir=str(tmp_path / "cache"))
+    audio, sr = speaker.synthesize("Hello there.", sample_rate=16000, output_path=str(tmp_path / "out.wav"))
+    assert sr == 16000 and audio.dtype == np.int16
+    assert abs(len(audio) - 16000) < 400
+    assert wav.read(str(tmp_path / "out.wav"))[0] == 16000
+
+    # Second call is served from the cache at the backend's native rate, then resampled
+    again, sr = speaker.synthesize("Hello there.")
+    assert sr == 44100 and speaker.cache.hits == 1
+
+    path = speaker.speak_to_file("Something new.", str(tmp_path / "file.wav"))
+    assert wav.read(path)[0] == 44100
+
+
+class ToneBackend:
+    """Synthesizes 0.1 s of audio per word, slowly, and counts calls."""
+    name = "tone"
+    sample_format = "pcm_s16le@16000/mono"
+    sample_rate = 16000
+
+    def __init__(self, voice=None, rate=None):
+        self.calls = []
+
+    def synthesize_array(self, text, sample_rate=None):
+        time.sleep(0.02)
+        self.calls.append(text)
+        return np.full(1600 * len(text.split()), len(self.calls), dtype=np.int16), 16000
+
+
+def test_stream_synthesizes_each_sentence_once_and_plays_gaplessly(tmp_path, monkeypatch):
+    monkeypatch.setitem(TTS_BACKENDS, "tone", ToneBackend)
+    output = NullOutput(record=True)
+    speaker = Speaker(backend="tone", cache_dir=None, output=output)
+    handed_to_avatar = []
+
+    chunks = ["Great choice! Are you", " a beginner? Do you know", " any Python?"]
+    spoken = speaker.stream(iter(chunks), on_audio=lambda s, audio, sr: handed_to_avatar.append(audio))
+
+    assert spoken == ["Great choice!", "Are you a beginner?", "Do you know any Python?"]
+    assert sorted(speaker.backend.calls) == sorted(spoken)
+    played = np.concatenate(output.written)
+    assert np.array_equal(played, np.concatenate(handed_to_avatar))
+    assert len(played) == 1600 * 11
+
+
+def test_pyttsx3_engine_lives_on_one_thread(tmp_path, monkeypatch):
+    threads = []
+
+    class FakeEngine:
+        def __init__(self):
+            threads.append(threading.get_ident())
+
+        def setProperty(self, name, value):
+            threads.append(threading.get_ident())
+
+        def save_to_file(self, text, path):
+            threads.append(threading.get_ident())
+            if text == "fail":
+                raise RuntimeError("espeak failed")
+            with open(path, "w") as f:
+                f.write(text)
+
+        def runAndWait(self):
+            threads.append(threading.get_ident())
+
+    monkeypatch.setitem(sys.modules, "pyttsx3", types.SimpleNamespace(init=FakeEngine))
+    backend = Pyttsx3Backend(rate=150)
+    callers = [threading.Thread(target=backend.synthesize, args=(f"hi {i}", str(tmp_path / f"{i}.wav")))
+               for i in range(4)]
+    for caller in callers:
+        caller.start()
+    for caller in callers:
+        caller.join()
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == [f"{i}.wav" for i in range(4)]
+    assert len(set(threads)) == 1 and threads[0] != threading.get_ident()
+    with pytest.raises(RuntimeError, match="espeak failed"):
+        backend.synthesize("fail", str(tmp_path / "fail.wav"))
+
+
 if __name__ == "__main__":
     test_speaker()
@@ -1,11 +1,14 @@
 import sys
 import os
 
+import ollama
+
 # Add project root to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from core.thinker import Thinker
 
+
 def test_thinker():
     print("Initializing Thinker...")
     try:
@@ -29,5 +32,183 @@ def test_thinker():
         
     print("\n✅ Conversation simulation complete.")
 
+
+def fake_stream(*replies):
+    """Stand-in for ollama.chat(stream=True): one reply per call, streamed in small chunks."""
+    calls = iter(replies)
+
+    def chat(model, messages, stream=False, **kwargs):
+        reply = next(calls)
+        if not stream:
+            return {"message": {"content": reply}}
+        return ({"message": {"content": reply[i:i + 5]}} for i in range(0, len(reply), 5))
+    return chat
+
+
+def test_process_input_stream_yields_before_reply_ends(monkeypatch):
+    monkeypatch.setattr(ollama, "chat", fake_stream("Great choice! Are you a beginner? Or do you have experience?"))
+    thinker = Thinker(fast_path=False)
+
+    stream = thinker.process_input_stream("I want to be a web developer")
+    first = next(stream)
+    assert first.strip() == "Great choice!"
+    rest = "".join(stream)
+    assert (first + rest).strip() == "Great choice! Are you a beginner? Or do you have experience?"
+    assert thinker.history[-1]["content"] == first + rest
+
+
+def test_process_input_stream_retries_bad_phrase(monkeypatch):
+    monkeypatch.setattr(ollama, "chat", fake_stream(
+        "Ask the user about their level. Then continue.",
+        "What is your level?",
+    ))
+    sent = []
+    chat = ollama.chat
+
+    def recording_chat(model, messages, stream=False, **kwargs):
+        sent.append(list(messages))
+        return chat(model, messages, stream=stream, **kwargs)
+
+    monkeypatch.setattr(ollama, "chat", recording_chat)
+    thinker = Thinker(fast_path=False)
+
+    reply = "".join(thinker.process_input_stream("I want to be a web developer"))
+    assert reply == "What is your level?"
+    # The retry saw the rejected attempt and correction...
+    assert sent[1][-1]["content"].startswith("SYSTEM: You failed the rule")
+    # ...but once it succeeded they are dropped from history
+    assert [m["role"] for m in thinker.history] == ["system", "user", "assistant"]
+    assert thinker.pending == []
+
+
+def test_process_input_stream_truncates_late_leak(monkeypatch):
+    monkeypatch.setattr(ollama, "chat", fake_stream("Nice to meet you! Action: collect_info Params: level"))
+    thinker = Thinker()
+
+    reply = "".join(thinker.process_input_stream("Hello"))
+    assert reply.strip() == "Nice to meet you!"
+
+
+def test_process_input_stream_matches_process_input(monkeypatch):
+    replies = ["ASK: \"What skills do you have?\"", "Hi there, nice to meet you!\n- Goal: None\n- Level: None"]
+    for reply in replies:
+        monkeypatch.setattr(ollama, "chat", fake_stream(reply))
+        expected = Thinker().process_input("Hello")
+        monkeypatch.setattr(ollama, "chat", fake_stream(reply))
+        assert "".join(Thinker().process_input_stream("Hello")).strip() == expected
+
+
+def test_closing_stream_records_released_text_and_closes_ollama(monkeypatch):
+    closed = []
+
+    def chat(model, messages, stream=False, **kwargs):
+        def chunks():
+            try:
+                reply = "Great choice! Are you a beginner? Or do you have experience?"
+                for i in range(0, len(reply), 5):
+                    yield {"message": {"content": reply[i:i + 5]}}
+            finally:
+                closed.append(True)
+        return chunks()
+
+    monkeypatch.setattr(ollama, "chat", chat)
+    thinker = Thinker(fast_path=False)
+
+    stream = thinker.process_input_stream("I want to be a web developer")
+    first = next(stream)
+    stream.close()  # User barged in
+
+    assert closed == [True]
+    assert thinker.history[-2]["role"] == "user"
+    assert thinker.history[-1] == {"role": "assistant", "content": first}
+
+
+def test_history_stays_bounded_over_a_long_session(monkeypatch):
+    sent = []
+
+    def chat(model, messages, stream=False, **kwargs):
+        sent.append(messages)
+        return {"message": {"content": "Interesting! Tell me more about that please."}}
+
+    monkeypatch.setattr(ollama, "chat", chat)
+    thinker = Thinker(max_context_tokens=1500, keep_exchanges=3)
+
+    for i in range(40):
+        thinker.process_input(f"Here is a long story about my hobbies, part {i}. " * 5)
+
+    # System prompt + 3 exchanges, older turns live in the summary
+    assert len(thinker.history) == 7
+    assert thinker.context.summary is not None
+    assert sent[-1][1]["content"].startswith("Summary of the earlier conversation:")
+    assert sent[-1][-2]["content"].startswith("Here is a long story about my hobbies, part 39.")
+
+
+def test_prompt_prefix_is_stable_across_turns(monkeypatch):
+    sent = []
+
+    def chat(model, messages, stream=False, **kwargs):
+        sent.append((list(messages), kwargs))
+        return {"message": {"content": "Great! Are you a beginner?"}}
+
+    monkeypatch.setattr(ollama, "chat", chat)
+    thinker = Thinker(fast_path=False)
+    thinker.process_input("I want to be a web developer")
+    thinker.process_input("I know some Python")
+
+    (first, first_kwargs), (second, second_kwargs) = sent
+    # Everything but the trailing state block is re-sent unchanged, so Ollama can reuse its KV cache
+    assert first[0]["content"] == thinker.system_prompt
+    assert second[:len(first) - 1] == first[:-1]
+    assert "Current State of Information" in second[-1]["content"]
+    assert "Python" in second[-1]["content"]
+    assert first_kwargs == second_kwargs
+    assert first_kwargs["keep_alive"] and first_kwargs["options"]["num_ctx"]
+
+
+def test_fast_path_answers_determined_turns_without_the_llm(monkeypatch):
+    calls = []
+
+    def chat(model, messages, stream=False, **kwargs):
+        calls.append(messages[-2]["content"])
+        return {"message": {"content": "Hello! What would you like to learn?"}}
+
+    monkeypatch.setattr(ollama, "chat", chat)
+    thinker = Thinker()
+
+    # Nothing extracted: open-ended, so the LLM answers
+    assert thinker.process_input("Hi there") == "Hello! What would you like to learn?"
+    # Career given, level is the next missing field
+    reply = thinker.process_input("I want to be a web developer")
+    assert reply.startswith("Web Developer is an exciting career choice!")
+    assert "beginner" in reply
+    reply = thinker.process_input("I'm a beginner")
+    assert "skills" in reply
+    # The user asked something: back to the LLM
+    thinker.process_input("Can you tell me more about that?")
+
+    assert calls == ["Hi there", "Can you tell me more about that?"]
+    assert thinker.llm_calls == 2
+    assert thinker.llm_calls_avoided == 2
+    assert thinker.history[-3]["content"] == reply
+
+
+def test_fast_path_leaves_caveats_to_the_llm(monkeypatch):
+    calls = []
+
+    def chat(model, messages, stream=False, **kwargs):
+        calls.append(messages[-2]["content"])
+        return {"message": {"content": "Math is less scary than it looks! What do you know already?"}}
+
+    monkeypatch.setattr(ollama, "chat", chat)
+    thinker = Thinker()
+    thinker.process_input("I want to be a data scientist")
+    # Fills the level field, but the concern needs a real answer
+    thinker.process_input("I'm a beginner but worried about the math")
+
+    assert thinker.collected_info["level"] == "Beginner"
+    assert calls == ["I'm a beginner but worried about the math"]
+    assert thinker.llm_calls_avoided == 1
+
+
 if __name__ == "__main__":
     test_thinker()
@@ -0,0 +1,76 @@
+import os
+
+import pytest
+
+from core.speaker import TTS_BACKENDS, Speaker
+from core.tts_cache import TTSCache
+
+
+def write(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+    return str(path)
+
+
+def test_hits_survive_restart_and_normalize_whitespace(tmp_path):
+    cache = TTSCache(str(tmp_path / "cache"))
+    key = TTSCache.key("Hello  there!\n", "Samantha", 175, "gtts", "pcm_s16le@44100")
+    assert key == TTSCache.key("Hello there!", "Samantha", 175, "gtts", "pcm_s16le@44100")
+    assert key != TTSCache.key("Hello there!", "Alex", 175, "gtts", "pcm_s16le@44100")
+
+    assert not cache.get(key, str(tmp_path / "out.wav"))
+    cache.put(key, write(tmp_path / "src.wav", b"RIFF-audio"))
+    assert cache.get(key, str(tmp_path / "out.wav"))
+    assert (tmp_path / "out.wav").read_bytes() == b"RIFF-audio"
+
+    reopened = TTSCache(str(tmp_path / "cache"))
+    assert reopened.get(key, str(tmp_path / "again.wav"))
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 1)
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = TTSCache(str(tmp_path / "cache"), max_bytes=250, memory_items=1)
+    src = write(tmp_path / "src.wav", b"x" * 100)
+    cache.put("a", src)
+    cache.put("b", src)
+    cache.get("a", str(tmp_path / "out.wav"))  # "b" is now least recently used
+    cache.put("c", src)
+
+    assert "a" in cache and "c" in cache and "b" not in cache
+    assert cache.size_bytes <= 250
+    assert not os.path.exists(os.path.join(cache.cache_dir, "b.wav"))
+
+
+@pytest.fixture
+def counting_speaker(tmp_path, monkeypatch):
+    calls = []
+
+    class CountingBackend:
+        name = "counting"
+        sample_format = "bytes"
+
+        def __init__(self, voice=None, rate=None):
+            pass
+
+        def synthesize(self, text, output_path):
+            calls.append(text)
+            write(output_path, text.encode())
+
+    monkeypatch.setitem(TTS_BACKENDS, "counting", CountingBackend)
+    speaker = Speaker(backend="counting", cache_dir=str(tmp_path / "cache"))
+    return speaker, calls
+
+
+def test_speaker_serves_repeats_and_prewarmed_phrases_from_cache(counting_speaker):
+    speaker, calls = counting_speaker
+    speaker.prewarm(["I've found a great course for you! Check the link below."])
+    assert calls == ["I've found a great course for you! Check the link below.",
+                     "I've found a great course for you!", "Check the link below."]
+
+    for _ in range(3):
+        path = speaker.speak_to_file("Check the link below.")
+        assert open(path, "rb").read() == b"Check the link below."
+        os.remove(path)
+    assert len(calls) == 3
+    assert speaker.cache.stats()["hits"] == 3
+
@@ -0,0 +1,54 @@
+import numpy as np
+
+from core.vad import EnergyVAD, create_vad, frame_signal
+
+SR = 16000
+
+
+def tone(seconds, amplitude=6000, freq=220):
+    t = np.arange(int(seconds * SR)) / SR
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype(np.int16)
+
+
+def noise(seconds, amplitude, seed=0):
+    rng = np.random.default_rng(seed)
+    return (amplitude * rng.standard_normal(int(seconds * SR))).clip(-32768, 32767).astype(np.int16)
+
+
+def test_frame_signal_is_a_view():
+    audio = np.arange(1000, dtype=np.int16)
+    frames = frame_signal(audio, 480)
+    assert frames.shape == (2, 480)
+    assert np.shares_memory(frames, audio)
+
+
+def test_energy_vad_finds_speech_in_quiet_room():
+    audio = np.concatenate([noise(1.0, 30), tone(1.0) + noise(1.0, 30), noise(1.0, 30)])
+    mask = EnergyVAD(hangover=0).speech_mask(audio)
+    frames_per_second = len(mask) / 3
+    speech = np.flatnonzero(mask) / frames_per_second
+    assert mask.sum() > 0.9 * frames_per_second
+    assert speech.min() >= 0.95 and speech.max() <= 2.05
+
+
+def test_energy_vad_loud_int16_does_not_overflow():
+    # int16 squares overflow; a full-scale tone must still read as speech
+    assert EnergyVAD().speech_mask(tone(0.3, amplitude=32000)).all()
+
+
+def test_energy_vad_adapts_to_steady_background_noise():
+    vad = EnergyVAD(hangover=0)
+    # A fan-like hiss at a level the fixed RMS threshold of 200 calls speech
+    background = noise(3.0, 400)
+    mask = vad.speech_mask(background)
+    assert mask[-30:].sum() == 0
+    assert vad.speech_mask(tone(0.5, amplitude=8000) + noise(0.5, 400, seed=1)).mean() > 0.9
+
+
+def test_create_vad_rejects_unknown_backend():
+    try:
+        create_vad("nope")
+    except ValueError:
+        pass
+    else:
+        assert False, "expected ValueError"
@@ -0,0 +1,78 @@
+import os
+import time
+
+import numpy as np
+import scipy.io.wavfile as wav
+
+from core.video_segments import SegmentPlaylist, find_split_points, render_progressive
+
+SR = 16000
+
+
+def speech_with_pauses(bursts, pause=0.4):
+    """Tone bursts of the given lengths (seconds) separated by silent pauses."""
+    rng = np.random.default_rng(0)
+    parts = []
+    for seconds in bursts:
+        t = np.arange(int(seconds * SR)) / SR
+        parts.append(0.3 * np.sin(2 * np.pi * 220 * t))
+        parts.append(0.001 * rng.standard_normal(int(pause * SR)))
+    return (np.concatenate(parts) * 32767).astype(np.int16)
+
+
+def test_split_points_land_in_pauses():
+    audio = speech_with_pauses([2.5, 2.5, 2.5, 2.5])
+    ranges = find_split_points(audio, SR, target_seconds=3.0, max_seconds=4.0)
+
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(audio)
+    assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+    assert len(ranges) == 4
+    for _, end in ranges[:-1]:
+        # Every cut falls in the quiet gap after a burst
+        assert abs(audio[end - 800:end + 800].astype(np.float32)).max() < 200
+
+
+def test_short_audio_is_one_segment():
+    assert find_split_points(np.zeros(SR, dtype=np.int16), SR) == [(0, SR)]
+
+
+def test_playlist_releases_segments_in_order(tmp_path):
+    playlist = SegmentPlaylist(str(tmp_path / "playlist.m3u8"))
+    playlist.publish(1, str(tmp_path / "b.mp4"), 2.0)
+    assert playlist.segments == []
+    playlist.publish(0, str(tmp_path / "a.mp4"), 3.0)
+    playlist.publish(2, None, 1.0)  # Failed segment is skipped
+    playlist.finish(3)
+
+    assert [os.path.basename(path) for _, path, _ in playlist] == ["a.mp4", "b.mp4"]
+    text = (tmp_path / "playlist.m3u8").read_text()
+    assert text.index("a.mp4") < text.index("b.mp4")
+    assert "#EXT-X-ENDLIST" in text
+
+
+class SlowAvatar:
+    """Render time proportional to audio length, like SadTalker."""
+    def generate_video(self, audio_path, image_path=None, output_path=None):
+        sr, audio = wav.read(audio_path)
+        time.sleep(0.02 * len(audio) / sr)
+        with open(output_path, "w") as f:
+            f.write("dummy video content")
+        return output_path
+
+
+def test_render_progressive_streams_segments(tmp_path):
+    audio_path = str(tmp_path / "reply.wav")
+    wav.write(audio_path, SR, speech_with_pauses([2.5] * 6))
+
+    start = time.perf_counter()
+    playlist = render_progressive(SlowAvatar(), audio_path, str(tmp_path / "out"), max_workers=2,
+                                  target_seconds=3.0, max_seconds=4.0)
+    first = next(iter(playlist))
+    first_at = time.perf_counter() - start
+    assert playlist.wait(timeout=10)
+
+    assert first[0] == 0 and os.path.exists(first[1])
+    assert len(list(playlist)) == 6
+    # First segment is ready well before the whole clip would have rendered
+    assert first_at < 0.02 * 17
+    assert not any(name.endswith(".wav") for name in os.listdir(tmp_path / "out"))
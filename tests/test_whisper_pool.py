@@ -0,0 +1,68 @@
+import threading
+import time
+
+import core.whisper_pool as whisper_pool
+
+
+class FakeModel:
+    """Stands in for WhisperModel: records how many transcriptions overlap."""
+    loads = 0
+
+    def __init__(self, model_size, **kwargs):
+        FakeModel.loads += 1
+        if model_size == "slow":
+            time.sleep(1.0)
+        self.kwargs = kwargs
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def transcribe(self, audio, **kwargs):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+
+        def segments():
+            time.sleep(0.05)  # Decoding happens lazily, while segments are consumed
+            with self.lock:
+                self.active -= 1
+            yield from ()
+        return segments(), None
+
+
+def test_pool_is_shared_warmed_and_bounded(monkeypatch):
+    monkeypatch.setattr(whisper_pool, "WhisperModel", FakeModel)
+    whisper_pool.clear_pools()
+    FakeModel.loads = 0
+
+    pool = whisper_pool.get_pool("tiny", cpu_threads=2, num_workers=2)
+    assert whisper_pool.get_pool("tiny") is pool
+    assert FakeModel.loads == 1
+    assert pool.warmed_up
+    assert pool.model.kwargs["cpu_threads"] == 2 and pool.model.kwargs["num_workers"] == 2
+
+    pool.model.max_active = 0
+    threads = [threading.Thread(target=pool.transcribe, args=(None,)) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert pool.model.max_active == 2
+
+    assert whisper_pool.get_pool("base", warm_up=False) is not pool
+    whisper_pool.clear_pools()
+
+
+def test_loading_one_model_does_not_block_other_pools(monkeypatch):
+    monkeypatch.setattr(whisper_pool, "WhisperModel", FakeModel)
+    whisper_pool.clear_pools()
+    pool = whisper_pool.get_pool("tiny", warm_up=False)
+
+    loading = threading.Thread(target=whisper_pool.get_pool, args=("slow",), kwargs={"warm_up": False})
+    loading.start()
+    time.sleep(0.1)
+    start = time.perf_counter()
+    assert whisper_pool.get_pool("tiny", warm_up=False) is pool
+    assert time.perf_counter() - start < 0.5
+    loading.join()
+    whisper_pool.clear_pools()